@@ -24,6 +24,10 @@ class Conf(_config.ConfigNamespace):
         "",
         'Optional default username for ALMA archive.')
 
+    max_workers = _config.ConfigItem(
+        4,
+        'Maximum number of concurrent requests sent to the archive.')
+
 
 conf = Conf()
 
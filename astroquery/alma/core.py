@@ -10,6 +10,7 @@ import string
 import requests
 from requests import HTTPError
 import sys
+from functools import partial
 from pkg_resources import resource_filename
 from bs4 import BeautifulSoup
 
@@ -26,7 +27,11 @@ import astropy.io.votable as votable
 from ..exceptions import (RemoteServiceError, TableParseError,
                           InvalidQueryError, LoginError)
 from ..utils import commons, url_helpers
+from ..utils.parallel import (HAS_FUTURES, ThreadPoolExecutor, as_completed,
+                              parallel_map)
+from ..utils.pickle_cache import load_or_build
 from ..utils.process_asyncs import async_to_sync
+from ..utils.tar_stream import extract_tar_stream
 from ..query import QueryWithLogin
 from . import conf
 
@@ -39,9 +44,18 @@ class AlmaClass(QueryWithLogin):
     TIMEOUT = conf.timeout
     archive_url = conf.archive_url
     USERNAME = conf.username
+    MAX_WORKERS = conf.max_workers
+    # seconds between two polls of the staging status
+    STAGING_POLL_INTERVAL = 1
+    # seconds for which the query keywords of a mirror are trusted
+    VALIDATION_SCHEMA_LIFETIME = 7 * 24 * 3600
 
     def __init__(self):
         super(AlmaClass, self).__init__()
+        # query validation schema per mirror, and validator answers per
+        # (validator url, keyword, value)
+        self._validation_schemas = {}
+        self._validation_results = {}
 
     def query_object_async(self, object_name, cache=True, public=True,
                            science=True, payload=None, **kwargs):
@@ -195,23 +209,43 @@ class AlmaClass(QueryWithLogin):
         """
         Use the ALMA query validator service to check whether the keywords are
         valid
+
+        Keywords are first checked against the query form of the archive
+        mirror (see `_get_validation_schema`): a value among those offered by
+        the form is accepted without asking the validator.  The other
+        keywords are sent to the validator concurrently, and its answers are
+        remembered per ``(keyword, value)`` unless ``cache`` is False.
         """
 
         # Check that the keywords specified are allowed
-        self._validate_payload(payload)
+        schema = self._validate_payload(payload)
 
         vurl = self._get_dataarchive_url() + '/aq/validate'
 
         bad_kws = {}
+        remote_kws = []
+        for kw, value in payload.items():
+            if _accepted_value(value, schema.get(kw)):
+                continue
+            key = (vurl, kw, repr(value))
+            if cache and key in self._validation_results:
+                if self._validation_results[key]:
+                    bad_kws[kw] = self._validation_results[key]
+            else:
+                remote_kws.append(kw)
 
-        for kw in payload:
+        def validate(kw):
             vpayload = {'field': kw,
                         kw: payload[kw]}
             response = self._request('GET', vurl, params=vpayload, cache=cache,
                                      timeout=self.TIMEOUT)
+            return kw, response.content
 
-            if response.content:
-                bad_kws[kw] = response.content
+        for kw, content in parallel_map(validate, remote_kws,
+                                        max_workers=self.MAX_WORKERS):
+            self._validation_results[(vurl, kw, repr(payload[kw]))] = content
+            if content:
+                bad_kws[kw] = content
 
         if bad_kws:
             raise InvalidQueryError("Invalid query parameters: "
@@ -234,9 +268,9 @@ class AlmaClass(QueryWithLogin):
                 self.dataarchive_url = self.archive_url
         return self.dataarchive_url
 
-    def stage_data(self, uids):
+    def _iter_staged_files(self, uids):
         """
-        Stage ALMA data
+        Stage ALMA data, yielding the files as they become available.
 
         Parameters
         ----------
@@ -244,11 +278,11 @@ class AlmaClass(QueryWithLogin):
             A list of valid UIDs or a single UID.
             UIDs should have the form: 'uid://A002/X391d0b/X7b'
 
-        Returns
-        -------
+        Yields
+        ------
         data_file_table : Table
-            A table containing 3 columns: the UID, the file URL (for future
-            downloading), and the file size
+            The files that became available since the previous iteration,
+            with the same columns as the table returned by `stage_data`.
         """
 
         """
@@ -295,7 +329,8 @@ class AlmaClass(QueryWithLogin):
                             "the same UIDs, the result returned is probably "
                             "correct, otherwise you may need to create a fresh "
                             "astroquery.Alma instance.")
-                return self._last_successful_staging_log['result']
+                yield self._last_successful_staging_log['result']
+                return
             else:
                 raise HTTPError("Received an error 405: this may indicate you "
                                 "have already staged the data.  Try downloading "
@@ -342,21 +377,6 @@ class AlmaClass(QueryWithLogin):
         self._staging_log['data_page'] = data_page
         data_page.raise_for_status()
 
-        has_completed = False
-        while not has_completed:
-            time.sleep(1)
-            summary = self._request('GET', url_helpers.join(data_page_url,
-                                                            'summary'),
-                                    cache=False)
-            summary.raise_for_status()
-            print(".", end='')
-            sys.stdout.flush()
-            has_completed = summary.json()['complete']
-
-        self._staging_log['summary'] = summary
-        summary.raise_for_status()
-        self._staging_log['json_data'] = json_data = summary.json()
-
         username = self.USERNAME if self.USERNAME else 'anonymous'
 
         # templates:
@@ -371,12 +391,59 @@ class AlmaClass(QueryWithLogin):
                                                     staging_page_id=dpid,
                                                     username=username,
                                                     ))
+        staged_urls = set()
+        has_completed = False
+        while not has_completed:
+            time.sleep(self.STAGING_POLL_INTERVAL)
+            summary = self._request('GET', url_helpers.join(data_page_url,
+                                                            'summary'),
+                                    cache=False)
+            summary.raise_for_status()
+            print(".", end='')
+            sys.stdout.flush()
+            json_data = summary.json()
+            has_completed = json_data['complete']
+
+            # files are ready as soon as their own staging has completed
+            ready = [entry for entry in json_data['node_data']
+                     if has_completed or entry.get('de_state') == 'COMPLETE']
+            tbl = self._json_summary_to_table({'node_data': ready},
+                                              base_url=base_url)
+            new_rows = [ii for ii, url in enumerate(tbl['URL'])
+                        if url not in staged_urls]
+            staged_urls.update(tbl['URL'])
+            yield tbl[new_rows]
+
+        self._staging_log['summary'] = summary
+        self._staging_log['json_data'] = json_data
+
         tbl = self._json_summary_to_table(json_data, base_url=base_url)
         self._staging_log['result'] = tbl
         self._staging_log['file_urls'] = tbl['URL']
         self._last_successful_staging_log = self._staging_log
 
-        return tbl
+    def stage_data(self, uids):
+        """
+        Stage ALMA data
+
+        Parameters
+        ----------
+        uids : list or str
+            A list of valid UIDs or a single UID.
+            UIDs should have the form: 'uid://A002/X391d0b/X7b'
+
+        Returns
+        -------
+        data_file_table : Table
+            A table containing 3 columns: the UID, the file URL (for future
+            downloading), and the file size
+        """
+        for staged in self._iter_staged_files(uids):
+            pass
+        if 'result' not in self._staging_log:
+            # error 405: the previous staging result was returned
+            return staged
+        return self._staging_log['result']
 
     def _HEADER_data_size(self, files):
         """
@@ -400,31 +467,49 @@ class AlmaClass(QueryWithLogin):
 
         return data_sizes, totalsize.to(u.GB)
 
-    def download_files(self, files, savedir=None, cache=True, continuation=True):
+    def download_files(self, files, savedir=None, cache=True, continuation=True,
+                       max_workers=None):
         """
         Given a list of file URLs, download them
 
         Note: Given a list with repeated URLs, each will only be downloaded
         once, so the return may have a different length than the input list
+
+        Up to ``max_workers`` files (default ``conf.max_workers``) are
+        downloaded concurrently.
         """
-        downloaded_files = []
         if savedir is None:
             savedir = self.cache_location
-        for fileLink in unique(files):
-            try:
-                filename = self._request("GET", fileLink, save=True,
-                                         savedir=savedir,
-                                         timeout=self.TIMEOUT, cache=cache,
-                                         continuation=continuation)
-                downloaded_files.append(filename)
-            except requests.HTTPError as ex:
-                if ex.response.status_code == 401:
-                    log.info("Access denied to {url}.  Skipping to"
-                             " next file".format(url=fileLink))
-                    continue
-                else:
-                    raise ex
-        return downloaded_files
+        if max_workers is None:
+            max_workers = self.MAX_WORKERS
+
+        def download(fileLink):
+            return self._download_or_skip(fileLink, savedir=savedir,
+                                          cache=cache,
+                                          continuation=continuation)
+
+        downloaded_files = parallel_map(download, unique(files),
+                                        max_workers=max_workers)
+        return [filename for filename in downloaded_files
+                if filename is not None]
+
+    def _download_or_skip(self, url, savedir=None, cache=True,
+                          continuation=True):
+        """
+        Download one file, returning its local path, or `None` if access to
+        it is denied.
+        """
+        try:
+            return self._request("GET", url, save=True, savedir=savedir,
+                                 timeout=self.TIMEOUT, cache=cache,
+                                 continuation=continuation)
+        except requests.HTTPError as ex:
+            if ex.response.status_code == 401:
+                log.info("Access denied to {url}.  Skipping to"
+                         " next file".format(url=url))
+                return None
+            else:
+                raise ex
 
     def retrieve_data_from_uid(self, uids, cache=True):
         """
@@ -444,20 +529,160 @@ class AlmaClass(QueryWithLogin):
         downloaded_files : list
             A list of the downloaded file paths
         """
+        results = list(self.iter_retrieve_data_from_uid(uids, cache=cache))
+        # return the files in staging order rather than completion order
+        order = list(self._staging_log.get('file_urls', []))
+        results.sort(key=lambda result: (order.index(result[0])
+                                         if result[0] in order
+                                         else len(order)))
+        return [filename for url, files in results for filename in files]
+
+    def iter_retrieve_data_from_uid(self, uids, cache=True, regex=None,
+                                    path='cache_path', delete=True,
+                                    max_workers=None):
+        """
+        Stage, download and optionally extract ALMA data as a pipeline.
+
+        Each file is downloaded as soon as the archive reports it as staged,
+        on a pool of up to ``max_workers`` concurrent downloads (default
+        ``conf.max_workers``), and tarballs are extracted while the following
+        files are still downloading.
+
+        Parameters
+        ----------
+        uids : list or str
+            A list of valid UIDs or a single UID.
+            UIDs should have the form: 'uid://A002/X391d0b/X7b'
+        cache : bool
+            Whether to cache the downloads.
+        regex : str or None
+            If given, extract the members of the downloaded tarballs whose
+            name matches this regular expression (see
+            `get_files_from_tarballs`).
+        path : 'cache_path' or str
+            Where to extract the files to.
+        delete : bool
+            Do not keep the tarballs: the matching members are then extracted
+            while the tarballs stream in, without saving them to disk.
+        max_workers : int or None
+            Maximum number of concurrent downloads.
+
+        Yields
+        ------
+        url : str
+            The URL of a file, in the order in which the files complete.
+        files : list
+            The downloaded file path, or the extracted file paths if
+            ``regex`` is given; empty if access to the file was denied.
+        """
         if isinstance(uids, six.string_types + (np.bytes_,)):
             uids = [uids]
         if not isinstance(uids, (list, tuple, np.ndarray)):
             raise TypeError("Datasets must be given as a list of strings.")
 
-        files = self.stage_data(uids)
-        file_urls = files['URL']
-        totalsize = files['size'].sum() * files['size'].unit
+        def download(url):
+            if regex is not None and delete:
+                return self._stream_extract(url, regex=regex, path=path)
+            return self._download_or_skip(url, cache=cache,
+                                          savedir=self.cache_location)
+
+        def extract(url, filename):
+            if regex is not None and delete:
+                # already extracted from the stream
+                return filename
+            if filename is None:
+                return []
+            if regex is None:
+                return [filename]
+            files = self.get_files_from_tarballs([filename], regex=regex,
+                                                 path=path)
+            if delete:
+                log.info("Deleting {0}".format(filename))
+                os.remove(filename)
+            return files
+
+        def staged_urls():
+            for staged in self._iter_staged_files(uids):
+                if len(staged):
+                    totalsize = np.nansum(staged['size']) * staged['size'].unit
+                    log.info("Downloading {0} more files of size {1}..."
+                             .format(len(staged), totalsize.to(u.GB)))
+                yield list(staged['URL'])
+
+        return self._pipeline(staged_urls(), download, extract,
+                              max_workers=max_workers)
+
+    def _stream_extract(self, url, regex=r'.*\.fits$', path='cache_path'):
+        """
+        Extract the members of a tarball matching ``regex`` while it
+        downloads, without saving the tarball.  Returns the list of extracted
+        files, empty if access to the tarball is denied.
+        """
+        if path == 'cache_path':
+            path = self.cache_location
+        elif not os.path.isdir(path):
+            raise OSError("Specified an invalid path {0}.".format(path))
+        try:
+            send = partial(self._rate_limited, url, self._session.request)
+            return extract_tar_stream(self._session, url, match=regex,
+                                      path=path, timeout=self.TIMEOUT,
+                                      send=send)
+        except requests.HTTPError as ex:
+            if ex.response.status_code == 401:
+                log.info("Access denied to {url}.  Skipping to"
+                         " next file".format(url=url))
+                return []
+            else:
+                raise ex
+
+    def _pipeline(self, url_batches, download, process, max_workers=None):
+        """
+        Download URLs as they arrive and process the downloaded files.
 
-        # each_size, totalsize = self.data_size(files)
-        log.info("Downloading files of size {0}...".format(totalsize.to(u.GB)))
-        # TODO: Add cache=cache keyword here.  Currently would have no effect.
-        downloaded_files = self.download_files(file_urls)
-        return downloaded_files
+        Parameters
+        ----------
+        url_batches : iterable of lists
+            Batches of URLs; a new batch may take time to arrive (e.g. the
+            files staged since the last poll).  Each URL is downloaded once.
+        download : callable
+            ``download(url)`` returns the downloaded file path.  Called in
+            the worker threads.
+        process : callable
+            ``process(url, filename)`` returns the list of resulting files.
+            Called in the calling thread while the workers keep downloading.
+        max_workers : int or None
+            Maximum number of concurrent downloads.
+
+        Yields
+        ------
+        url, files : str, list
+            The processed files of each URL, in completion order.
+        """
+        if max_workers is None:
+            max_workers = self.MAX_WORKERS
+        seen = set()
+
+        if not HAS_FUTURES or max_workers <= 1:
+            for batch in url_batches:
+                for url in batch:
+                    if url not in seen:
+                        seen.add(url)
+                        yield url, process(url, download(url))
+            return
+
+        with ThreadPoolExecutor(max_workers) as executor:
+            pending = {}
+            for batch in url_batches:
+                for url in batch:
+                    if url not in seen:
+                        seen.add(url)
+                        pending[executor.submit(download, url)] = url
+                for future in [f for f in pending if f.done()]:
+                    url = pending.pop(future)
+                    yield url, process(url, future.result())
+            for future in as_completed(list(pending)):
+                url = pending.pop(future)
+                yield url, process(url, future.result())
 
     def _parse_result(self, response, verbose=False):
         """
@@ -691,7 +916,7 @@ class AlmaClass(QueryWithLogin):
 
     def download_and_extract_files(self, urls, delete=True, regex=r'.*\.fits$',
                                    include_asdm=False, path='cache_path',
-                                   verbose=True):
+                                   verbose=True, max_workers=None):
         """
         Given a list of tarball URLs:
 
@@ -701,6 +926,10 @@ class AlmaClass(QueryWithLogin):
 
         See ``Alma.get_files_from_tarballs`` for details
 
+        If ``delete`` is set, the tarballs are never written to disk: the
+        matching members are extracted as the tarball streams in, and an
+        interrupted download resumes at the last complete member.
+
         Parameters
         ----------
         urls : str or list
@@ -711,6 +940,10 @@ class AlmaClass(QueryWithLogin):
             though, this file will be downloaded and deleted without extracting
             any information: you must change the regex if you want to extract
             data from an ASDM tarball
+        max_workers : int or None
+            Maximum number of concurrent downloads.  Defaults to
+            ``conf.max_workers``.  Tarballs are extracted while the following
+            ones are still downloading.
         """
 
         if isinstance(urls, six.string_types):
@@ -718,7 +951,7 @@ class AlmaClass(QueryWithLogin):
         if not isinstance(urls, (list, tuple, np.ndarray)):
             raise TypeError("Datasets must be given as a list of strings.")
 
-        all_files = []
+        to_download = []
         for url in urls:
             if url[-4:] != '.tar':
                 raise ValueError("URLs should be links to tarballs.")
@@ -736,33 +969,52 @@ class AlmaClass(QueryWithLogin):
                     log.info("ASDM tarballs do not contain FITS files; "
                              "skipping.")
                     continue
+            to_download.append(url)
 
+        def download(url):
+            if delete:
+                return self._stream_extract(url, regex=regex, path=path)
             try:
-                tarball_name = self._request('GET', url, save=True,
-                                             timeout=self.TIMEOUT)
-            except requests.ConnectionError as ex:
-                self.partial_file_list = all_files
-                log.error("There was an error downloading the file. "
-                          "A partially completed download list is "
-                          "in Alma.partial_file_list")
-                raise ex
+                return self._request('GET', url, save=True,
+                                     timeout=self.TIMEOUT)
             except requests.HTTPError as ex:
                 if ex.response.status_code == 401:
                     log.info("Access denied to {url}.  Skipping to"
                              " next file".format(url=url))
-                    continue
+                    return None
                 else:
                     raise ex
 
+        def extract(url, tarball_name):
+            if delete:
+                # already extracted from the stream
+                return tarball_name
+            if tarball_name is None:
+                return []
             fitsfilelist = self.get_files_from_tarballs([tarball_name],
                                                         regex=regex, path=path,
                                                         verbose=verbose)
-
             if delete:
                 log.info("Deleting {0}".format(tarball_name))
                 os.remove(tarball_name)
-
-            all_files += fitsfilelist
+            return fitsfilelist
+
+        # tarballs are extracted while the next ones are downloading
+        extracted = {}
+        try:
+            for url, files in self._pipeline([to_download], download, extract,
+                                             max_workers=max_workers):
+                extracted[url] = files
+        except requests.ConnectionError as ex:
+            self.partial_file_list = [filename for url in to_download
+                                      for filename in extracted.get(url, [])]
+            log.error("There was an error downloading the file. "
+                      "A partially completed download list is "
+                      "in Alma.partial_file_list")
+            raise ex
+
+        all_files = [filename for url in unique(to_download)
+                     for filename in extracted[url]]
         return all_files
 
     def help(self, cache=True):
@@ -872,25 +1124,58 @@ class AlmaClass(QueryWithLogin):
 
         return self._help_list
 
-    def _validate_payload(self, payload):
-        if not hasattr(self, '_valid_params'):
+    def _get_validation_schema(self):
+        """
+        The query keywords accepted by the archive mirror, mapped to the set
+        of values offered by the query form, or to `None` for free-form
+        keywords.
+
+        The schema is built from the query form (see `_get_help_page`) and
+        kept in ``cache_location`` for ``VALIDATION_SCHEMA_LIFETIME``
+        seconds.
+        """
+        url = self._get_dataarchive_url()
+        if url in self._validation_schemas:
+            return self._validation_schemas[url]
+
+        def build():
             help_list = self._get_help_page(cache=False)
-            self._valid_params = [row[1]
-                                  for title, section in help_list
-                                  for row in section]
-            if len(self._valid_params) == 0:
+            schema = {}
+            for title, section in help_list:
+                for row in section:
+                    keyword = row[1]
+                    if len(row) == 2:
+                        # free text
+                        schema[keyword] = None
+                    elif keyword not in schema or schema[keyword] is not None:
+                        values = (row[3] if isinstance(row[3], list)
+                                  else [row[3]])
+                        schema[keyword] = (schema.get(keyword) or
+                                           frozenset()).union(values)
+            if len(schema) == 0:
                 raise ValueError("The query validation failed for unknown "
                                  "reasons.  Try again?")
             # These parameters are entirely hidden, but Felix says they are
             # allowed
-            self._valid_params.append('download')
-            self._valid_params.append('format')
-            self._valid_params.append('member_ous_id')
-        invalid_params = [k for k in payload if k not in self._valid_params]
+            schema['download'] = frozenset(['true'])
+            schema['format'] = frozenset(['VOTABLE', 'URL', 'CSV'])
+            schema['member_ous_id'] = None
+            return schema
+
+        schema = load_or_build(self.cache_location, url, build,
+                               prefix="validation_schema_",
+                               max_age=self.VALIDATION_SCHEMA_LIFETIME)
+        self._validation_schemas[url] = schema
+        return schema
+
+    def _validate_payload(self, payload):
+        schema = self._get_validation_schema()
+        invalid_params = [k for k in payload if k not in schema]
         if len(invalid_params) > 0:
             raise InvalidQueryError("The following parameters are not accepted"
                                     " by the ALMA query service:"
                                     " {0}".format(invalid_params))
+        return schema
 
     def _parse_staging_request_page(self, data_list_page):
         """
@@ -1059,6 +1344,19 @@ def unique(seq):
     return [x for x in seq if not (x in seen or seen_add(x))]
 
 
+def _accepted_value(value, accepted):
+    """
+    Whether ``value`` (or each of its items) is one of the ``accepted``
+    values of a query form keyword.
+    """
+    if accepted is None:
+        return False
+    if isinstance(value, (list, tuple)):
+        return len(value) > 0 and all(six.text_type(v) in accepted
+                                      for v in value)
+    return six.text_type(value) in accepted
+
+
 def filter_printable(s):
     """ extract printable characters from a string """
     return filter(lambda x: x in string.printable, s)
@@ -0,0 +1,452 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+"""
+Bulk parsing of ALMA footprints and a local spatial index over them.
+
+`~astroquery.alma.utils.footprint_to_reg` turns the ``Footprint`` of a single
+row into pyregion shapes, which is fine for plotting a handful of
+observations but not for asking which of many thousand observations cover
+which of many thousand sources.  `parse_footprints` decodes a whole
+``Footprint`` column at once into packed arrays of polygon vertices and
+circles, and `FootprintIndex` answers point-in-footprint and overlap queries
+on them with NumPy, without any request to the archive.
+
+The index bounds each shape by a spherical cap and hashes the caps into a
+grid of cubic cells over the unit sphere, so that only the shapes sharing a
+cell with a source are tested exactly.
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import itertools
+
+import numpy as np
+import six
+from astropy import units as u
+from astropy.coordinates import SkyCoord
+
+__all__ = ['Footprints', 'FootprintIndex', 'parse_footprints']
+
+# code points of the first characters of the numeric tokens of a footprint;
+# the only other tokens are the shape names, each followed by its frame
+_NUMERIC_START = np.array([ord(char) for char in '0123456789+-.'],
+                          dtype=np.uint32)
+# number of candidate (source, shape) pairs tested exactly at once
+_PAIR_CHUNK = 2**14
+
+
+class Footprints(object):
+    """
+    Footprints of the rows of an ALMA query result, as packed arrays.
+
+    Attributes
+    ----------
+    nrows : int
+        Number of footprints (rows) parsed.
+    polygon_rows : `~numpy.ndarray`
+        Row of each polygon.
+    polygon_offsets : `~numpy.ndarray`
+        Polygon ``i`` has the vertices
+        ``vertices[polygon_offsets[i]:polygon_offsets[i + 1]]``.
+    vertices : `~numpy.ndarray`
+        ``(n, 2)`` array of the RA and Dec of the polygon vertices, in
+        degrees.
+    circle_rows : `~numpy.ndarray`
+        Row of each circle.
+    circles : `~numpy.ndarray`
+        ``(n, 3)`` array of the RA, Dec and radius of the circles, in
+        degrees.
+    """
+
+    def __init__(self, nrows, polygon_rows, polygon_offsets, vertices,
+                 circle_rows, circles):
+        self.nrows = nrows
+        self.polygon_rows = polygon_rows
+        self.polygon_offsets = polygon_offsets
+        self.vertices = vertices
+        self.circle_rows = circle_rows
+        self.circles = circles
+
+    def __repr__(self):
+        return ("<Footprints: {0} rows, {1} polygons, {2} circles>"
+                .format(self.nrows, len(self.polygon_rows),
+                        len(self.circle_rows)))
+
+
+def parse_footprints(footprints):
+    """
+    Parse a column of ALMA footprints.
+
+    Footprints are unions of shapes such as
+    ``'Polygon ICRS 266.519 -28.724 266.524 -28.731 ... Polygon ICRS ...'``
+    or ``'Circle ICRS 266.41 -29.00 0.0054'``.  All of them are decoded in a
+    handful of NumPy operations on the concatenated tokens.
+
+    Parameters
+    ----------
+    footprints : sequence of str
+        The ``Footprint`` column of an `~astroquery.alma.AlmaClass.query`
+        result (or any sequence of footprint strings).  Masked or empty
+        entries have no shapes.
+
+    Returns
+    -------
+    footprints : `Footprints`
+
+    Raises
+    ------
+    ValueError
+        If a footprint is not made of polygons and circles.
+    """
+    footprints = np.ma.filled(np.ma.asarray(footprints), '')
+    if footprints.dtype.kind == 'S':
+        footprints = np.char.decode(footprints, 'ascii')
+    strings = [six.text_type(footprint) for footprint in footprints]
+    nrows = len(strings)
+
+    # a '|' token starts each row
+    words = ('| ' + ' | '.join(strings)).split() if nrows else []
+    tokens = np.array(words, dtype='U') if words else np.array([], dtype='U1')
+    is_row = tokens == '|'
+    is_polygon = tokens == 'Polygon'
+    is_circle = tokens == 'Circle'
+    is_shape = is_polygon | is_circle
+    row = np.cumsum(is_row) - 1
+
+    # whatever follows a row marker must start a shape
+    after_row = np.flatnonzero(is_row) + 1
+    after_row = after_row[after_row < len(tokens)]
+    bad = ~(is_row[after_row] | is_shape[after_row])
+    if np.any(bad):
+        raise ValueError("Unrecognized footprint type in row {0}: {1}"
+                         .format(row[after_row[bad][0]],
+                                 strings[row[after_row[bad][0]]][:40]))
+
+    first = tokens.astype('U1').view(np.uint32)
+    numeric = np.in1d(first, _NUMERIC_START)
+    # words other than the shape names and the frame after them (e.g. Box,
+    # Not) would otherwise be dropped, and their values mixed with those of
+    # the shape before
+    after_shape = np.append(False, is_shape[:-1])
+    bad = ~(numeric | is_row | is_shape | after_shape)
+    if np.any(bad):
+        index = np.flatnonzero(bad)[0]
+        raise ValueError("Unrecognized footprint token {0!r} in row {1}: {2}"
+                         .format(words[index], row[index],
+                                 strings[row[index]][:40]))
+    shape = np.cumsum(is_shape) - 1
+    # much faster than converting the array of tokens with astype(float)
+    values = np.fromstring(' '.join(itertools.compress(words, numeric)),
+                           sep=' ')
+    if len(values) != numeric.sum():
+        raise ValueError("Invalid number in footprints")
+    counts = np.bincount(shape[numeric], minlength=is_shape.sum())
+    shape_rows = row[is_shape]
+    polygon = is_polygon[is_shape]
+
+    if np.any(counts[polygon] % 2) or np.any(counts[polygon] < 6):
+        raise ValueError("Polygons need at least three pairs of coordinates")
+    if np.any(counts[~polygon] != 3):
+        raise ValueError("Circles need a center and a radius")
+
+    # values of the polygons, in order, then of the circles
+    value_polygon = np.repeat(polygon, counts)
+    vertices = values[value_polygon].reshape(-1, 2)
+    circles = values[~value_polygon].reshape(-1, 3)
+    polygon_offsets = np.concatenate([[0], np.cumsum(counts[polygon]) // 2])
+    return Footprints(nrows, shape_rows[polygon], polygon_offsets, vertices,
+                      shape_rows[~polygon], circles)
+
+
+def _unit_vectors(lon, lat):
+    lon, lat = np.radians(lon), np.radians(lat)
+    cos_lat = np.cos(lat)
+    return np.column_stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon),
+                            np.sin(lat)])
+
+
+def _angle(cos_angle):
+    return np.arccos(np.clip(cos_angle, -1, 1))
+
+
+def _coordinate_vectors(coordinates):
+    if not isinstance(coordinates, SkyCoord):
+        coordinates = SkyCoord(coordinates)
+    coordinates = coordinates.icrs
+    return _unit_vectors(np.atleast_1d(coordinates.ra.deg),
+                         np.atleast_1d(coordinates.dec.deg))
+
+
+def _expand(starts, stops):
+    """
+    Indices ``i`` and values ``starts[i] <= j < stops[i]`` of all the
+    ranges, flattened.
+    """
+    counts = stops - starts
+    index = np.repeat(np.arange(len(starts)), counts)
+    position = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts,
+                                                   counts)
+    return index, starts[index] + position
+
+
+class FootprintIndex(object):
+    """
+    Spatial index of ALMA footprints.
+
+    Parameters
+    ----------
+    footprints : `Footprints` or sequence of str
+        Parsed footprints, or a ``Footprint`` column to parse with
+        `parse_footprints`.
+    cell_size : `~astropy.units.Quantity` or None
+        Angular size of the cells of the index.  The default is adapted to
+        the size of the footprints.
+
+    Examples
+    --------
+    >>> from astroquery.alma import Alma
+    >>> from astroquery.alma.footprints import FootprintIndex
+    >>> result = Alma.query_region('Sgr B2', radius=1*u.deg)  # doctest: +SKIP
+    >>> index = FootprintIndex(result['Footprint'])  # doctest: +SKIP
+    >>> sources, rows = index.query_points(catalog_coordinates)  # doctest: +SKIP
+    """
+
+    def __init__(self, footprints, cell_size=None):
+        if not isinstance(footprints, Footprints):
+            footprints = parse_footprints(footprints)
+        self.footprints = footprints
+
+        vertices = _unit_vectors(footprints.vertices[:, 0],
+                                 footprints.vertices[:, 1])
+        starts = footprints.polygon_offsets[:-1]
+        centers = np.add.reduceat(vertices, starts, axis=0) if len(starts) \
+            else np.zeros((0, 3))
+        centers /= np.sqrt((centers ** 2).sum(axis=1))[:, None]
+        polygon_of_vertex = np.repeat(np.arange(len(starts)),
+                                      np.diff(footprints.polygon_offsets))
+        vertex_angles = _angle((vertices *
+                                centers[polygon_of_vertex]).sum(axis=1))
+        radii = np.maximum.reduceat(vertex_angles, starts) if len(starts) \
+            else np.zeros(0)
+
+        circles = footprints.circles
+        # shapes: the polygons, then the circles
+        self._vertices = vertices
+        self._npolygons = len(starts)
+        self._centers = np.concatenate(
+            [centers, _unit_vectors(circles[:, 0], circles[:, 1])])
+        self._radii = np.concatenate([radii, np.radians(circles[:, 2])])
+        self.shape_rows = np.concatenate([footprints.polygon_rows,
+                                          footprints.circle_rows])
+        # tangent plane bases at the polygon centers, for the exact tests
+        self._east, self._north = self._tangent_bases(centers)
+
+        chord = 2 * np.sin(np.minimum(self._radii, np.pi) / 2)
+        if cell_size is None:
+            size = max(2 * np.median(chord), chord.max() / 4) \
+                if len(chord) else 1e-2
+        else:
+            size = 2 * np.sin(cell_size.to(u.rad).value / 2)
+        self._cell_size = max(size, 1e-6)
+        self._ncells = int(np.ceil(2 / self._cell_size)) + 1
+
+        shapes, keys = self._cells(self._centers, chord)
+        order = np.argsort(keys, kind='mergesort')
+        self._keys = keys[order]
+        self._shapes = shapes[order]
+
+    def __len__(self):
+        return len(self.shape_rows)
+
+    @staticmethod
+    def _tangent_bases(centers):
+        x, y, z = centers.T
+        east = np.column_stack([-y, x, np.zeros_like(x)])
+        norm = np.sqrt((east ** 2).sum(axis=1))
+        # any direction will do at the poles
+        east[norm == 0] = [1, 0, 0]
+        norm[norm == 0] = 1
+        east /= norm[:, None]
+        north = np.cross(centers, east)
+        return east, north
+
+    def _cells(self, centers, chord):
+        """
+        Cells overlapped by the bounding boxes of caps; returns the index of
+        the cap and the key of the cell of each (cap, cell) pair.
+        """
+        low = np.floor((centers - chord[:, None] + 1) /
+                       self._cell_size).astype(np.int64)
+        high = np.floor((centers + chord[:, None] + 1) /
+                        self._cell_size).astype(np.int64)
+        low = np.clip(low, 0, self._ncells - 1)
+        high = np.clip(high, 0, self._ncells - 1)
+        dims = high - low + 1
+        index, position = _expand(np.zeros(len(centers), dtype=np.int64),
+                                  dims.prod(axis=1))
+        dims, low = dims[index], low[index]
+        ix = low[:, 0] + position // (dims[:, 1] * dims[:, 2])
+        iy = low[:, 1] + (position // dims[:, 2]) % dims[:, 1]
+        iz = low[:, 2] + position % dims[:, 2]
+        return index, (ix * self._ncells + iy) * self._ncells + iz
+
+    def _candidates(self, keys, items):
+        """
+        (item, shape) pairs sharing a cell, without duplicates.
+        """
+        first = np.searchsorted(self._keys, keys, side='left')
+        last = np.searchsorted(self._keys, keys, side='right')
+        pair, position = _expand(first, last)
+        pairs = np.unique(items[pair] * len(self) + self._shapes[position])
+        return pairs // len(self), pairs % len(self)
+
+    def _in_polygons(self, points, polygons):
+        """
+        Whether each point lies in the matching polygon, by ray casting in
+        the gnomonic projection at the polygon center (where the polygon
+        edges, great circle arcs, are straight).
+        """
+        offsets = self.footprints.polygon_offsets
+        starts, counts = offsets[polygons], np.diff(offsets)[polygons]
+        inside = np.zeros(len(points), dtype=bool)
+        if len(points) == 0:
+            return inside
+        k = np.arange(counts.max())
+        # edges beyond the last vertex are degenerate and never crossed
+        a = starts[:, None] + np.minimum(k, counts[:, None] - 1)
+        b = np.where(k + 1 < counts[:, None], a + 1, starts[:, None])
+        b = np.where(k < counts[:, None], b, a)
+
+        center = self._centers[polygons]
+        east, north = self._east[polygons], self._north[polygons]
+
+        def project(vectors, e, n, c):
+            depth = (vectors * c).sum(axis=-1)
+            return ((vectors * e).sum(axis=-1) / depth,
+                    (vectors * n).sum(axis=-1) / depth)
+
+        px, py = project(points, east, north, center)
+        e, n, c = east[:, None], north[:, None], center[:, None]
+        ax, ay = project(self._vertices[a], e, n, c)
+        bx, by = project(self._vertices[b], e, n, c)
+        px, py = px[:, None], py[:, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            crossing = ((ay > py) != (by > py)) & \
+                (px < ax + (py - ay) * (bx - ax) / (by - ay))
+        inside = crossing.sum(axis=1) % 2 == 1
+        # points on the far side of the sphere project into the polygon too
+        return inside & ((points * center).sum(axis=1) > 0)
+
+    def _edge_distances(self, points, polygons):
+        """
+        Angular distance from each point to the closest edge of the matching
+        polygon.
+        """
+        offsets = self.footprints.polygon_offsets
+        starts, counts = offsets[polygons], np.diff(offsets)[polygons]
+        k = np.arange(counts.max()) if len(points) else np.arange(0)
+        a = starts[:, None] + np.minimum(k, counts[:, None] - 1)
+        b = np.where(k + 1 < counts[:, None], a + 1, starts[:, None])
+        va, vb = self._vertices[a], self._vertices[b]
+        p = points[:, None]
+        normal = np.cross(va, vb)
+        norm = np.sqrt((normal ** 2).sum(axis=-1))
+        normal /= np.where(norm > 0, norm, 1)[..., None]
+        # the closest point of the great circle is within the arc
+        within = ((np.cross(va, p) * normal).sum(axis=-1) >= 0) & \
+            ((np.cross(p, vb) * normal).sum(axis=-1) >= 0) & (norm > 0)
+        to_circle = np.arcsin(np.clip(np.abs((p * normal).sum(axis=-1)),
+                                      0, 1))
+        to_ends = np.minimum(_angle((p * va).sum(axis=-1)),
+                             _angle((p * vb).sum(axis=-1)))
+        return np.where(within, to_circle, to_ends).min(axis=1)
+
+    def _match(self, vectors, radii):
+        """
+        (item, row) pairs of cones (radius 0 for points) overlapping a
+        footprint.
+        """
+        chord = 2 * np.sin(np.minimum(radii, np.pi) / 2)
+        items, keys = self._cells(vectors, chord)
+        items, shapes = self._candidates(keys, items)
+
+        # bounding caps
+        separation = _angle((vectors[items] * self._centers[shapes])
+                            .sum(axis=1))
+        keep = separation <= self._radii[shapes] + radii[items]
+        items, shapes, separation = items[keep], shapes[keep], \
+            separation[keep]
+
+        # the circles are their own bounding caps
+        match = shapes >= self._npolygons
+        polygon = np.flatnonzero(~match)
+        for chunk in range(0, len(polygon), _PAIR_CHUNK):
+            pairs = polygon[chunk:chunk + _PAIR_CHUNK]
+            points, polygons = vectors[items[pairs]], shapes[pairs]
+            hit = self._in_polygons(points, polygons)
+            near = ~hit & (radii[items[pairs]] > 0)
+            if np.any(near):
+                hit[near] = (self._edge_distances(points[near],
+                                                  polygons[near]) <=
+                             radii[items[pairs[near]]])
+            match[pairs] = hit
+
+        pairs = np.unique(items[match] * self.footprints.nrows +
+                          self.shape_rows[shapes[match]])
+        return pairs // self.footprints.nrows, pairs % self.footprints.nrows
+
+    def query_points(self, coordinates):
+        """
+        Find the footprints containing each of a set of positions.
+
+        Parameters
+        ----------
+        coordinates : `~astropy.coordinates.SkyCoord`
+            One or many positions.
+
+        Returns
+        -------
+        sources, rows : `~numpy.ndarray`
+            Each position ``coordinates[sources[i]]`` lies in the footprint
+            of row ``rows[i]``; the pairs are sorted by position, then row.
+        """
+        vectors = _coordinate_vectors(coordinates)
+        return self._match(vectors, np.zeros(len(vectors)))
+
+    def query_region(self, coordinates, radius):
+        """
+        Find the footprints overlapping cones.
+
+        Parameters
+        ----------
+        coordinates : `~astropy.coordinates.SkyCoord`
+            One or many cone centers.
+        radius : `~astropy.units.Quantity`
+            Radius of the cones, a scalar or one per center.
+
+        Returns
+        -------
+        sources, rows : `~numpy.ndarray`
+            The cone centered on ``coordinates[sources[i]]`` overlaps the
+            footprint of row ``rows[i]``; the pairs are sorted by cone, then
+            row.
+        """
+        vectors = _coordinate_vectors(coordinates)
+        radii = np.broadcast_to(radius.to(u.rad).value,
+                                (len(vectors),)).astype(float)
+        return self._match(vectors, radii)
+
+    def coverage(self, coordinates):
+        """
+        Number of footprints containing each position.
+
+        Parameters
+        ----------
+        coordinates : `~astropy.coordinates.SkyCoord`
+
+        Returns
+        -------
+        counts : `~numpy.ndarray`
+        """
+        vectors = _coordinate_vectors(coordinates)
+        sources, rows = self._match(vectors, np.zeros(len(vectors)))
+        return np.bincount(sources, minlength=len(vectors))
@@ -1,7 +1,12 @@
 # Licensed under a 3-clause BSD style license - see LICENSE.rst
+import copy
+import json
 import numpy as np
 import os
 import pytest
+import six
+import tarfile
+import threading
 from ...utils.testing_tools import MockResponse
 from ...exceptions import (InvalidQueryError)
 
@@ -82,7 +87,7 @@ def _get_dataarchive_url(*args):
     return 'http://almascience.eso.org'
 
 
-def test_SgrAstar(monkeypatch):
+def test_SgrAstar(monkeypatch, tmpdir):
     # Local caching prevents a remote query here
 
     monkeypatch.setattr(Alma, '_get_dataarchive_url', _get_dataarchive_url)
@@ -91,7 +96,7 @@ def test_SgrAstar(monkeypatch):
     # monkeypatch instructions from https://pytest.org/latest/monkeypatch.html
     monkeypatch.setattr(alma, '_request', alma_request)
     # set up local cache path to prevent remote query
-    alma.cache_location = DATA_DIR
+    alma.cache_location = str(tmpdir)
 
     # the failure should occur here
     result = alma.query_object('Sgr A*')
@@ -101,10 +106,11 @@ def test_SgrAstar(monkeypatch):
     assert b'2011.0.00217.S' in result['Project code']
 
 
-def test_staging(monkeypatch):
+def test_staging(monkeypatch, tmpdir):
 
     monkeypatch.setattr(Alma, '_get_dataarchive_url', _get_dataarchive_url)
     alma = Alma()
+    alma.cache_location = str(tmpdir)
     alma.dataarchive_url = _get_dataarchive_url()
     monkeypatch.setattr(alma, '_get_dataarchive_url', _get_dataarchive_url)
     monkeypatch.setattr(alma, '_request', alma_request)
@@ -119,10 +125,11 @@ def test_staging(monkeypatch):
     assert len(uid_url_table) == 2
 
 
-def test_validator(monkeypatch):
+def test_validator(monkeypatch, tmpdir):
 
     monkeypatch.setattr(Alma, '_get_dataarchive_url', _get_dataarchive_url)
     alma = Alma()
+    alma.cache_location = str(tmpdir)
     monkeypatch.setattr(alma, '_get_dataarchive_url', _get_dataarchive_url)
     monkeypatch.setattr(alma, '_request', alma_request)
 
@@ -132,6 +139,164 @@ def test_validator(monkeypatch):
     assert 'invalid_parameter' in str(exc.value)
 
 
+def test_validation_schema(monkeypatch, tmpdir):
+    requests = []
+
+    def counting_request(request_type, url, **kwargs):
+        requests.append((url, kwargs.get('params')))
+        return alma_request(request_type, url, **kwargs)
+
+    monkeypatch.setattr(Alma, '_get_dataarchive_url', _get_dataarchive_url)
+    alma = Alma()
+    alma.cache_location = str(tmpdir)
+    monkeypatch.setattr(alma, '_get_dataarchive_url', _get_dataarchive_url)
+    monkeypatch.setattr(alma, '_request', counting_request)
+
+    payload = {'project_code': '2011.0.00121.S', 'band': ['3', '6'],
+               'public_data': 'public', 'download': 'true'}
+    alma.validate_query(payload)
+    validated = [params['field'] for url, params in requests
+                 if url.endswith('/validate')]
+    # the enumerated values are checked against the query form
+    assert validated == ['project_code']
+
+    # past answers of the validator are reused
+    del requests[:]
+    alma.validate_query(payload)
+    assert requests == []
+
+    # the schema is stored per mirror
+    alma = Alma()
+    alma.cache_location = str(tmpdir)
+    monkeypatch.setattr(alma, '_get_dataarchive_url', _get_dataarchive_url)
+    monkeypatch.setattr(alma, '_request', counting_request)
+    alma.validate_query({'band': '7'})
+    assert requests == []
+    with pytest.raises(InvalidQueryError):
+        alma.validate_query({'invalid_parameter': 1})
+
+
+def test_retrieve_pipeline(monkeypatch, tmpdir):
+    with open(data_path('summary_519752156.json'), 'r') as f:
+        summary = json.load(f)
+    # first poll: only the first file is staged
+    partial = copy.deepcopy(summary)
+    partial['complete'] = False
+    partial['node_data'][0]['de_state'] = 'COMPLETE'
+    summaries = iter([partial, summary])
+    events = []
+    first_download = threading.Event()
+
+    def make_tarball(name, fileobj):
+        with tarfile.open(fileobj=fileobj, mode='w') as tf:
+            for member in (name + '.fits', name + '.txt'):
+                info = tarfile.TarInfo(member)
+                info.size = 4
+                tf.addfile(info, six.BytesIO(b'data'))
+
+    def pipeline_request(request_type, url, save=False, **kwargs):
+        if url.endswith('/summary'):
+            if 'poll' in events:
+                # give the download of the first file a chance to start
+                first_download.wait(10)
+            events.append('poll')
+            return MockResponse(json.dumps(next(summaries)).encode('utf-8'))
+        if save:
+            name = url.split('/')[-1]
+            filename = str(tmpdir.join(name))
+            with open(filename, 'wb') as f:
+                make_tarball(name, f)
+            return filename
+        return alma_request(request_type, url, **kwargs)
+
+    class StreamResponse(object):
+        status_code = 200
+
+        def __init__(self, raw):
+            self.raw = raw
+
+        def raise_for_status(self):
+            pass
+
+        def close(self):
+            pass
+
+    def stream_request(method, url, **kwargs):
+        assert kwargs['stream']
+        name = url.split('/')[-1]
+        events.append(name)
+        first_download.set()
+        raw = six.BytesIO()
+        make_tarball(name, raw)
+        raw.seek(0)
+        return StreamResponse(raw)
+
+    monkeypatch.setattr(Alma, '_get_dataarchive_url', _get_dataarchive_url)
+    alma = Alma()
+    alma.dataarchive_url = _get_dataarchive_url()
+    alma.cache_location = str(tmpdir)
+    alma.STAGING_POLL_INTERVAL = 0
+    monkeypatch.setattr(alma, '_request', pipeline_request)
+    monkeypatch.setattr(alma._session, 'request', stream_request)
+
+    results = list(alma.iter_retrieve_data_from_uid(
+        'uid://A002/X41e287/Xd1', regex=r'.*\.fits$', path=str(tmpdir),
+        max_workers=2))
+    first, second = [entry['file_name'] for entry in summary['node_data']]
+    # the first file is downloaded before staging completes, and only once
+    assert events.index(first) < events.index('poll', 1)
+    assert events.count(first) == 1
+    assert sorted(os.path.basename(files[0]) for url, files in results) == [
+        first + '.fits', second + '.fits']
+    # the tarballs are extracted as they stream in, and never saved
+    assert not os.path.exists(str(tmpdir.join(first)))
+    assert not os.path.exists(str(tmpdir.join(first + '.txt')))
+
+    summaries = iter([summary])
+    files = alma.retrieve_data_from_uid('uid://A002/X41e287/Xd1')
+    assert [os.path.basename(filename) for filename in files] == [
+        first, second]
+
+
+def test_download_files_resume(monkeypatch, tmpdir):
+    contents = {'http://almascience.eso.org/a.fits': b'0123456789',
+                'http://almascience.eso.org/b.fits': b'abcdefghij'}
+    # the first file was partly downloaded before
+    tmpdir.join('a.fits').write_binary(b'0123')
+    sent = []
+    resumed = threading.Event()
+
+    class RangeResponse(MockResponse):
+        def close(self):
+            pass
+
+    def range_request(method, url, headers=None, **kwargs):
+        # the headers the session would send
+        headers = dict(alma._session.headers, **(headers or {}))
+        if url.endswith('b.fits'):
+            # sent while the other download resumes
+            resumed.wait(10)
+        sent.append((url[-6:], headers.get('Range', '')))
+        content = contents[url]
+        if 'Range' in headers:
+            resumed.set()
+            content = content[int(headers['Range'][6:].split('-')[0]):]
+        return RangeResponse(content, headers={
+            'content-length': str(len(contents[url])),
+            'Accept-Ranges': 'bytes'})
+
+    alma = Alma()
+    alma.cache_location = str(tmpdir)
+    monkeypatch.setattr(alma._session, 'request', range_request)
+    files = alma.download_files(sorted(contents), max_workers=2)
+
+    assert [tmpdir.join(os.path.basename(filename)).read_binary()
+            for filename in files] == [b'0123456789', b'abcdefghij']
+    assert sorted(sent) == [('a.fits', ''), ('a.fits', 'bytes=4-9'),
+                            ('b.fits', '')]
+    assert 'Range' not in alma._session.headers
+
+
 def test_parse_staging_request_page_asdm(monkeypatch):
     """
     Example:
@@ -0,0 +1,75 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+import numpy as np
+import pytest
+
+from astropy import units as u
+from astropy.coordinates import SkyCoord
+from astropy.table import MaskedColumn
+
+from ..footprints import FootprintIndex, parse_footprints
+
+FOOTPRINTS = MaskedColumn(
+    ['Polygon ICRS 10 10 10.1 10 10.1 10.1 10 10.1',
+     'Circle ICRS 20 -30 0.05',
+     '',
+     # a union of polygons, one of them across RA=0
+     'Polygon ICRS 359.95 0 0.05 0 0.05 0.1 359.95 0.1 '
+     'Polygon ICRS 10.05 10.05 10.2 10.05 10.2 10.2',
+     # around the pole
+     'Polygon ICRS 0 89.9 90 89.9 180 89.9 270 89.9',
+     'Circle ICRS 0 0 1'],
+    mask=[False, False, False, False, False, True])
+
+
+def test_parse_footprints():
+    footprints = parse_footprints(FOOTPRINTS)
+    assert footprints.nrows == 6
+    np.testing.assert_array_equal(footprints.polygon_rows, [0, 3, 3, 4])
+    np.testing.assert_array_equal(footprints.polygon_offsets,
+                                  [0, 4, 8, 11, 15])
+    np.testing.assert_array_equal(footprints.vertices[4], [359.95, 0])
+    np.testing.assert_array_equal(footprints.circle_rows, [1])
+    np.testing.assert_array_equal(footprints.circles, [[20, -30, 0.05]])
+
+    with pytest.raises(ValueError):
+        parse_footprints(['Ellipse ICRS 0 0 1 1 0'])
+    with pytest.raises(ValueError):
+        parse_footprints(['Polygon ICRS 0 0 1 1 0'])
+    # other shapes, and holes, in the middle of a row
+    with pytest.raises(ValueError):
+        parse_footprints(['Polygon ICRS 10 10 11 10 11 11 10 11 '
+                          'Box ICRS 20 20 1 1'])
+    with pytest.raises(ValueError):
+        parse_footprints(['Polygon ICRS 10 10 11 10 11 11 10 11 '
+                          'Not (Polygon ICRS 10.2 10.2 10.8 10.2 10.8 10.8)'])
+
+
+@pytest.mark.parametrize('cell_size', [None, 0.01 * u.deg, 5 * u.deg])
+def test_query_points(cell_size):
+    index = FootprintIndex(FOOTPRINTS, cell_size=cell_size)
+    coordinates = SkyCoord([10.05, 20, 0, 10.15, 10, 180, 45, 0],
+                           [10.05, -30.02, 0.05, 10.09, 9.99, 0, 89.95, 0.5],
+                           unit='deg')
+    sources, rows = index.query_points(coordinates)
+    np.testing.assert_array_equal(sources, [0, 1, 2, 3, 6])
+    np.testing.assert_array_equal(rows, [0, 1, 3, 3, 4])
+    np.testing.assert_array_equal(index.coverage(coordinates),
+                                  [1, 1, 1, 1, 0, 0, 1, 0])
+
+    # a position inside two polygons of the same row is listed once
+    sources, rows = index.query_points(SkyCoord(10.08, 10.08, unit='deg'))
+    np.testing.assert_array_equal(rows, [0, 3])
+
+
+def test_query_region():
+    index = FootprintIndex(parse_footprints(FOOTPRINTS))
+    coordinates = SkyCoord([10, 10, 20.1, 180], [9.99, 9.9, -30, 0],
+                           unit='deg')
+    sources, rows = index.query_region(coordinates, 0.02 * u.deg)
+    np.testing.assert_array_equal(sources, [0])
+    np.testing.assert_array_equal(rows, [0])
+
+    sources, rows = index.query_region(coordinates,
+                                       [0.02, 0.2, 0.06, 1] * u.deg)
+    np.testing.assert_array_equal(sources, [0, 1, 1, 2])
+    np.testing.assert_array_equal(rows, [0, 0, 3, 1])
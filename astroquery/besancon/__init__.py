@@ -27,6 +27,14 @@ class Conf(_config.ConfigNamespace):
         30.0,
         'Amount of time before pinging the Besancon server to see if the '
         'file is ready.  Minimum 30s.')
+    max_ping_delay = _config.ConfigItem(
+        300.0,
+        'Longest time between two checks of a Besancon model file; the delay '
+        'starts at ping_delay and grows by half after each check.')
+    max_workers = _config.ConfigItem(
+        4,
+        'Maximum number of concurrent Besancon model submissions and file '
+        'checks.')
     timeout = _config.ConfigItem(
         30.0,
         'Timeout for Besancon query')
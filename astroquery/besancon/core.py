@@ -7,11 +7,14 @@ import sys
 import re
 import os
 import warnings
-from astropy.io import ascii
+from functools import partial
+import numpy as np
+from astropy.table import Table
 from six.moves.urllib_error import URLError
 from collections import OrderedDict
 from ..query import BaseQuery
 from ..utils import commons, prepend_docstr_nosections, async_to_sync
+from ..utils.parallel import parallel_map
 from . import conf
 
 __all__ = ['Besancon', 'BesanconClass', 'parse_besancon_model_string']
@@ -82,7 +85,9 @@ class BesanconClass(BaseQuery):
     url_download = conf.download_url
     QUERY_URL = conf.model_form
     ping_delay = conf.ping_delay
+    max_ping_delay = conf.max_ping_delay
     TIMEOUT = conf.timeout
+    MAX_WORKERS = conf.max_workers
     # sample file name:  1340900648.230224.resu
     result_re = re.compile(r"[0-9]{10}\.[0-9]{6}\.resu")
 
@@ -104,45 +109,94 @@ class BesanconClass(BaseQuery):
             Amount of time to wait after pinging the server to see if a file is
             present.  Default 5s, which is probably reasonable.
         """
+        return self.get_besancon_model_files([filename], verbose=verbose,
+                                             timeout=timeout)[0]
 
-        url = os.path.join(self.url_download, filename)
-        elapsed_time = 0
-        t0 = time.time()
+    def get_besancon_model_files(self, filenames, verbose=True, timeout=5.0,
+                                 max_workers=None):
+        """
+        Download many Besancon models from the website as they are ready.
+
+        The files are all polled from a single loop: each one is checked at
+        once, then after ``ping_delay``, a delay that grows by half after
+        each check up to ``max_ping_delay``.  The files due for a check are
+        checked concurrently, and each one is parsed as soon as it is
+        downloaded.
 
+        Parameters
+        ----------
+        filenames : list of str
+            The besancon filenames, with format ##########.######.resu
+        verbose : bool
+            Print details about the download process
+        timeout : float
+            Amount of time to wait after pinging the server to see if a file is
+            present.
+        max_workers : int or None
+            Maximum number of concurrent checks.  Defaults to
+            ``MAX_WORKERS``.
+
+        Returns
+        -------
+        tables : list of `~astropy.table.Table`
+            The models, in the order of ``filenames``.
+        """
+        if max_workers is None:
+            max_workers = self.MAX_WORKERS
+        get_model = partial(self._get_model, timeout=timeout)
+
+        # filename -> [time of the next check, delay before the one after]
+        schedule = OrderedDict((filename, [0, self.ping_delay])
+                               for filename in filenames)
+        tables = {}
+        t0 = time.time()
         if verbose:
-            sys.stdout.write("Awaiting Besancon file...\n")
-        while True:
+            sys.stdout.write("Awaiting {0} Besancon file(s)...\n"
+                             .format(len(schedule)))
+        while schedule:
+            now = time.time()
+            due = [filename for filename, (next_check, delay)
+                   in schedule.items() if next_check <= now]
+            if not due:
+                time.sleep(min(next_check for next_check, delay
+                               in schedule.values()) - now)
+                continue
+
+            results = parallel_map(get_model, due, max_workers=max_workers)
+            now = time.time()
+            for filename, table in zip(due, results):
+                if table is None:
+                    delay = schedule[filename][1]
+                    schedule[filename] = [now + delay,
+                                          min(delay * 1.5,
+                                              self.max_ping_delay)]
+                else:
+                    tables[filename] = table
+                    del schedule[filename]
             if verbose:
-                sys.stdout.write(u"\r")
+                sys.stdout.write(u"\r%i of %i model(s) retrieved (total wait "
+                                 "time %0.1fs)" % (len(tables),
+                                                   len(tables) + len(schedule),
+                                                   now - t0))
                 sys.stdout.flush()
-            try:
-                with commons.get_readable_fileobj(url, remote_timeout=timeout,
-                                                  cache=True) as f:
-                    results = f.read()
-                break
-            except URLError:
-                if verbose:
-                    sys.stdout.write(u"Waiting %0.1fs for model to finish"
-                                     " (elapsed wait time %0.1fs, total "
-                                     "wait time %0.1f)\r" % (self.ping_delay,
-                                                             elapsed_time,
-                                                             time.time() - t0))
-                    sys.stdout.flush()
-                time.sleep(self.ping_delay)
-                elapsed_time += self.ping_delay
-                continue
-            except socket.timeout:
-                if verbose:
-                    sys.stdout.write(u"Waiting %0.1fs for model to finish "
-                                     "(elapsed wait time %0.1fs, total wait "
-                                     "time %0.1f)\r" % (self.ping_delay,
-                                                        elapsed_time,
-                                                        time.time() - t0))
-                    sys.stdout.flush()
-                time.sleep(self.ping_delay)
-                elapsed_time += self.ping_delay
-                continue
+        if verbose:
+            sys.stdout.write(u"\n")
+
+        return [tables[filename] for filename in filenames]
 
+    def _get_model(self, filename, timeout=5.0):
+        """
+        Download and parse a Besancon model, or return `None` if the file
+        is not there yet.
+        """
+        url = os.path.join(self.url_download, filename)
+        try:
+            with commons.get_readable_fileobj(url, remote_timeout=timeout,
+                                              cache=True,
+                                              encoding='binary') as f:
+                results = f.read()
+        except (URLError, socket.timeout):
+            return None
         return parse_besancon_model_string(results)
 
     def _parse_result(self, response, verbose=False, retrieve_file=True):
@@ -228,7 +282,7 @@ class BesanconClass(BaseQuery):
             raise ValueError("Must specify a valid e-mail address.")
 
         # create a new keyword dict based on inputs + defaults
-        kwd = copy.copy(keyword_defaults)
+        kwd = copy.deepcopy(keyword_defaults)
         for key, val in kwargs.items():
             if key in keyword_defaults:
                 kwd[key] = val
@@ -303,6 +357,52 @@ class BesanconClass(BaseQuery):
                                  timeout=self.TIMEOUT, stream=True)
         return response
 
+    def query_many(self, fields, email=None, retrieve_file=True,
+                   verbose=False, max_workers=None, **kwargs):
+        """
+        Run the Besancon model for many fields at once.
+
+        The models are submitted concurrently, then their files are
+        retrieved with `get_besancon_model_files`.
+
+        Parameters
+        ----------
+        fields : list of (float, float)
+            Galactic longitude and latitude of the center of each field
+        email : str
+            A valid e-mail address to send the reports of completion to
+        retrieve_file : bool
+            Retrieve the model files, or only return their names (the jobs
+            are still executed on the remote server, though)
+        verbose : bool
+            Print out details about the queries
+        max_workers : int or None
+            Maximum number of concurrent submissions and checks.  Defaults
+            to ``MAX_WORKERS``.
+        kwargs : dict
+            The other arguments of `query`, used for all the fields.
+
+        Returns
+        -------
+        result : list
+            The tables, or the filenames if ``retrieve_file`` is False, in
+            the order of ``fields``.
+        """
+        if max_workers is None:
+            max_workers = self.MAX_WORKERS
+
+        def submit(field):
+            response = self.query_async(field[0], field[1], email,
+                                        verbose=verbose, **kwargs)
+            return self._parse_result(response, verbose=verbose,
+                                      retrieve_file=False)
+        filenames = parallel_map(submit, fields, max_workers=max_workers)
+
+        if retrieve_file:
+            return self.get_besancon_model_files(filenames, verbose=verbose,
+                                                 max_workers=max_workers)
+        return filenames
+
 
 Besancon = BesanconClass()
 
@@ -372,70 +472,52 @@ def parse_besancon_model_string(bms,):
     """
     Given an entire Besancon model result in *string* form, parse it into an
     `~astropy.table.Table`.
-    """
-
-    header_start = "Dist    Mv  CL".split()
 
-    # locate index of data start
-    lines = bms.split('\n')
-    nblanks1 = 0
-    for ii, line in enumerate(lines):
-        if line.strip() == '':
-            nblanks1 += 1
-        if all([h in line for h in header_start]):
-            break
+    The columns are delimited by the character positions that are blank in
+    every row, and each one is decoded at once with NumPy.
+    """
+    if not isinstance(bms, bytes):
+        bms = bms.encode('latin-1')
 
-    names = line.split()
-    ncols = len(names)
-    header_line = ii
-    # data starts 1 line after header
-    first_data_line = lines[header_line + 1]
-    # apparently ascii wants you to start 1 early though
-    data_start = header_line
-    # ascii.read ignores blank lines
-    data_start -= nblanks1
-
-    # locate index of data end
-    nblanks2 = 0
-    for jj, line in enumerate(lines[::-1]):
-        if "TOTAL NUMBER OF STARS :" in line:
-            nstars = int(line.split()[-1])
-        if line.strip() == '':
-            nblanks2 += 1
-        if all([h in line for h in header_start]):
-            break
-    # most likely = -7
-    data_end = -(jj - nblanks2 + 1)
-
-    # note: old col_starts/col_ends were:
-    # (0,7,13,16,21,27,33,36,41,49,56,62,69,76,82,92,102,109)
-    # (6,12,15,20,26,32,35,39,48,55,61,68,75,81,91,101,108,115)
-    space_indices = [first_data_line.find(" ", ii)
-                     for ii in range(len(first_data_line))]
-    col_ends = [y for x, y in zip(space_indices[:-1], space_indices[1:])
-                if y - x > 1] + [len(space_indices)]
-
-    if not all(x < y for x, y in zip(col_ends[:-1], col_ends[1:])):
+    # the header line is repeated after the data
+    headers = list(_header_re.finditer(bms))
+    if len(headers) < 2:
         raise ValueError("Failed to parse Besancon table header.")
-    col_starts = [0] + [c for c in col_ends[:-1]]
-
-    if len(col_starts) != ncols or len(col_ends) != ncols:
+    names = [name.decode('ascii') for name in headers[0].group().split()]
+    ncols = len(names)
+    nstars = _nstars_re.search(bms)
+    if nstars is None:
+        raise ValueError("Failed to parse Besancon table: the number of "
+                         "stars is missing.")
+    nstars = int(nstars.group(1))
+
+    rows = [row for row in
+            bms[headers[0].end():headers[-1].start()].splitlines()
+            if row.strip()]
+    if len(rows) != nstars:
+        raise ValueError("Besancon table did not match reported size")
+    if nstars == 0:
+        return Table(names=names, dtype=[float] * ncols)
+
+    # one byte per character, padded with NUL bytes
+    chars = np.array(rows).view('u1').reshape(nstars, -1)
+    filled = ((chars != ord(' ')) & (chars != 0)).any(axis=0)
+    # columns are right-aligned, so each one ends with a filled position
+    col_ends = np.flatnonzero(filled & ~np.append(filled[1:], False)) + 1
+    col_starts = np.append(0, col_ends[:-1])
+    if len(col_ends) != ncols:
         raise ValueError("Table parsing error: mismatch between # of "
                          "columns & header")
 
-    besancon_table = ascii.read(bms, Reader=ascii.FixedWidthNoHeader,
-                                header_start=None,
-                                data_start=data_start,
-                                names=names,
-                                col_starts=col_starts,
-                                col_ends=col_ends,
-                                data_end=data_end)
-
-    if len(besancon_table) != nstars:
-        raise ValueError("Besancon table did not match reported size")
+    columns = []
+    for start, end in zip(col_starts, col_ends):
+        values = (np.ascontiguousarray(chars[:, start:end])
+                  .view('S{0}'.format(end - start)).ravel())
+        columns.append(_decode_column(values))
+    besancon_table = Table(columns, names=names)
 
     for cn in besancon_table.columns:
-        if besancon_table[cn].dtype.kind in ('s', 'S'):
+        if besancon_table[cn].dtype.kind in ('s', 'S', 'U'):
             warnings.warn("The Besancon table did not parse properly.  "
                           "Some columns are likely to have invalid "
                           "values and others incorrect values.  "
@@ -443,3 +525,20 @@ def parse_besancon_model_string(bms,):
             break
 
     return besancon_table
+
+
+_header_re = re.compile(br"^[ \t]*Dist[ \t]+Mv[ \t]+CL\b.*$", re.M)
+_nstars_re = re.compile(br"TOTAL NUMBER OF STARS :\s*([0-9]+)")
+
+
+def _decode_column(values):
+    """
+    Convert an array of fixed-width byte strings to integers, or floats, or
+    else to stripped strings.
+    """
+    for dtype in (int, float):
+        try:
+            return values.astype(dtype)
+        except ValueError:
+            pass
+    return np.char.strip(values).astype(str)
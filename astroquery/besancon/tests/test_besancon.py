@@ -5,6 +5,7 @@ from contextlib import contextmanager
 import pytest
 from astropy.io.ascii.tests.common import assert_equal
 from six import string_types
+from six.moves.urllib_error import URLError
 from ... import besancon
 from ...utils import commons
 from ...utils.testing_tools import MockResponse
@@ -93,6 +94,52 @@ def test_query(patch_post, patch_get_readable_fileobj):
     assert result is not None
 
 
+def test_query_many(monkeypatch):
+    clock = [0.]
+    sleeps = []
+
+    class FakeTime(object):
+        def time(self):
+            return clock[0]
+
+        def sleep(self, delay):
+            sleeps.append(delay)
+            clock[0] += delay
+    monkeypatch.setattr(besancon.core, 'time', FakeTime())
+
+    def post(method, url, data, timeout=10, stream=True, **kwargs):
+        with open(data_path('query_return.iframe.html'), 'rb') as f:
+            content = f.read()
+        # one result file per field
+        filename = '13762351{0:02d}.430670'.format(int(data['longit']))
+        return MockResponseBesancon(
+            content.replace(b'1376235131.430670', filename.encode('ascii')))
+    monkeypatch.setattr(besancon.Besancon, '_request', post)
+
+    # the file of the second field is there at the third check
+    checks = []
+
+    @contextmanager
+    def get_readable_fileobj(url, **kwargs):
+        checks.append(url[-22:])
+        if url.endswith('1376235111.430670.resu') and len(checks) < 4:
+            raise URLError('not there yet')
+        with open(data_path('1376235131.430670.resu'), 'rb') as f:
+            yield f
+    monkeypatch.setattr(commons, 'get_readable_fileobj', get_readable_fileobj)
+
+    tables = besancon.Besancon.query_many([(10, 0), (11, 0)], 'a@b.com',
+                                          max_workers=1)
+    assert [len(table) for table in tables] == [13, 13]
+    assert checks == ['1376235110.430670.resu'] + \
+        ['1376235111.430670.resu'] * 3
+    assert sleeps == [1, 1.5]
+
+    filenames = besancon.Besancon.query_many([(12, 0)], 'a@b.com',
+                                             retrieve_file=False)
+    assert filenames == ['1376235112.430670.resu']
+
+
 def test_default_params():
     """ Ensure that the default parameters of the query match the default
     parameters on the web form (excepting coordinates and e-mail address) """
@@ -1,6 +1,8 @@
 # Licensed under a 3-clause BSD style license - see LICENSE.rst
 import os
 from distutils.version import LooseVersion
+
+import pytest
 # this contains imports plugins that configure py.test for astropy tests.
 # by importing them here in conftest.py they are discoverable by py.test
 # no matter how it is invoked within the source tree.
@@ -62,3 +64,15 @@ from .version import version, astropy_helpers_version
 packagename = os.path.basename(os.path.dirname(__file__))
 TESTED_VERSIONS[packagename] = version
 TESTED_VERSIONS['astropy_helpers'] = astropy_helpers_version
+
+
+@pytest.fixture(autouse=True)
+def _name_cache(monkeypatch):
+    """
+    Resolve names with an in-memory cache, emptied for each test, so that
+    mocked resolutions neither leak between tests nor reach the user's
+    cache.
+    """
+    from .utils import name_resolve
+    monkeypatch.setattr(name_resolve, '_default_cache',
+                        name_resolve.NameResolveCache())
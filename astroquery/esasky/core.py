@@ -2,9 +2,8 @@
 from __future__ import print_function
 import json
 import os
-import tempfile
-import tarfile
 import sys
+from functools import partial
 
 import six
 from astropy.io import fits
@@ -16,6 +15,7 @@ from requests import HTTPError
 from ..query import BaseQuery
 from ..utils import commons
 from ..utils import async_to_sync
+from ..utils.tar_stream import extract_tar_stream
 from . import conf
 from ..exceptions import TableParseError
 from .. import version
@@ -63,6 +63,9 @@ class ESASkyClass(BaseQuery):
         'mapb_green': '100',
         'mapr_': '160'}
 
+    # maps extracted from each Herschel product, in its mission directory
+    __HERSCHEL_INDEX = ".herschel_maps.json"
+
     _MAPS_DOWNLOAD_DIR = "Maps"
     _isTest = ""
 
@@ -588,27 +591,39 @@ class ESASkyClass(BaseQuery):
         return maps
 
     def _get_herschel_map(self, product_url, directory_path, cache):
+        # Only the map members are written out, while the tarball streams in.
+        # With cache, the maps already extracted from the product are opened
+        # without downloading it again.
         observation = dict()
-        tar_file = tempfile.NamedTemporaryFile(delete=False)
-        response = self._request('GET', product_url, cache=cache,
-                                 headers=self._get_header())
-
-        response.raise_for_status()
 
-        tar_file.write(response.content)
-        tar_file.close()
-        with tarfile.open(tar_file.name, 'r') as tar:
-            i = 0
-            for member in tar.getmembers():
-                member_name = member.name.lower()
-                if ('hspire' in member_name or 'hpacs' in member_name):
-                    herschel_filter = self._get_herschel_filter_name(member_name)
-                    tar.extract(member, directory_path)
-                    observation[herschel_filter] = fits.open(
-                        directory_path +
-                        member.name)
-                    i += 1
-        os.remove(tar_file.name)
+        def is_map(member_name):
+            member_name = member_name.lower()
+            return 'hspire' in member_name or 'hpacs' in member_name
+
+        index_file = os.path.join(directory_path, self.__HERSCHEL_INDEX)
+        index = dict()
+        if os.path.exists(index_file):
+            with open(index_file, 'r') as f:
+                index = json.load(f)
+        files = [os.path.join(directory_path, file_name)
+                 for file_name in index.get(product_url, [])]
+        if not (cache and files and all(map(os.path.exists, files))):
+            send = partial(self._rate_limited, product_url,
+                           self._session.request)
+            files = extract_tar_stream(self._session, product_url,
+                                       match=is_map, path=directory_path,
+                                       headers=self._get_header(),
+                                       timeout=self.TIMEOUT, send=send,
+                                       overwrite=not cache)
+            index[product_url] = [os.path.relpath(file_name, directory_path)
+                                  for file_name in files]
+            with open(index_file, 'w') as f:
+                json.dump(index, f)
+
+        for file_name in files:
+            herschel_filter = self._get_herschel_filter_name(
+                os.path.relpath(file_name, directory_path).lower())
+            observation[herschel_filter] = fits.open(file_name)
         return observation
 
     def _get_herschel_filter_name(self, member_name):
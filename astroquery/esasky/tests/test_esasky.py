@@ -3,9 +3,13 @@ from __future__ import print_function
 
 import pytest
 
+import io
 import os
+import tarfile
 import unittest
 
+from astropy.io import fits
+
 from ...utils.testing_tools import MockResponse
 from ...esasky import ESASky
 
@@ -56,3 +60,56 @@ class TestEsaSkyLocal(unittest.TestCase):
     def test_list_catalogs(self):
         result = ESASky.list_catalogs()
         assert (len(result) == 13)
+
+
+class MockStreamResponse(object):
+    status_code = 200
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_get_herschel_map(monkeypatch, tmpdir):
+    tarball = io.BytesIO()
+    with tarfile.open(fileobj=tarball, mode='w') as tf:
+        for name in ('1342/hspirepsw_map.fits', '1342/hpacs_mapb_blue.fits',
+                     '1342/readme.txt'):
+            content = io.BytesIO()
+            fits.PrimaryHDU().writeto(content)
+            info = tarfile.TarInfo(name)
+            info.size = len(content.getvalue())
+            content.seek(0)
+            tf.addfile(info, content)
+    requests = []
+
+    def rate_limited(url, send, *args, **kwargs):
+        requests.append(url)
+        return send(*args, **kwargs)
+
+    def stream_request(method, url, **kwargs):
+        return MockStreamResponse(io.BytesIO(tarball.getvalue()))
+
+    monkeypatch.setattr(ESASky, '_rate_limited', rate_limited)
+    monkeypatch.setattr(ESASky._session, 'request', stream_request)
+    url = 'http://archives.esac.esa.int/hsa/1342.tar'
+    path = str(tmpdir)
+
+    maps = ESASky._get_herschel_map(url, path, True)
+    assert sorted(maps) == ['250', '70']
+    assert requests == [url]
+    assert not os.path.exists(os.path.join(path, '1342', 'readme.txt'))
+
+    # the extracted maps are reused with cache, and downloaded again
+    # without
+    maps = ESASky._get_herschel_map(url, path, True)
+    assert sorted(maps) == ['250', '70']
+    assert requests == [url]
+    maps = ESASky._get_herschel_map(url, path, False)
+    assert sorted(maps) == ['250', '70']
+    assert requests == [url, url]
@@ -1,23 +1,41 @@
 # Licensed under a 3-clause BSD style license - see LICENSE.rst
 from __future__ import print_function
+import bz2
+import json
 import time
 import sys
 import os.path
-import shutil
 import webbrowser
 import warnings
 import keyring
 import numpy as np
 import re
+import threading
+import zlib
+from collections import OrderedDict
 from bs4 import BeautifulSoup
 
 from six import BytesIO
 import six
-from astropy.table import Table, Column
+import astropy.utils.data
+from astropy.io import fits
+from astropy.io.fits.verify import VerifyError, VerifyWarning
+from astropy.table import Table, Column, MaskedColumn
 from astropy import log
 
+try:
+    from html import unescape
+except ImportError:  # Python 2
+    from six.moves.html_parser import HTMLParser
+    unescape = HTMLParser().unescape
+try:
+    import lzma
+except ImportError:  # Python 2
+    lzma = None
+
 from ..exceptions import LoginError, RemoteServiceError, NoResultsWarning
 from ..utils import schema, system_tools
+from ..utils.parallel import parallel_map
 from ..query import QueryWithLogin, suspend_cache
 from . import conf
 
@@ -37,17 +55,161 @@ def _check_response(content):
         return True
 
 
+_PRE_RE = re.compile(br'<pre[^>]*>(.*?)</pre>', re.DOTALL | re.IGNORECASE)
+_TAG_RE = re.compile(r'<[^>]*>')
+
+
+def _parse_header_page(content):
+    """
+    Read the FITS header in the ``<pre>`` block of an archive header page.
+
+    Returns an `~collections.OrderedDict` of the keyword values, without the
+    commentary cards and the keywords of undefined value.  HIERARCH keywords
+    keep their ``HIERARCH`` prefix.
+    """
+    match = _PRE_RE.search(content)
+    if match is None:
+        raise RemoteServiceError("No header found in the header page.")
+    text = unescape(_TAG_RE.sub('', match.group(1).decode('latin-1')))
+    header = fits.Header.fromstring(text.strip('\n'), sep='\n')
+    values = OrderedDict()
+    for card in header.cards:
+        keyword = card.keyword.strip()
+        if keyword in ('', 'COMMENT', 'HISTORY'):
+            continue
+        try:
+            value = card.value
+        except (ValueError, VerifyError):
+            continue
+        if isinstance(value, fits.card.Undefined):
+            continue
+        if card.image[:8].upper() == 'HIERARCH':
+            keyword = 'HIERARCH ' + keyword
+        values[keyword] = value
+    return values
+
+
+def _headers_to_table(headers):
+    """
+    Assemble header dictionaries into a table, one row per header.
+
+    The table has the union of the keywords as columns, in order of first
+    appearance; values missing from a header are masked.
+    """
+    columns = OrderedDict()
+    for row, header in enumerate(headers):
+        for keyword, value in header.items():
+            if keyword not in columns:
+                columns[keyword] = ([], [])
+            rows, values = columns[keyword]
+            rows.append(row)
+            values.append(value)
+
+    nrows = len(headers)
+    result = []
+    for keyword, (rows, values) in columns.items():
+        data = np.array(values)
+        if data.dtype.kind == 'O':
+            data = data.astype(str)
+        if len(rows) == nrows:
+            result.append(Column(data, name=keyword))
+        else:
+            full = np.zeros(nrows, dtype=data.dtype)
+            full[rows] = data
+            mask = np.ones(nrows, dtype=bool)
+            mask[rows] = False
+            result.append(MaskedColumn(full, mask=mask, name=keyword))
+    return Table(result)
+
+
+# suffixes of the compressed files, removed once decompressed
+_COMPRESSED_SUFFIXES = ('.gz', '.Z', '.z', '.bz2', '.xz', '.7z')
+
+
+def _decompressor_factory(magic):
+    """
+    Decompressor class for data starting with ``magic``, or `None` if the
+    data cannot be decompressed while they download (e.g. the LZW of the
+    ``.Z`` files).
+    """
+    if magic.startswith(b'\x1f\x8b'):
+        return lambda: zlib.decompressobj(16 + zlib.MAX_WBITS)
+    elif magic.startswith(b'BZh'):
+        return bz2.BZ2Decompressor
+    elif magic.startswith(b'\xfd7zXZ\x00') and lzma is not None:
+        return lzma.LZMADecompressor
+
+
+class _StreamDecompressor(object):
+    """
+    Decompress data piece by piece, including concatenated streams.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.decompressor = factory()
+
+    def decompress(self, data):
+        result = []
+        while data:
+            result.append(self.decompressor.decompress(data))
+            data = self.decompressor.unused_data
+            if data:
+                self.decompressor = self.factory()
+        return b''.join(result)
+
+
+class _DownloadManifest(object):
+    """
+    State of the downloads into a directory, saved next to the files so that
+    an interrupted retrieval resumes where it stopped.
+
+    Each downloaded file (by file ID) is either ``'partial'``, its compressed
+    bytes received so far being in ``<file ID>.part``, or ``'done'``, with
+    the name of the final (decompressed) file.
+    """
+
+    FILENAME = '.astroquery_eso_downloads.json'
+
+    def __init__(self, directory):
+        self.filename = os.path.join(directory, self.FILENAME)
+        self._lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(self.filename):
+            try:
+                with open(self.filename, 'r') as f:
+                    self.entries = json.load(f)
+            except ValueError:
+                log.warning("Ignoring the corrupted download manifest {0}"
+                            .format(self.filename))
+
+    def get(self, file_id):
+        with self._lock:
+            return self.entries.get(file_id)
+
+    def update(self, file_id, **entry):
+        with self._lock:
+            self.entries[file_id] = entry
+            with open(self.filename + '.tmp', 'w') as f:
+                json.dump(self.entries, f)
+            if os.path.exists(self.filename):
+                os.remove(self.filename)
+            os.rename(self.filename + '.tmp', self.filename)
+
+
 class EsoClass(QueryWithLogin):
 
     ROW_LIMIT = conf.row_limit
     USERNAME = conf.username
     QUERY_INSTRUMENT_URL = conf.query_instrument_url
+    MAX_WORKERS = conf.max_workers
 
     def __init__(self):
         super(EsoClass, self).__init__()
         self._instrument_list = None
         self._survey_list = None
         self.username = None
+        self._login_lock = threading.Lock()
 
     def _activate_form(self, response, form_index=0, form_id=None, inputs={},
                        cache=True, method=None):
@@ -487,7 +649,7 @@ class EsoClass(QueryWithLogin):
             else:
                 warnings.warn("Query returned no results", NoResultsWarning)
 
-    def get_headers(self, product_ids, cache=True):
+    def get_headers(self, product_ids, cache=True, max_workers=None):
         """
         Get the headers associated to a list of data product IDs
 
@@ -502,61 +664,40 @@ class EsoClass(QueryWithLogin):
         ----------
         product_ids : either a list of strings or a `~astropy.table.Column`
             List of data product IDs.
+        max_workers : int or None
+            Maximum number of headers requested concurrently.  Defaults to
+            ``conf.max_workers``.
 
         Returns
         -------
         result : `~astropy.table.Table`
             A table where: columns are header keywords, rows are product_ids.
+            Keywords missing from some of the headers are masked in the other
+            rows.
 
         """
         _schema_product_ids = schema.Schema(
             schema.Or(Column, [schema.Or(*six.string_types)]))
         _schema_product_ids.validate(product_ids)
-        # Get all headers
-        result = []
-        for dp_id in product_ids:
+        if max_workers is None:
+            max_workers = self.MAX_WORKERS
+
+        def get_page(dp_id):
             response = self._request(
                 "GET", "http://archive.eso.org/hdr?DpId={0}".format(dp_id),
                 cache=cache)
-            root = BeautifulSoup(response.content, 'html5lib')
-            hdr = root.select('pre')[0].text
-            header = {'DP.ID': dp_id}
-            for key_value in hdr.split('\n'):
-                if "=" in key_value:
-                    key, value = key_value.split('=', 1)
-                    key = key.strip()
-                    value = value.split('/', 1)[0].strip()
-                    if key[0:7] != "COMMENT":  # drop comments
-                        if value == "T":  # Convert boolean T to True
-                            value = True
-                        elif value == "F":  # Convert boolean F to False
-                            value = False
-                        # Convert to string, removing quotation marks
-                        elif value[0] == "'":
-                            value = value[1:-1]
-                        elif "." in value:  # Convert to float
-                            value = float(value)
-                        else:  # Convert to integer
-                            value = int(value)
-                        header[key] = value
-                elif key_value.startswith("END"):
-                    break
-            result.append(header)
-        # Identify all columns
-        columns = []
-        column_types = []
-        for header in result:
-            for key in header:
-                if key not in columns:
-                    columns.append(key)
-                    column_types.append(type(header[key]))
-        # Add all missing elements
-        for i in range(len(result)):
-            for (column, column_type) in zip(columns, column_types):
-                if column not in result[i]:
-                    result[i][column] = column_type()
-        # Return as Table
-        return Table(result)
+            return response.content
+
+        pages = parallel_map(get_page, product_ids, max_workers=max_workers)
+        result = []
+        with warnings.catch_warnings():
+            # non-standard cards are read anyway
+            warnings.simplefilter('ignore', VerifyWarning)
+            for dp_id, page in zip(product_ids, pages):
+                header = OrderedDict([('DP.ID', dp_id)])
+                header.update(_parse_header_page(page))
+                result.append(header)
+        return _headers_to_table(result)
 
     def _check_existing_files(self, datasets, continuation=False,
                               destination=None):
@@ -629,8 +770,122 @@ class EsoClass(QueryWithLogin):
 
         return resp
 
+    def _open_download(self, url, offset=0):
+        """
+        Start downloading ``url`` from byte ``offset``, logging in again if
+        the session expired.  Returns `None` if there is nothing left after
+        ``offset``.
+        """
+        headers = {'Range': 'bytes={0}-'.format(offset)} if offset else {}
+        for trial in (1, 2):
+            response = self._session.request("GET", url, headers=headers,
+                                             stream=True)
+            # the login page is served instead of the file
+            if (response.headers.get('Content-Type') ==
+                    'text/html;charset=UTF-8' and
+                    response.url.startswith('https://www.eso.org/sso/login')):
+                response.close()
+                if trial == 2:
+                    raise LoginError("Could not authenticate")
+                with self._login_lock:
+                    log.warning("Session expired, trying to re-authenticate")
+                    self.login()
+            else:
+                break
+        if offset and response.status_code == 416:
+            response.close()
+            return None
+        response.raise_for_status()
+        return response
+
+    def _download_dataset(self, url, directory, manifest,
+                          continuation=False):
+        """
+        Download a file of a staged request to ``directory``, and return the
+        name of the local file.
+
+        gzip, bzip2 and xz compressed files are decompressed while they
+        download.  The compressed bytes are kept in a ``.part`` file until
+        the download completes: an interrupted download is resumed from
+        there with a Range request, and the bytes already received are
+        decompressed again locally.
+        """
+        file_id = url.rsplit('/', 1)[1]
+        entry = manifest.get(file_id)
+        if (entry is not None and entry['state'] == 'done' and
+                not continuation and os.path.exists(entry['filename'])):
+            log.info("Found {0}...".format(entry['filename']))
+            return entry['filename']
+
+        part = os.path.join(directory, file_id + '.part')
+        offset = 0
+        if (entry is not None and entry['state'] == 'partial' and
+                os.path.exists(part)):
+            offset = os.path.getsize(part)
+            log.info("Resuming download of {0} at byte {1}..."
+                     .format(file_id, offset))
+        else:
+            log.info("Downloading file {0}...".format(file_id))
+
+        response = self._open_download(url, offset)
+        if response is not None and offset and response.status_code != 206:
+            # the server ignored the Range header and sends the whole file
+            offset = 0
+        manifest.update(file_id, url=url, state='partial')
+        blocksize = astropy.utils.data.conf.download_block_size
+
+        def blocks():
+            # the bytes received earlier, then the new ones
+            if offset:
+                with open(part, 'rb') as f:
+                    for block in iter(lambda: f.read(blocksize), b''):
+                        yield block, False
+            if response is not None:
+                for block in response.iter_content(blocksize):
+                    yield block, True
+
+        filename = decompressor = output = None
+        try:
+            with open(part, 'ab' if offset else 'wb') as raw:
+                for block, new in blocks():
+                    if new:
+                        raw.write(block)
+                    if filename is None:
+                        factory = _decompressor_factory(block[:6])
+                        if (factory is not None and
+                                file_id.endswith(_COMPRESSED_SUFFIXES)):
+                            decompressor = _StreamDecompressor(factory)
+                            filename = os.path.join(
+                                directory, file_id.rsplit('.', 1)[0])
+                            output = open(filename + '.part', 'wb')
+                        else:
+                            filename = os.path.join(directory, file_id)
+                    if decompressor is not None:
+                        output.write(decompressor.decompress(block))
+        finally:
+            if output is not None:
+                output.close()
+            if response is not None:
+                response.close()
+
+        if filename is None:
+            filename = os.path.join(directory, file_id)
+        for name in [filename] if decompressor is None else [filename, part]:
+            if os.path.exists(name):
+                os.remove(name)
+        if decompressor is not None:
+            os.rename(filename + '.part', filename)
+        else:
+            os.rename(part, filename)
+            if filename.endswith(_COMPRESSED_SUFFIXES):
+                log.info("Unzipping file {0}...".format(file_id))
+                filename = system_tools.gunzip(filename)
+        manifest.update(file_id, url=url, state='done', filename=filename)
+        return filename
+
     def retrieve_data(self, datasets, continuation=False, destination=None,
-                      with_calib='none', request_all_objects=False):
+                      with_calib='none', request_all_objects=False,
+                      max_workers=None):
         """
         Retrieve a list of datasets form the ESO archive.
 
@@ -655,6 +910,9 @@ class EsoClass(QueryWithLogin):
             downloaded ones, to be sure to retrieve all calibration files.
             This is useful when the download was interrupted. `False` by
             default.
+        max_workers : int or None
+            Maximum number of concurrent availability checks and downloads.
+            Defaults to ``conf.max_workers``.
 
         Returns
         -------
@@ -693,8 +951,11 @@ class EsoClass(QueryWithLogin):
 
         # Second: Check that the datasets to download are in the archive
         log.info("Checking availability of datasets to download...")
-        valid_datasets = [self.verify_data_exists(ds)
-                          for ds in datasets_to_download]
+        if max_workers is None:
+            max_workers = self.MAX_WORKERS
+        valid_datasets = parallel_map(self.verify_data_exists,
+                                      datasets_to_download,
+                                      max_workers=max_workers)
         if not all(valid_datasets):
             invalid_datasets = [ds for ds, v in zip(datasets_to_download,
                                                     valid_datasets) if not v]
@@ -805,24 +1066,18 @@ class EsoClass(QueryWithLogin):
             nfiles = len(fileLinks)
             log.info("Downloading {} files...".format(nfiles))
             log.debug("Files:\n{}".format('\n'.join(fileLinks)))
-            for i, fileLink in enumerate(fileLinks, 1):
-                fileId = fileLink.rsplit('/', maxsplit=1)[1]
-                log.info("Downloading file {}/{}: {}..."
-                         .format(i, nfiles, fileId))
-                filename = self._request("GET", fileLink, save=True,
-                                         continuation=True)
-
-                if filename.endswith(('.gz', '.7z', '.bz2', '.xz', '.Z')):
-                    log.info("Unzipping file {0}...".format(fileId))
-                    filename = system_tools.gunzip(filename)
-
-                if destination is not None:
-                    log.info("Copying file {0} to {1}...".format(fileId, destination))
-                    destfile = os.path.join(destination, os.path.basename(filename))
-                    shutil.move(filename, destfile)
-                    files.append(destfile)
-                else:
-                    files.append(filename)
+            directory = (destination if destination is not None
+                         else self.cache_location)
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            manifest = _DownloadManifest(directory)
+
+            def download(fileLink):
+                return self._download_dataset(fileLink, directory, manifest,
+                                              continuation=continuation)
+
+            files.extend(parallel_map(download, fileLinks,
+                                      max_workers=max_workers))
 
         # Empty the redirect cache of this request session
         # Only available and needed for requests versions < 2.17
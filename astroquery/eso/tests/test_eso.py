@@ -1,8 +1,11 @@
 # Licensed under a 3-clause BSD style license - see LICENSE.rst
+import gzip
+import io
 import os
 from ...utils.testing_tools import MockResponse
 
 from ...eso import Eso
+from ...eso.core import _DownloadManifest
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
 
@@ -94,3 +97,106 @@ def test_vvv(monkeypatch):
     assert result_s is not None
     assert 'Object' in result_s.colnames
     assert 'b333' in result_s['Object']
+
+
+HEADER_PAGE = """<html><body><h2>Header of {dp_id}</h2>
+<pre>SIMPLE  =                    T / Standard FITS
+BITPIX  =                   16 / Bits per pixel
+ARCFILE = '{dp_id}.fits' / Archive file name
+{extra}COMMENT  a comment, ignored
+HIERARCH ESO DET DIT = {dit} / Integration time
+HIERARCH ESO INS MODE = 'A&amp;B'
+END
+</pre></body></html>"""
+
+
+def test_get_headers(monkeypatch):
+    pages = {'MIDI.1': HEADER_PAGE.format(dp_id='MIDI.1', dit='0.5',
+                                          extra="UTC     =              25300.5\n"),
+             'MIDI.2': HEADER_PAGE.format(dp_id='MIDI.2', dit='2',
+                                          extra="")}
+    requested = []
+
+    def header_request(request_type, url, **kwargs):
+        dp_id = url.split('DpId=')[1]
+        requested.append(dp_id)
+        return MockResponse(content=pages[dp_id].encode('ascii'), url=url)
+
+    eso = Eso()
+    monkeypatch.setattr(eso, '_request', header_request)
+    result = eso.get_headers(['MIDI.1', 'MIDI.2'], max_workers=2)
+    assert sorted(requested) == ['MIDI.1', 'MIDI.2']
+    assert result.colnames == ['DP.ID', 'SIMPLE', 'BITPIX', 'ARCFILE', 'UTC',
+                               'HIERARCH ESO DET DIT',
+                               'HIERARCH ESO INS MODE']
+    assert list(result['DP.ID']) == ['MIDI.1', 'MIDI.2']
+    assert list(result['SIMPLE']) == [True, True]
+    assert list(result['ARCFILE']) == ['MIDI.1.fits', 'MIDI.2.fits']
+    assert list(result['HIERARCH ESO DET DIT']) == [0.5, 2.0]
+    assert result['HIERARCH ESO INS MODE'][0] == 'A&B'
+    assert result['UTC'][0] == 25300.5
+    assert result['UTC'].mask[1]
+
+
+def gzip_compress(data):
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb') as f:
+        f.write(data)
+    return buffer.getvalue()
+
+
+class StreamResponse(object):
+
+    def __init__(self, content, url, status_code=200):
+        self.content = content
+        self.url = url
+        self.status_code = status_code
+        self.headers = {'Content-Type': 'application/octet-stream'}
+
+    def iter_content(self, blocksize):
+        for start in range(0, len(self.content), 7):
+            yield self.content[start:start + 7]
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_download_dataset(monkeypatch, tmpdir):
+    data = b'SIMPLE  =                    T' * 10
+    compressed = gzip_compress(data)
+    url = 'https://dataportal.eso.org/dataPortal/requests/u/1/SAF/X/X.fits.gz'
+    requests = []
+
+    def stream_request(method, url, headers=None, **kwargs):
+        requests.append(headers)
+        if headers:
+            offset = int(headers['Range'][6:-1])
+            return StreamResponse(compressed[offset:], url, status_code=206)
+        return StreamResponse(compressed, url)
+
+    eso = Eso()
+    monkeypatch.setattr(eso._session, 'request', stream_request)
+    directory = str(tmpdir)
+    manifest = _DownloadManifest(directory)
+
+    # an interrupted download: part of the compressed file was received
+    with open(os.path.join(directory, 'X.fits.gz.part'), 'wb') as f:
+        f.write(compressed[:20])
+    manifest.update('X.fits.gz', url=url, state='partial')
+
+    filename = eso._download_dataset(url, directory,
+                                     _DownloadManifest(directory))
+    assert requests == [{'Range': 'bytes=20-'}]
+    assert filename == os.path.join(directory, 'X.fits')
+    with open(filename, 'rb') as f:
+        assert f.read() == data
+    assert sorted(os.listdir(directory)) == [_DownloadManifest.FILENAME,
+                                             'X.fits']
+
+    # completed downloads are not requested again
+    assert eso._download_dataset(url, directory,
+                                 _DownloadManifest(directory)) == filename
+    assert len(requests) == 1
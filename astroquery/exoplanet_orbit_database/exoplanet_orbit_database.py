@@ -10,6 +10,8 @@ from astropy.table import QTable
 import astropy.units as u
 from astropy.coordinates import SkyCoord
 
+from ..utils.table_index import TableIndex
+
 __all__ = ['ExoplanetOrbitDatabase']
 
 EXOPLANETS_CSV_URL = 'http://exoplanets.org/csv-files/exoplanets.csv'
@@ -27,6 +29,7 @@ class ExoplanetOrbitDatabaseClass(object):
     def __init__(self):
         self._param_units = None
         self._table = None
+        self._index = None
 
     @property
     def param_units(self):
@@ -83,6 +86,7 @@ class ExoplanetOrbitDatabaseClass(object):
                         exoplanets_table[col].unit = u.Unit(self.param_units[col])
 
             self._table = QTable(exoplanets_table)
+            self._index = TableIndex(self._table)
 
         return self._table
 
@@ -107,5 +111,52 @@ class ExoplanetOrbitDatabaseClass(object):
         exoplanet_table = self.get_table(table_path=table_path)
         return exoplanet_table.loc[planet_name.strip().lower().replace(' ', '')]
 
+    def query_region(self, coordinates, radius, criteria=None, **kwargs):
+        """
+        Get the exoplanets within a cone on the sky, using the in-memory
+        sky index of the planets table.
+
+        Parameters
+        ----------
+        coordinates : str or `astropy.coordinates` object
+            The center of the cone.
+        radius : str or `~astropy.units.Quantity`
+            The radius of the cone.
+        criteria : dict (optional)
+            Additional range predicates, see ``query_criteria``.
+        kwargs : dict (optional)
+            Extra keyword arguments passed to ``get_table``.
+
+        Returns
+        -------
+        table : `~astropy.table.QTable`
+            Table of the matching exoplanets' properties.
+        """
+        self.get_table(**kwargs)
+        return self._index.query(coordinates=coordinates, radius=radius,
+                                 criteria=criteria)
+
+    def query_criteria(self, criteria, **kwargs):
+        """
+        Get the exoplanets whose parameters fall within inclusive ranges,
+        using sorted-column indexes of the planets table.
+
+        Parameters
+        ----------
+        criteria : dict
+            Mapping of column name to a ``(min, max)`` tuple. Either bound
+            may be `None`, and bounds may be `~astropy.units.Quantity`
+            objects, e.g. ``{'PER': (1 * u.day, 10 * u.day)}``.
+        kwargs : dict (optional)
+            Extra keyword arguments passed to ``get_table``.
+
+        Returns
+        -------
+        table : `~astropy.table.QTable`
+            Table of the matching exoplanets' properties.
+        """
+        self.get_table(**kwargs)
+        return self._index.query(criteria=criteria)
+
 
 ExoplanetOrbitDatabase = ExoplanetOrbitDatabaseClass()
@@ -128,3 +128,19 @@ def test_hd209458b_exoplanet_orbit_database_coords():
 
     print(sep, type(sep))
     assert abs(sep) < 5 * u.arcsec
+
+
+def test_exoplanet_orbit_database_indexed_queries():
+    simbad_coords = SkyCoord(ra='22h03m10.77207s', dec='+18d53m03.5430s')
+    result = ExoplanetOrbitDatabase.query_region(simbad_coords, 1 * u.arcmin,
+                                                 table_path=LOCAL_TABLE_PATH)
+    assert list(result['NAME']) == ['HD 209458 b']
+
+    result = ExoplanetOrbitDatabase.query_criteria(
+        {'PER': (3 * u.day, 4 * u.day)}, table_path=LOCAL_TABLE_PATH)
+    assert list(result['NAME']) == ['HD 209458 b']
+
+    result = ExoplanetOrbitDatabase.query_region(
+        simbad_coords, 1 * u.arcmin, criteria={'PER': (None, 1 * u.day)},
+        table_path=LOCAL_TABLE_PATH)
+    assert len(result) == 0
@@ -1,7 +1,11 @@
 # Licensed under a 3-clause BSD style license - see LICENSE.rst
 from __future__ import print_function
+import re
+from collections import OrderedDict
+
+import numpy as np
 from six import BytesIO
-from astropy.table import Table
+from astropy.table import Table, MaskedColumn
 from astropy.io import fits
 from astropy import coordinates
 from astropy import units as u
@@ -13,6 +17,12 @@ from . import conf
 
 __all__ = ['Heasarc', 'HeasarcClass']
 
+# header cards describing the structure of an ASCII table or its columns
+_column_keyword = re.compile(r'^(XTENSION|BITPIX|NAXIS\d*|PCOUNT|GCOUNT|'
+                             r'TFIELDS|(TTYPE|TFORM|TBCOL|TUNIT|TNULL|TSCAL|'
+                             r'TZERO|TDISP)\d+)$')
+_tform_regex = re.compile(r'^\s*([AIFED])(\d+)')
+
 
 @async_to_sync
 class HeasarcClass(BaseQuery):
@@ -176,32 +186,53 @@ class HeasarcClass(BaseQuery):
 
     def _fallback(self, content):
         """
-        Blank columns which have to be converted to float or in fail so
-        lets fix that by replacing with -1's
-        """
+        Decode the ASCII table of a response that `~astropy.table.Table.read`
+        rejects, typically because of blank numeric fields.
 
-        data = BytesIO(content)
-        header = fits.getheader(data, 1)  # Get header for column info
-        colstart = [y for x, y in header.items() if "TBCOL" in x]
-        collens = [int(float(y[1:]))
-                   for x, y in header.items() if "TFORM" in x]
-        new_table = []
-
-        old_table = content.split("END")[-1].strip()
-        for line in old_table.split("\n"):
-            newline = []
-            for n, tup in enumerate(zip(colstart, collens), start=1):
-                cstart, clen = tup
-                part = line[cstart - 1:cstart + clen]
-                newline.append(part)
-                if len(part.strip()) == 0:
-                    if header["TFORM%i" % n][0] in ["F", "I"]:
-                        # extra space is required to sperate column
-                        newline[-1] = "-1".rjust(clen) + " "
-            new_table.append("".join(newline))
-
-        data = BytesIO(content.replace(old_table, "\n".join(new_table)))
-        return Table.read(data, hdu=1)
+        The rows are cut into columns at once from the ``TBCOL`` and
+        ``TFORM`` header cards; blank fields, and fields equal to ``TNULL``,
+        are masked.
+        """
+        hdulist = fits.open(BytesIO(content))
+        header = hdulist[1].header
+        offset = hdulist.fileinfo(1)['datLoc']
+        rowlen = header['NAXIS1']
+        nrows = min(header['NAXIS2'], (len(content) - offset) // rowlen)
+        rows = np.frombuffer(content, dtype='S1', count=nrows * rowlen,
+                             offset=offset).reshape(nrows, rowlen)
+
+        meta = OrderedDict()
+        for key, value in header.items():
+            if key in ('COMMENT', 'HISTORY'):
+                meta.setdefault(key, []).append(value)
+            elif key and not _column_keyword.match(key):
+                meta[key] = value
+        table = Table(meta=meta)
+        for n in range(1, header['TFIELDS'] + 1):
+            start = header['TBCOL%i' % n] - 1
+            code, width = _tform_regex.match(header['TFORM%i' % n]).groups()
+            width = int(width)
+            fields = np.char.strip(np.ascontiguousarray(
+                rows[:, start:start + width]).view('S%i' % width)[:, 0])
+
+            mask = fields == b''
+            if 'TNULL%i' % n in header:
+                mask |= fields == str(header['TNULL%i' % n]).strip().encode()
+            if code == 'A':
+                data = np.char.decode(fields, 'ascii')
+            else:
+                fields[mask] = b'0'
+                if code == 'I':
+                    data = fields.astype(np.int64)
+                else:
+                    data = np.char.replace(fields, b'D', b'E').astype(float)
+                if 'TSCAL%i' % n in header or 'TZERO%i' % n in header:
+                    data = (data * header.get('TSCAL%i' % n, 1) +
+                            header.get('TZERO%i' % n, 0))
+            table.add_column(MaskedColumn(
+                data, name=header.get('TTYPE%i' % n, 'col%i' % n),
+                mask=mask, unit=header.get('TUNIT%i' % n)))
+        return table
 
     def _parse_result(self, response, verbose=False):
         # if verbose is False then suppress any VOTable related warnings
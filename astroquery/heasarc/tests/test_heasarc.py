@@ -1,2 +1,36 @@
 # Licensed under a 3-clause BSD style license - see LICENSE.rst
 from __future__ import print_function
+
+import numpy as np
+from astropy.io import fits
+from six import BytesIO
+
+from ... import heasarc
+
+
+def test_fallback():
+    columns = fits.ColDefs([
+        fits.Column(name='NAME', format='A8', array=['a', 'b', 'c']),
+        fits.Column(name='OBSID', format='I6', array=[1, 2, 3]),
+        fits.Column(name='EXPOSURE', format='E12.4', unit='s',
+                    array=[1.5, 2.5, 3.5]),
+        fits.Column(name='FLUX', format='D15.7', array=[1e-3, 2e-3, 3e-3])])
+    hdu = fits.TableHDU.from_columns(columns)
+    hdu.header['MISSION'] = 'ROSAT'
+    content = BytesIO()
+    fits.HDUList([fits.PrimaryHDU(), hdu]).writeto(content)
+    content = content.getvalue()
+    # blank the exposure of the second row and the identifier of the third
+    for row, n in ((b'b       ', 3), (b'c       ', 2)):
+        start = content.index(row) + hdu.header['TBCOL%i' % n] - 1
+        width = int(hdu.header['TFORM%i' % n][1:].split('.')[0])
+        content = content[:start] + b' ' * width + content[start + width:]
+
+    table = heasarc.Heasarc._fallback(content)
+    assert list(table['NAME']) == ['a', 'b', 'c']
+    assert list(table['OBSID'].mask) == [False, False, True]
+    assert list(table['OBSID'][:2]) == [1, 2]
+    assert list(table['EXPOSURE'].mask) == [False, True, False]
+    assert table['EXPOSURE'].unit == 's'
+    np.testing.assert_allclose(table['FLUX'], [1e-3, 2e-3, 3e-3])
+    assert table.meta['MISSION'] == 'ROSAT'
@@ -1,10 +1,9 @@
-from astropy.table import Table
 from astropy import units as u
 
 from ..query import BaseQuery
 from ..utils import async_to_sync, prepend_docstr_nosections
 from . import conf
-from .utils import parse_readme
+from .utils import record_decoder
 
 __all__ = ['Hitran', 'HitranClass']
 
@@ -15,6 +14,9 @@ class HitranClass(BaseQuery):
     QUERY_URL = conf.query_url
     TIMEOUT = conf.timeout
     FORMATFILE = conf.formatfile
+    # `~astroquery.utils.line_store.LineStore` used by `query_lines`; None
+    # disables it
+    line_store = None
     ISO_INDEX = {'id': 0, 'iso_name': 1, 'abundance': 2, 'mass': 3,
                  'mol_name': 4}
 
@@ -223,30 +225,72 @@ class HitranClass(BaseQuery):
 
         return response
 
+    @prepend_docstr_nosections("\n" + _args_to_payload.__doc__)
+    def query_lines(self, get_query_payload=False, cache=True,
+                    verbose=False, **kwargs):
+        """
+        Queries the service and returns a table object.
+
+        If `line_store` is set, the query is answered from it when its
+        wavenumber range was covered by an earlier query for the same
+        isotopologue, and the result is added to it otherwise.
+
+        Returns
+        -------
+        table : A `~astropy.table.Table` object.
+        """
+        params = self._args_to_payload(**kwargs)
+        if get_query_payload:
+            return params
+
+        def fetch():
+            response = self.query_lines_async(cache=cache, **kwargs)
+            return self._parse_result(response, verbose=verbose)
+
+        if self.line_store is None:
+            self.table = fetch()
+        else:
+            options = {'iso_ids_list': params['iso_ids_list']}
+            self.table = self.line_store.query(
+                'Hitran', options, params['numin'], params['numax'], fetch,
+                lambda table: table['nu'])
+        return self.table
+
+    @prepend_docstr_nosections("\n" + _args_to_payload.__doc__)
+    def query_lines_iter(self, chunk_rows=100000, **kwargs):
+        """
+        Stream the lines of a large query, decoding them as they arrive.
+
+        The response is not cached.
+
+        Other Parameters
+        ----------------
+        chunk_rows : int
+            Approximate number of lines per table.
+
+        Yields
+        ------
+        table : `~astropy.table.Table`
+            Consecutive blocks of lines.
+        """
+        params = self._args_to_payload(**kwargs)
+        response = self._request(method='GET', url=self.QUERY_URL,
+                                 params=params, timeout=self.TIMEOUT,
+                                 cache=False, stream=True)
+        response.raise_for_status()
+        decoder = record_decoder(self.FORMATFILE)
+        for table in decoder.iter_decode(response.iter_content(2**20),
+                                         chunk_rows=chunk_rows):
+            yield table
+
     def _parse_result(self, response, verbose=False):
         """
         Parse a response into an `~astropy.table.Table`
         """
-        formats = parse_readme(self.FORMATFILE)
-
-        dtypes = [entry['dtype'] for entry in formats.values()]
-
-        rows = []
-        for line in response.text.split('\n'):
-            if line.strip():
-                row = []
-                start = 0
-                for key, entry in formats.items():
-                    formatter = entry['formatter']
-                    length = entry['length']
-                    value = formatter(line[start:start+length])
-                    row.append(value)
-                    start = start + length
-                rows.append(row)
-
-        result = Table(rows=rows, names=formats.keys(), dtype=dtypes)
-
-        return result
+        content = getattr(response, 'content', None)
+        if content is None:
+            content = response.text
+        return record_decoder(self.FORMATFILE).decode(content)
 
 
 Hitran = HitranClass()
@@ -3,9 +3,10 @@ import os
 import numpy as np
 
 from astropy import units as u
-from astropy.table import Table
+from astropy.table import Table, vstack
 
-from ...hitran import Hitran
+from ...hitran import Hitran, conf
+from ...hitran.utils import parse_readme, record_decoder
 
 HITRAN_DATA = 'H2O.data'
 
@@ -52,3 +53,54 @@ def test_query():
                                    'line_mixing_flag', 'gp', 'gpp'])
     assert tbl['molec_id'][0] == 1
     np.testing.assert_almost_equal(tbl['nu'][0], 0.072059)
+
+
+def test_record_decoder():
+    decoder = record_decoder(conf.formatfile)
+    assert decoder is record_decoder(conf.formatfile)
+    with open(data_path(HITRAN_DATA), 'rb') as f:
+        data = f.read()
+    tbl = decoder.decode(data)
+    assert len(tbl) == 122
+    assert tbl['nu'].dtype == np.float32
+    assert tbl['global_upper_quanta'][0] == '          0 1 0'
+    # records separated by newlines are a view of the data, with or without
+    # a final newline
+    unterminated = b'\n'.join(data.splitlines())
+    for lines in (unterminated, unterminated + b'\n'):
+        assert decoder.records(lines).base is lines
+        assert np.all(decoder.decode(lines) == tbl)
+    # a short last record is padded, not dropped
+    truncated = decoder.decode(unterminated[:-10])
+    assert len(truncated) == 122
+    assert np.all(truncated[:121] == tbl[:121])
+    assert truncated['gpp'].mask[-1]
+
+    # ragged lines, Windows line endings and blank lines
+    ragged = b'\r\n\r\n'.join(line.rstrip() for line in data.splitlines())
+    assert np.all(decoder.decode(ragged) == tbl)
+
+    # chunks cut anywhere
+    chunks = [data[i:i + 1000] for i in range(0, len(data), 1000)]
+    tables = list(decoder.iter_decode(chunks, chunk_rows=50))
+    assert len(tables) == 3
+    assert np.all(vstack(tables) == tbl)
+
+    # blank numeric fields are masked
+    line = data.splitlines()[0]
+    tbl = decoder.decode(line[:3] + b' ' * 12 + line[15:])
+    assert tbl['nu'].mask[0]
+    np.testing.assert_almost_equal(tbl['a'][0], 5.088e-12)
+
+
+def test_quanta_subfields():
+    formats = parse_readme(conf.formatfile, group_global='class9',
+                           group_local='group1')
+    assert formats is parse_readme(conf.formatfile, group_global='class9',
+                                   group_local='group1')
+    assert 'global_upper_quanta' not in formats
+    tbl = record_decoder(conf.formatfile, group_global='class9',
+                         group_local='group1').decode(
+        MockResponseHitran().text)
+    assert list(tbl['J_u'][:3]) == [4, 5, 5]
+    assert list(tbl['Kc_l'][:3]) == [5, 6, 6]
@@ -1,5 +1,9 @@
+import os
 from collections import OrderedDict
 
+import numpy as np
+from astropy.table import MaskedColumn, Table
+
 
 dtype_dict = {'f': 'f', 's': 's', 'd': 'i', 'e': 'f', 'F': 'f', 'A': 's',
               'I': 'i'}
@@ -7,13 +11,52 @@ fmt_dict = {'f': float, 's': str, 'd': int, 'e': float, 'A': str, 'I': int,
             'F': float}
 
 
+# parsed format files and their decoders, keyed by file, modification time
+# and quanta groups
+_readme_cache = {}
+_decoder_cache = {}
+
+
+def _readme_key(filename, group_global, group_local):
+    return (os.path.abspath(filename), os.stat(filename).st_mtime,
+            group_global, group_local)
+
+
 def parse_readme(filename, group_global=None, group_local=None):
+    """
+    Read the record format of the HITRAN line lists from ``filename``.
+
+    The result is cached for as long as the file is unchanged, and should
+    not be modified.
+
+    Parameters
+    ----------
+    filename : str
+        The format file.
+    group_global, group_local : str or None
+        If both are given, the global and local quanta fields are split into
+        their subfields (see `quanta_formatter`).
+
+    Returns
+    -------
+    formats : `~collections.OrderedDict`
+        Field name -> dict with the ``format_str``, ``length``, ``dtype`` and
+        ``formatter`` of the field, in record order.
+    """
+    key = _readme_key(filename, group_global, group_local)
+    if key not in _readme_cache:
+        _readme_cache[key] = _parse_readme(filename, group_global,
+                                           group_local)
+    return _readme_cache[key]
+
+
+def _parse_readme(filename, group_global, group_local):
     with open(filename, 'r') as f:
         lines = f.readlines()
 
     formats = OrderedDict()
 
-    if group_local is not None and group_local is not None:
+    if group_global is not None and group_local is not None:
         qfl, qfg = quanta_formatter(group_local=group_local,
                                     group_global=group_global)
         use_qf = True
@@ -122,3 +165,126 @@ def quanta_formatter(group_global='class1', group_local='group1'):
                      'formatter': fmt_dict[value[0]]}
 
     return loc, glob
+
+
+class RecordDecoder(object):
+    """
+    Decoder of fixed-width line records, compiled from the formats returned
+    by `parse_readme`.
+
+    Records are read into a NumPy array of raw byte fields in one pass, and
+    each field is then converted as a whole column.  Numeric fields left
+    blank are masked.
+
+    Parameters
+    ----------
+    formats : `~collections.OrderedDict`
+        The record format, as returned by `parse_readme`.
+    """
+
+    def __init__(self, formats):
+        self.names = list(formats)
+        self.dtypes = [formats[name]['dtype'] for name in self.names]
+        self.record_length = sum(entry['length']
+                                 for entry in formats.values())
+        self._raw_dtype = np.dtype([(str(name), 'S{0}'.format(entry['length']))
+                                    for name, entry in formats.items()])
+
+    def records(self, data):
+        """
+        Split ``data`` (bytes) into an array of raw records.
+        """
+        # fast path: newline-separated records of exactly the right length,
+        # the last one possibly without a newline, viewed without copying
+        line_length = self.record_length + 1
+        nrecords = (len(data) + 1) // line_length
+        if data and len(data) in (nrecords * line_length,
+                                  nrecords * line_length - 1):
+            eols = np.ndarray((len(data) // line_length,), dtype='S1',
+                              buffer=data, offset=self.record_length,
+                              strides=(line_length,))
+            if np.all(eols == b'\n'):
+                return np.ndarray((nrecords,), dtype=self._raw_dtype,
+                                  buffer=data, strides=(line_length,))
+
+        lines = [line.ljust(self.record_length)[:self.record_length]
+                 for line in data.splitlines() if line.strip()]
+        lines = np.array(lines, dtype='S{0}'.format(self.record_length))
+        return lines.view(self._raw_dtype)
+
+    def decode(self, data):
+        """
+        Decode the records in ``data``.
+
+        Parameters
+        ----------
+        data : bytes or str
+            Newline-separated records.  Blank lines are skipped.
+
+        Returns
+        -------
+        table : `~astropy.table.Table`
+        """
+        if not isinstance(data, bytes):
+            data = data.encode('ascii')
+        records = self.records(data)
+        columns = [self._convert(records[str(name)], dtype)
+                   for name, dtype in zip(self.names, self.dtypes)]
+        return Table(columns, names=self.names, copy=False)
+
+    def iter_decode(self, chunks, chunk_rows=100000):
+        """
+        Decode a stream of data, e.g. ``response.iter_content(...)``.
+
+        Parameters
+        ----------
+        chunks : iterable of bytes
+            The data, cut anywhere.
+        chunk_rows : int
+            Approximate number of records per table yielded.
+
+        Yields
+        ------
+        table : `~astropy.table.Table`
+            The records decoded so far, ``chunk_rows`` at a time.
+        """
+        chunk_bytes = chunk_rows * (self.record_length + 1)
+        pending = []
+        size = 0
+        for chunk in chunks:
+            pending.append(chunk)
+            size += len(chunk)
+            if size >= chunk_bytes:
+                data = b''.join(pending)
+                end = data.rfind(b'\n') + 1
+                if end > 0:
+                    yield self.decode(data[:end])
+                    data = data[end:]
+                pending, size = [data], len(data)
+        data = b''.join(pending)
+        if data.strip():
+            yield self.decode(data)
+
+    @staticmethod
+    def _convert(raw, dtype):
+        if dtype.startswith('S'):
+            return raw.astype(dtype)
+        # the numeric conversion accepts surrounding spaces, but not blanks
+        blank = raw == b' ' * raw.dtype.itemsize
+        if blank.any():
+            values = np.where(blank, b'0', raw).astype(dtype)
+            return MaskedColumn(values, mask=blank)
+        return raw.astype(dtype)
+
+
+def record_decoder(filename, group_global=None, group_local=None):
+    """
+    The `RecordDecoder` for the format file ``filename``, built once per
+    parsed format.
+    """
+    key = _readme_key(filename, group_global, group_local)
+    if key not in _decoder_cache:
+        _decoder_cache[key] = RecordDecoder(
+            parse_readme(filename, group_global=group_global,
+                         group_local=group_local))
+    return _decoder_cache[key]
@@ -6,6 +6,7 @@ import six
 from . import utils
 from . import conf
 from ..utils import commons
+from ..utils.name_resolve import resolve_name
 from ..query import BaseQuery
 
 
@@ -87,7 +88,7 @@ class IrsaDustClass(BaseQuery):
         readable_objs = self.get_images_async(
             coordinate, radius=radius, image_type=image_type, timeout=timeout,
             get_query_payload=get_query_payload, show_progress=show_progress)
-        return [obj.get_fits() for obj in readable_objs]
+        return commons.get_fits_list(readable_objs)
 
     def get_images_async(self, coordinate, radius=None, image_type=None,
                          timeout=TIMEOUT, get_query_payload=False,
@@ -336,7 +337,7 @@ class IrsaDustClass(BaseQuery):
                 # If the coordinate is a resolvable name, pass that name
                 # directly to irsa_dust because it can handle it (and that
                 # changes the return value associated metadata)
-                C = commons.ICRSCoord.from_name(coordinate)
+                C = resolve_name(coordinate)
                 payload = {"locstr": coordinate}
             except coordinates.name_resolve.NameResolveError:
                 C = commons.parse_coordinates(coordinate).transform_to('fk5')
@@ -6,6 +6,7 @@ import astropy.units as u
 from astropy.io import ascii
 from ..query import BaseQuery
 from ..utils import async_to_sync
+from ..utils.lookup_index import load_lookuptable
 # import configurable items declared in __init__.py
 from . import conf
 from . import lookup_table
@@ -25,6 +26,9 @@ class JPLSpecClass(BaseQuery):
     # use the Configuration Items imported from __init__.py
     URL = conf.server
     TIMEOUT = conf.timeout
+    # `~astroquery.utils.line_store.LineStore` used by `query_lines`; None
+    # disables it
+    line_store = None
 
     def query_lines_async(self, min_frequency, max_frequency,
                           min_strength=-500,
@@ -125,6 +129,45 @@ class JPLSpecClass(BaseQuery):
 
         return response
 
+    def query_lines(self, min_frequency, max_frequency, min_strength=-500,
+                    max_lines=2000, molecule='All', flags=0,
+                    parse_name_locally=False, get_query_payload=False,
+                    cache=True, verbose=False):
+        """
+        Queries the service and returns a table object.
+
+        The parameters are those of `query_lines_async`.  If `line_store` is
+        set, the query is answered from it when its frequency range was
+        covered by an earlier query with the same options, and results with
+        fewer than ``max_lines`` lines are added to it.
+
+        Returns
+        -------
+        table : A `~astropy.table.Table` object.
+        """
+        kwargs = dict(min_strength=min_strength, max_lines=max_lines,
+                      molecule=molecule, flags=flags,
+                      parse_name_locally=parse_name_locally)
+        payload = self.query_lines_async(min_frequency, max_frequency,
+                                         get_query_payload=True, **kwargs)
+        if get_query_payload:
+            return payload
+
+        def fetch():
+            response = self.query_lines_async(min_frequency, max_frequency,
+                                              cache=cache, **kwargs)
+            return self._parse_result(response, verbose=verbose)
+
+        options = [(k, v) for k, v in payload if k not in ('MinNu', 'MaxNu')]
+        if self.line_store is None or len(options) == len(payload):
+            self.table = fetch()
+        else:
+            payload = dict(payload)
+            self.table = self.line_store.query(
+                'JPLSpec', options, payload['MinNu'], payload['MaxNu'],
+                fetch, lambda table: table['FREQ'] / 1e3, limit=max_lines)
+        return self.table
+
     def _parse_result(self, response, verbose=False):
         """
         Parse a response into an `~astropy.table.Table`
@@ -235,13 +278,28 @@ class JPLSpecClass(BaseQuery):
 
 JPLSpec = JPLSpecClass()
 
+# species lookup table shared by all queries, see build_lookup
+_lookuptable = None
 
-def build_lookup():
 
-    result = JPLSpec.get_species_table()
+def _build_lookup(catfile):
+
+    result = JPLSpec.get_species_table(catfile=os.path.basename(catfile))
     keys = list(result[1][:])  # convert NAME column to list
     values = list(result[0][:])  # convert TAG column to list
     dictionary = dict(zip(keys, values))  # make k,v dictionary
     lookuptable = lookup_table.Lookuptable(dictionary)  # apply the class above
 
     return lookuptable
+
+
+def build_lookup():
+    """
+    Load the species name -> tag table.  The table and its search index are
+    built once, cached on disk, and shared by all callers in the session.
+    """
+    global _lookuptable
+    if _lookuptable is None:
+        _lookuptable = load_lookuptable(data_path('catdir.cat'),
+                                        _build_lookup, 'JPLSpec')
+    return _lookuptable
@@ -1,10 +1,12 @@
 import numpy as np
 
 import os
+import re
 
 from astropy import units as u
 from astropy.table import Table
 from ...jplspec import JPLSpec
+from ...jplspec.core import build_lookup
 
 file1 = 'CO.data'
 file2 = 'CO_6.data'
@@ -70,6 +72,14 @@ def test_input_multi():
     np.testing.assert_almost_equal(response['MaxNu'], 1000.)
 
 
+def test_lookup_table():
+    lookup = build_lookup()
+    assert build_lookup() is lookup
+    assert list(lookup.find('^H2O$', 0)) == [18003]
+    assert set(lookup.find('h2o', re.IGNORECASE)) == set(
+        v for k, v in lookup.items() if 'H2O' in k.upper())
+
+
 def test_query():
 
     response = MockResponseSpec(file1)
@@ -30,6 +30,10 @@ class Conf(_config.ConfigNamespace):
         0,
         'Maximum number of rows that will be fetched from the result.')
 
+    max_workers = _config.ConfigItem(
+        4,
+        'Maximum number of concurrent requests sent to the MPC.')
+
 
 conf = Conf()
 
@@ -1,23 +1,185 @@
 # -*- coding: utf-8 -*-
+import os
+import pickle
+import shutil
 
 from bs4 import BeautifulSoup
 
 import numpy as np
+from astropy import log
 from astropy.io import ascii
 from astropy.time import Time
-from astropy.table import Table, Column
+from astropy.table import Table, Column, MaskedColumn, vstack
 import astropy.units as u
 from astropy.coordinates import EarthLocation, Angle
+try:
+    import erfa
+except ImportError:
+    from astropy import _erfa as erfa
 
 from ..query import BaseQuery
 from . import conf
 from ..utils import async_to_sync, class_or_instance
+from ..utils.parallel import parallel_map
 from ..exceptions import InvalidQueryError
 
 
 __all__ = ['MPCClass']
 
 
+def _mpes_dates_to_time(dates):
+    """
+    Convert MPES dates, e.g. ``'2018 07 30 174614'``, to a UTC
+    `~astropy.time.Time`, reading the digits of all the dates at once.
+    """
+    dates = np.asarray(dates, dtype='U17')
+    digits = (dates.view(np.uint32).reshape(len(dates), 17) -
+              ord('0')).astype(int)
+
+    def field(start, stop):
+        value = 0
+        for i in range(start, stop):
+            value = value * 10 + digits[:, i]
+        return value
+
+    jd1, jd2 = erfa.dtf2d(b'UTC', field(0, 4), field(5, 7), field(8, 10),
+                          field(11, 13), field(13, 15),
+                          field(15, 17).astype(float))
+    time = Time(jd1, jd2, format='jd', scale='utc')
+    time.format = 'iso'
+    return time
+
+
+def _sexagesimal_to_degrees(values, hours=False):
+    """
+    Convert space-separated sexagesimal strings (``'-05 08 06'``) to
+    degrees, parsing all of them at once.
+    """
+    values = np.asarray(values, dtype=str)
+    fields = np.fromstring(' '.join(values), sep=' ')
+    if len(fields) != 3 * len(values):
+        # not all values have three fields
+        return Angle(values, unit='hourangle' if hours else 'deg').deg
+    fields = fields.reshape(len(values), 3)
+    degrees = (np.abs(fields[:, 0]) + fields[:, 1] / 60. +
+               fields[:, 2] / 3600.)
+    # the sign of e.g. '-00 30 00' is only in the string
+    negative = np.char.startswith(np.char.lstrip(values), '-')
+    degrees = np.where(negative, -degrees, degrees)
+    return degrees * 15 if hours else degrees
+
+
+# fields of the MPC web service that look numeric but are identifiers
+_OBJECT_NAME_FIELDS = ('designation', 'packed_designation', 'name', 'n_or_d')
+
+
+def _objects_to_table(objects):
+    """
+    Convert the objects returned by the MPC web service (a list of
+    dictionaries) to a table, one column at a time.
+
+    Numbers sent as strings (e.g., ``'0.0755347'``) are converted to
+    floats, and null values are masked.
+    """
+    names = []
+    seen = set()
+    for obj in objects:
+        for name in obj:
+            if name not in seen:
+                seen.add(name)
+                names.append(name)
+
+    tab = Table()
+    for name in names:
+        values = [obj.get(name) for obj in objects]
+        present = np.array([value is not None for value in values],
+                           dtype=bool)
+        data = [value for value in values if value is not None]
+        types = set(type(value) for value in data)
+        if types == set([bool]):
+            data = np.array(data, dtype=bool)
+        elif types == set([int]):
+            data = np.array(data, dtype=np.int64)
+        elif types and types <= set([int, float]):
+            data = np.array(data, dtype=float)
+        else:
+            data = np.array([str(value) for value in data])
+            if name not in _OBJECT_NAME_FIELDS and len(data) > 0:
+                try:
+                    data = data.astype(float)
+                except ValueError:
+                    pass
+        if len(data) == 0:
+            data = np.array([], dtype=str)
+        column = np.zeros(len(values), dtype=data.dtype)
+        column[present] = data
+        if present.all():
+            tab[name] = Column(column)
+        else:
+            tab[name] = MaskedColumn(column, mask=~present)
+    return tab
+
+
+def _object_number(obj):
+    """
+    The number of an object of the MPC web service, as an int, or `None`.
+    """
+    number = obj.get('number')
+    return None if number is None else int(number)
+
+
+class _ObjectStore(object):
+    """
+    Objects of the MPC web service kept on disk.
+
+    The objects are kept in one section per set of query parameters, by
+    number (or designation for unnumbered objects), with the latest of the
+    update times of the objects of each page of numbers fetched.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.sections = {}
+        if os.path.exists(filename):
+            with open(filename, 'rb') as f:
+                state = pickle.load(f)
+            self.sections = state.get('sections', {})
+
+    @staticmethod
+    def key(obj):
+        number = _object_number(obj)
+        return obj.get('designation') if number is None else number
+
+    def section(self, parameters):
+        """
+        The objects and pages fetched with the query ``parameters``, a
+        dictionary.
+        """
+        signature = repr(sorted((key, str(value))
+                                for key, value in parameters.items()))
+        return self.sections.setdefault(signature,
+                                        {'objects': {}, 'pages': {}})
+
+    def update(self, section, page, objects):
+        pages = section['pages']
+        for obj in objects:
+            section['objects'][self.key(obj)] = obj
+            updated_at = obj.get('updated_at')
+            if updated_at is not None and (pages.get(page) is None or
+                                           updated_at > pages[page]):
+                pages[page] = updated_at
+
+    def save(self):
+        try:
+            with open(self.filename + '.tmp', 'wb') as f:
+                pickle.dump({'sections': self.sections},
+                            f, protocol=pickle.HIGHEST_PROTOCOL)
+            shutil.move(self.filename + '.tmp', self.filename)
+        except (IOError, OSError) as ex:
+            log.warning("Could not save the objects to {0}: {1}"
+                        .format(self.filename, ex))
+
+
 @async_to_sync
 class MPCClass(BaseQuery):
     MPC_URL = 'https://' + conf.web_service_server + '/web_service'
@@ -31,6 +193,9 @@ class MPCClass(BaseQuery):
     OBSERVATORY_CODES_URL = ('https://' + conf.web_service_server +
                              '/iau/lists/ObsCodes.html')
     TIMEOUT = conf.timeout
+    MAX_WORKERS = conf.max_workers
+    # largest number of ephemeris dates MPES computes per request
+    MAX_EPHEMERIS_STEPS = 1441
 
     _ephemeris_types = {
         'equatorial': 'a',
@@ -51,6 +216,10 @@ class MPCClass(BaseQuery):
         'sky': 's'
     }
 
+    # parsed observatory table, as a structured array, and row of each code
+    _observatory_codes = None
+    _observatory_index = None
+
     def __init__(self):
         super(MPCClass, self).__init__()
 
@@ -331,6 +500,145 @@ class MPCClass(BaseQuery):
             mpc_endpoint = mpc_endpoint + '/search_comet_orbits'
         return mpc_endpoint
 
+    def query_numbered_objects(self, target_type='asteroid', numbers=None,
+                               page_size=1000, store=None, max_workers=None,
+                               cache=False, **kwargs):
+        """
+        Orbits and parameters of many numbered objects, in one table.
+
+        The objects are fetched in pages of ``page_size`` consecutive
+        numbers, with ``number_min`` and ``number_max`` queries sent
+        concurrently, and the pages are converted to a table column by
+        column.
+
+        With a ``store``, the objects are also kept on disk, by number,
+        separately for each set of query parameters.  Later calls with the
+        same parameters only fetch, in the pages already fetched, the
+        objects updated since the most recent update found in that page
+        (``updated_at_min``), and return the stored objects.
+
+
+        Parameters
+        ----------
+        target_type : str, optional
+            ``'asteroid'`` (default) or ``'comet'``.
+
+        numbers : int or iterable of int, optional
+            The numbers of the objects.  If ``None``, all the numbered
+            objects are fetched.
+
+        page_size : int, optional
+            Number of consecutive object numbers fetched per request.
+
+        store : bool or str, optional
+            Keep the objects in a local store: ``True`` for
+            ``numbered_<target_type>s.pickle`` in the cache directory, or
+            the name of the store file.
+
+        max_workers : int, optional
+            Maximum number of concurrent requests.  Defaults to
+            ``conf.max_workers``.
+
+        cache : bool, optional
+            Cache results or use cached results (default: ``False``).
+
+        **kwargs
+            Other parameters of `~astroquery.mpc.MPCClass.query_objects`,
+            e.g. ``return_fields`` or ``inclination_min``, sent with each
+            page.
+
+
+        Returns
+        -------
+        table : `~astropy.table.Table`
+            The objects, sorted by number.  Numeric values sent as strings
+            are converted to floats, and null values are masked.
+
+
+        Examples
+        --------
+        >>> from astroquery.mpc import MPC
+        >>> tab = MPC.query_numbered_objects(
+        ...     numbers=range(1, 100001), store=True,
+        ...     return_fields='number,semimajor_axis,eccentricity,'
+        ...     'inclination')  # doctest: +SKIP
+
+        """
+
+        if max_workers is None:
+            max_workers = self.MAX_WORKERS
+        if isinstance(numbers, int):
+            numbers = [numbers]
+        return_fields = kwargs.get('return_fields')
+        if return_fields:
+            # the fields used to merge and refresh the objects
+            fields = return_fields.split(',')
+            kwargs['return_fields'] = ','.join(
+                fields + [field for field in ('number', 'designation',
+                                              'updated_at')
+                          if field not in fields])
+
+        object_store = section = None
+        if store:
+            if store is True:
+                store = os.path.join(self.cache_location,
+                                     'numbered_{0}s.pickle'.format(target_type))
+            object_store = _ObjectStore(store)
+            section = object_store.section(dict(kwargs, page_size=page_size,
+                                                target_type=target_type))
+
+        mpc_endpoint = self.get_mpc_object_endpoint(target_type)
+        auth = (self.MPC_USERNAME, self.MPC_PASSWORD)
+
+        def request(params):
+            response = self._request('GET', mpc_endpoint, params=params,
+                                     auth=auth, timeout=self.TIMEOUT,
+                                     cache=cache)
+            try:
+                return response.json()
+            except ValueError:
+                raise InvalidQueryError(response.text)
+
+        if numbers is None:
+            last = request(self._args_to_object_payload(
+                number='is_not_null', order_by_desc='number', limit=1,
+                return_fields='number'))
+            # pages up to the highest number
+            pages = np.arange(int(last[0]['number']) // page_size + 1
+                              if last else 0)
+        else:
+            numbers = np.asarray(list(numbers), dtype=np.int64)
+            pages = np.unique(numbers // page_size)
+        pages = pages.tolist()
+
+        payloads = []
+        for page in pages:
+            params = dict(kwargs,
+                          number_min=page * page_size,
+                          number_max=(page + 1) * page_size - 1,
+                          limit=page_size)
+            if section is not None and section['pages'].get(page):
+                params['updated_at_min'] = section['pages'][page]
+            payloads.append(self._args_to_object_payload(**params))
+        pages_objects = parallel_map(request, payloads,
+                                     max_workers=max_workers)
+
+        if object_store is not None:
+            for page, page_objects in zip(pages, pages_objects):
+                object_store.update(section, page, page_objects)
+            object_store.save()
+            objects = list(section['objects'].values())
+        else:
+            objects = [obj for page_objects in pages_objects
+                       for obj in page_objects]
+        if numbers is not None:
+            wanted = set(numbers.tolist())
+            objects = [obj for obj in objects
+                       if _object_number(obj) in wanted]
+        objects.sort(key=lambda obj: (_object_number(obj) is None,
+                                      _object_number(obj) or 0))
+        return _objects_to_table(objects)
+
     @class_or_instance
     def get_ephemeris_async(self, target, location='500', start=None, step='1d',
                             number=None, ut_offset=0, eph_type='equatorial',
@@ -564,7 +872,8 @@ class MPCClass(BaseQuery):
 
         if number is not None:
             if number > 1441:
-                raise ValueError('number must be <=1441')
+                raise ValueError('number must be <=1441; use '
+                                 'get_ephemerides for longer ephemerides')
 
         if eph_type not in self._ephemeris_types.keys():
             raise ValueError("eph_type must be one of {}".format(
@@ -598,6 +907,107 @@ class MPCClass(BaseQuery):
 
         return response
 
+    def get_ephemerides(self, targets, location='500', start=None, step='1d',
+                        number=None, max_workers=None, cache=True, **kwargs):
+        """
+        Ephemerides of many objects, over any number of dates.
+
+        The ephemeris of each target is split into requests of at most
+        ``MAX_EPHEMERIS_STEPS`` dates, which are sent concurrently and
+        cached individually.  The results are stacked into a single table
+        before the dates and coordinates are converted, at once for all the
+        rows.
+
+
+        Parameters
+        ----------
+        targets : str or list of str
+            Designations of the objects; see
+            `~astroquery.mpc.MPCClass.get_ephemeris`.
+
+        location, start, step : optional
+            See `~astroquery.mpc.MPCClass.get_ephemeris`.
+
+        number : int, optional
+            The number of ephemeris dates to compute for each target, with
+            no upper limit.  If ``None``, the default of
+            `~astroquery.mpc.MPCClass.get_ephemeris` is used.
+
+        max_workers : int, optional
+            Maximum number of concurrent requests.  Defaults to
+            ``conf.max_workers``.
+
+        cache : bool, optional
+            Cache results or use cached results (default: ``True``).
+
+        **kwargs
+            Other options of `~astroquery.mpc.MPCClass.get_ephemeris`, e.g.
+            ``eph_type`` or ``proper_motion``.
+
+
+        Returns
+        -------
+        table : `~astropy.table.Table`
+            The ephemerides, with an additional ``Target`` column.
+
+
+        Examples
+        --------
+        >>> from astroquery.mpc import MPC
+        >>> tab = MPC.get_ephemerides(['2P', 'Ceres'], start='2019-01-01',
+        ...                           step='1h', number=24 * 120)  # doctest: +SKIP
+
+        """
+
+        if isinstance(targets, str):
+            targets = [targets]
+        for keyword in ('get_query_payload', 'get_raw_response'):
+            if keyword in kwargs:
+                raise TypeError("get_ephemerides() does not accept {}"
+                                .format(keyword))
+        if max_workers is None:
+            max_workers = self.MAX_WORKERS
+
+        _step = u.Quantity(step)
+        if number is None:
+            number = int(self._default_number_of_steps.get(
+                str(_step.unit)[:1], 21))
+        # fix the start of the ephemerides before splitting them; spans are
+        # added to the UTC Julian date so that they do not count leap
+        # seconds, like the dates of MPES
+        _start = (Time.now() if start is None else Time(start)).utc
+
+        # one request per target and span of MAX_EPHEMERIS_STEPS dates
+        requests = []
+        for target in targets:
+            for first in range(0, number, self.MAX_EPHEMERIS_STEPS):
+                payload = self.get_ephemeris_async(
+                    target, location=location,
+                    start=Time(_start.jd1, _start.jd2 +
+                               (first * _step).to(u.d).value,
+                               format='jd', scale='utc'),
+                    step=step,
+                    number=min(self.MAX_EPHEMERIS_STEPS, number - first),
+                    get_query_payload=True, **kwargs)
+                requests.append((target, payload))
+
+        def request(target_payload):
+            return self._request('POST', self.MPES_URL,
+                                 data=target_payload[1], cache=cache)
+
+        responses = parallel_map(request, requests, max_workers=max_workers)
+
+        tables = []
+        for (target, payload), response in zip(requests, responses):
+            tab = self._parse_ephemeris_table(response)
+            tab.add_column(Column([str(target)] * len(tab), name='Target'),
+                           index=0)
+            tables.append(tab)
+        sky = tables[0].meta['sky']
+        tab = vstack(tables, metadata_conflicts='silent')
+        tab.meta['sky'] = sky
+        return self._convert_ephemeris_columns(tab)
+
     @class_or_instance
     def get_observatory_codes_async(self, get_raw_response=False, cache=True):
         """
@@ -696,11 +1106,114 @@ class MPCClass(BaseQuery):
             raise TypeError('code must be a string')
         if len(code) != 3:
             raise ValueError('code must be three charaters long')
-        tab = self.get_observatory_codes(cache=cache)
-        for row in tab:
-            if row[0] == code:
-                return Angle(row[1], 'deg'), row[2], row[3], row[4]
-        raise LookupError('{} not found'.format(code))
+        codes, index = self._get_observatory_index(cache=cache)
+        if code not in index:
+            raise LookupError('{} not found'.format(code))
+        row = codes[index[code]]
+        return (Angle(row['Longitude'], 'deg'), row['cos'], row['sin'],
+                row['Name'])
+
+    @class_or_instance
+    def get_observatory_locations(self, codes, cache=True):
+        """
+        IAU observatory locations of many observations at once.
+
+
+        Parameters
+        ----------
+        codes : array-like of str or int
+            IAU observatory codes, typically one per observation.
+            Integers are zero-padded to three digits.
+
+        cache : bool, optional
+            Cache observatory table or use cached results (default:
+            `True`).
+
+
+        Returns
+        -------
+        longitude : Angle
+            Observatory longitudes (east of Greenwich).
+
+        cos : `~numpy.ndarray`
+            Parallax constants ``rho * cos(phi)``.
+
+        sin : `~numpy.ndarray`
+            Parallax constants ``rho * sin(phi)``.
+
+        name : `~numpy.ndarray`
+            The names of the observatories.
+
+        The values are NaN for observatories without a fixed location
+        (e.g., spacecraft).
+
+
+        Raises
+        ------
+        LookupError
+            If some of the codes are not found in the MPC table.
+
+
+        Examples
+        --------
+        >>> from astroquery.mpc import MPC
+        >>> lon, cos, sin, name = MPC.get_observatory_locations(
+        ...     ['568', 'G37', '568'])  # doctest: +SKIP
+
+        """
+
+        codes = np.asarray(codes)
+        if codes.dtype.kind in 'iu':
+            codes = np.char.zfill(codes.astype(str), 3)
+        elif codes.dtype.kind == 'S':
+            codes = np.char.decode(codes, 'ascii')
+        table, index = self._get_observatory_index(cache=cache)
+
+        # look each distinct code up once
+        unique, inverse = np.unique(codes, return_inverse=True)
+        missing = [code for code in unique if code not in index]
+        if missing:
+            raise LookupError('{} not found'.format(', '.join(missing)))
+        rows = np.array([index[code] for code in unique], dtype=int)[inverse]
+        rows = rows.reshape(codes.shape)
+        return (Angle(table['Longitude'][rows], 'deg'), table['cos'][rows],
+                table['sin'][rows], table['Name'][rows])
+
+    def _get_observatory_index(self, cache=True):
+        """
+        The observatory table as a structured array, with a dictionary of
+        its rows by code.
+
+        The parsed table is kept in memory, and in ``observatory_codes.npy``
+        in the cache directory so that later sessions do not parse it
+        again.  ``cache=False`` fetches and parses the table again.
+        """
+        if cache and self._observatory_index is not None:
+            return self._observatory_codes, self._observatory_index
+
+        cache_location = getattr(self, 'cache_location', None)
+        filename = None
+        if cache_location is not None:
+            filename = os.path.join(cache_location, 'observatory_codes.npy')
+
+        if cache and filename is not None and os.path.exists(filename):
+            codes = np.load(filename)
+        else:
+            table = self.get_observatory_codes(cache=cache)
+            codes = table.filled(np.nan).as_array()
+            if filename is not None:
+                try:
+                    with open(filename + '.tmp', 'wb') as f:
+                        np.save(f, codes)
+                    shutil.move(filename + '.tmp', filename)
+                except (IOError, OSError) as ex:
+                    log.warning("Could not save the observatory codes: "
+                                "{0}".format(ex))
+
+        self._observatory_codes = codes
+        self._observatory_index = dict(
+            (code, row) for row, code in enumerate(codes['Code']))
+        return self._observatory_codes, self._observatory_index
 
     def _args_to_object_payload(self, **kwargs):
         request_args = kwargs
@@ -776,30 +1289,17 @@ class MPCClass(BaseQuery):
             text_table = text_table[start:]
 
             # parse table ourselves to make sure the code column is a
-            # string and that blank cells are masked
-            rows = []
-            for line in text_table.splitlines():
-                lon = line[4:13]
-                if len(lon.strip()) == 0:
-                    lon = np.nan
-                else:
-                    lon = float(lon)
-
-                c = line[13:21]
-                if len(c.strip()) == 0:
-                    c = np.nan
-                else:
-                    c = float(c)
-
-                s = line[21:30]
-                if len(s.strip()) == 0:
-                    s = np.nan
-                else:
-                    s = float(s)
-
-                rows.append((line[:3], lon, c, s, line[30:]))
-
-            tab = Table(rows=rows,
+            # string and that blank cells are masked; columns are
+            # converted at once
+            lines = text_table.splitlines()
+
+            def column(start, stop):
+                return np.array([line[start:stop].strip() or 'nan'
+                                 for line in lines], dtype=float)
+
+            tab = Table([[line[:3] for line in lines], column(4, 13),
+                         column(13, 21), column(21, 30),
+                         [line[30:] for line in lines]],
                         names=('Code', 'Longitude', 'cos', 'sin', 'Name'),
                         dtype=(str, float, float, float, str),
                         masked=True)
@@ -809,133 +1309,151 @@ class MPCClass(BaseQuery):
 
             return tab
         elif self.query_type == 'ephemeris':
-            content = result.content.decode()
-            table_start = content.find('<pre>')
-            if table_start == -1:
-                raise InvalidQueryError(content)
-            table_end = content.find('</pre>')
-            text_table = content[table_start + 5:table_end]
-
-            SKY = 'raty=a' in result.request.body
-            HELIOCENTRIC = 'raty=s' in result.request.body
-            GEOCENTRIC = 'raty=G' in result.request.body
-
-            # columns = '\n'.join(text_table.splitlines()[:2])
-            # find column headings
-            if SKY:
-                # slurp to newline after "h m s"
-                i = text_table.index('\n', text_table.index('h m s')) + 1
-                columns = text_table[:i]
-                data_start = columns.count('\n') - 1
+            tab = self._parse_ephemeris_table(result)
+            return self._convert_ephemeris_columns(tab)
+
+    def _parse_ephemeris_table(self, result):
+        """
+        Read an MPES ephemeris page into a table, leaving the dates and
+        coordinates as they are formatted by MPES.
+        """
+        content = result.content.decode()
+        table_start = content.find('<pre>')
+        if table_start == -1:
+            raise InvalidQueryError(content)
+        table_end = content.find('</pre>')
+        text_table = content[table_start + 5:table_end]
+
+        SKY = 'raty=a' in result.request.body
+        HELIOCENTRIC = 'raty=s' in result.request.body
+        GEOCENTRIC = 'raty=G' in result.request.body
+
+        # columns = '\n'.join(text_table.splitlines()[:2])
+        # find column headings
+        if SKY:
+            # slurp to newline after "h m s"
+            i = text_table.index('\n', text_table.index('h m s')) + 1
+            columns = text_table[:i]
+            data_start = columns.count('\n') - 1
+        else:
+            # slurp to newline after "JD_TT"
+            i = text_table.index('\n', text_table.index('JD_TT')) + 1
+            columns = text_table[:i]
+            data_start = columns.count('\n') - 1
+
+        first_row = text_table.splitlines()[data_start + 1]
+
+        if SKY:
+            names = ('Date', 'RA', 'Dec', 'Delta',
+                     'r', 'Elongation', 'Phase', 'V')
+            col_starts = (0, 18, 29, 39, 47, 56, 62, 69)
+            col_ends = (17, 28, 38, 46, 55, 61, 68, 72)
+            units = (None, None, None, 'au', 'au', 'deg', 'deg', 'mag')
+
+            if 's=t' in result.request.body:    # total motion
+                names += ('Proper motion', 'Direction')
+                units += ('arcsec/h', 'deg')
+            elif 's=c' in result.request.body:  # coord Motion
+                names += ('dRA', 'dDec')
+                units += ('arcsec/h', 'arcsec/h')
+            elif 's=s' in result.request.body:  # sky Motion
+                names += ('dRA cos(Dec)', 'dDec')
+                units += ('arcsec/h', 'arcsec/h')
+            col_starts += (73, 81)
+            col_ends += (80, 89)
+
+            if 'Moon' in columns:
+                # table includes Alt, Az, Sun and Moon geometry
+                names += ('Azimuth', 'Altitude', 'Sun altitude', 'Moon phase',
+                          'Moon distance', 'Moon altitude')
+                col_starts += tuple((col_ends[-1] + offset for offset in
+                                     (2, 9, 14, 20, 27, 33)))
+                col_ends += tuple((col_ends[-1] + offset for offset in
+                                   (8, 13, 19, 26, 32, 37)))
+                units += ('deg', 'deg', 'deg', None, 'deg', 'deg')
+            if 'Uncertainty' in columns:
+                names += ('Uncertainty 3sig', 'Unc. P.A.')
+                col_starts += tuple((col_ends[-1] + offset for offset in
+                                     (2, 11)))
+                col_ends += tuple((col_ends[-1] + offset for offset in
+                                   (10, 16)))
+                units += ('arcsec', 'deg')
+            if ">Map</a>" in first_row and self._unc_links:
+                names += ('Unc. map', 'Unc. offsets')
+                col_starts += (first_row.index(' / <a') + 3, )
+                col_starts += (
+                    first_row.index(' / <a', col_starts[-1]) + 3, )
+                # Unc. offsets is always last
+                col_ends += (col_starts[-1] - 3,
+                             first_row.rindex('</a>') + 4)
+                units += (None, None)
+        elif HELIOCENTRIC:
+            names = ('Object', 'JD', 'X', 'Y', 'Z', "X'", "Y'", "Z'")
+            col_starts = (0, 12, 28, 45, 61, 77, 92, 108)
+            col_ends = None
+            units = (None, None, 'au', 'au', 'au', 'au/d', 'au/d', 'au/d')
+        elif GEOCENTRIC:
+            names = ('Object', 'JD', 'X', 'Y', 'Z')
+            col_starts = (0, 12, 28, 45, 61)
+            col_ends = None
+            units = (None, None, 'au', 'au', 'au')
+
+        tab = ascii.read(text_table, format='fixed_width_no_header',
+                         names=names, col_starts=col_starts,
+                         col_ends=col_ends, data_start=data_start,
+                         fill_values=(('N/A', np.nan),))
+
+        for col, unit in zip(names, units):
+            tab[col].unit = unit
+
+        tab.meta['sky'] = SKY
+        return tab
+
+    def _convert_ephemeris_columns(self, tab):
+        """
+        Convert the dates to `~astropy.time.Time` and the coordinates to
+        angles, at once for all the rows of ``tab``.
+        """
+        SKY = tab.meta.pop('sky')
+
+        # Time for dates, Angle for RA and Dec; convert columns at user's request
+        if SKY:
+            # convert from MPES string to Time, MPES uses UT timescale
+            tab['Date'] = _mpes_dates_to_time(tab['Date'])
+
+            # convert from MPES string:
+            ra = Angle(_sexagesimal_to_degrees(tab['RA'], hours=True), 'deg')
+            dec = Angle(_sexagesimal_to_degrees(tab['Dec']), 'deg')
+
+            # optionally convert back to a string
+            if self._ra_format is not None:
+                ra_unit = self._ra_format.get('unit', ra.unit)
+                ra = ra.to_string(**self._ra_format)
             else:
-                # slurp to newline after "JD_TT"
-                i = text_table.index('\n', text_table.index('JD_TT')) + 1
-                columns = text_table[:i]
-                data_start = columns.count('\n') - 1
-
-            first_row = text_table.splitlines()[data_start + 1]
-
-            if SKY:
-                names = ('Date', 'RA', 'Dec', 'Delta',
-                         'r', 'Elongation', 'Phase', 'V')
-                col_starts = (0, 18, 29, 39, 47, 56, 62, 69)
-                col_ends = (17, 28, 38, 46, 55, 61, 68, 72)
-                units = (None, None, None, 'au', 'au', 'deg', 'deg', 'mag')
-
-                if 's=t' in result.request.body:    # total motion
-                    names += ('Proper motion', 'Direction')
-                    units += ('arcsec/h', 'deg')
-                elif 's=c' in result.request.body:  # coord Motion
-                    names += ('dRA', 'dDec')
-                    units += ('arcsec/h', 'arcsec/h')
-                elif 's=s' in result.request.body:  # sky Motion
-                    names += ('dRA cos(Dec)', 'dDec')
-                    units += ('arcsec/h', 'arcsec/h')
-                col_starts += (73, 81)
-                col_ends += (80, 89)
-
-                if 'Moon' in columns:
-                    # table includes Alt, Az, Sun and Moon geometry
-                    names += ('Azimuth', 'Altitude', 'Sun altitude', 'Moon phase',
-                              'Moon distance', 'Moon altitude')
-                    col_starts += tuple((col_ends[-1] + offset for offset in
-                                         (2, 9, 14, 20, 27, 33)))
-                    col_ends += tuple((col_ends[-1] + offset for offset in
-                                       (8, 13, 19, 26, 32, 37)))
-                    units += ('deg', 'deg', 'deg', None, 'deg', 'deg')
-                if 'Uncertainty' in columns:
-                    names += ('Uncertainty 3sig', 'Unc. P.A.')
-                    col_starts += tuple((col_ends[-1] + offset for offset in
-                                         (2, 11)))
-                    col_ends += tuple((col_ends[-1] + offset for offset in
-                                       (10, 16)))
-                    units += ('arcsec', 'deg')
-                if ">Map</a>" in first_row and self._unc_links:
-                    names += ('Unc. map', 'Unc. offsets')
-                    col_starts += (first_row.index(' / <a') + 3, )
-                    col_starts += (
-                        first_row.index(' / <a', col_starts[-1]) + 3, )
-                    # Unc. offsets is always last
-                    col_ends += (col_starts[-1] - 3,
-                                 first_row.rindex('</a>') + 4)
-                    units += (None, None)
-            elif HELIOCENTRIC:
-                names = ('Object', 'JD', 'X', 'Y', 'Z', "X'", "Y'", "Z'")
-                col_starts = (0, 12, 28, 45, 61, 77, 92, 108)
-                col_ends = None
-                units = (None, None, 'au', 'au', 'au', 'au/d', 'au/d', 'au/d')
-            elif GEOCENTRIC:
-                names = ('Object', 'JD', 'X', 'Y', 'Z')
-                col_starts = (0, 12, 28, 45, 61)
-                col_ends = None
-                units = (None, None, 'au', 'au', 'au')
-
-            tab = ascii.read(text_table, format='fixed_width_no_header',
-                             names=names, col_starts=col_starts,
-                             col_ends=col_ends, data_start=data_start,
-                             fill_values=(('N/A', np.nan),))
-
-            for col, unit in zip(names, units):
-                tab[col].unit = unit
-
-            # Time for dates, Angle for RA and Dec; convert columns at user's request
-            if SKY:
-                # convert from MPES string to Time, MPES uses UT timescale
-                tab['Date'] = Time(['{}-{}-{} {}:{}:{}'.format(
-                    d[:4], d[5:7], d[8:10], d[11:13], d[13:15], d[15:17])
-                    for d in tab['Date']], scale='utc')
-
-                # convert from MPES string:
-                ra = Angle(tab['RA'], unit='hourangle').to('deg')
-                dec = Angle(tab['Dec'], unit='deg')
-
-                # optionally convert back to a string
-                if self._ra_format is not None:
-                    ra_unit = self._ra_format.get('unit', ra.unit)
-                    ra = ra.to_string(**self._ra_format)
-                else:
-                    ra_unit = ra.unit
-
-                if self._dec_format is not None:
-                    dec_unit = self._dec_format.get('unit', dec.unit)
-                    dec = dec.to_string(**self._dec_format)
-                else:
-                    dec_unit = dec.unit
-
-                # replace columns
-                tab.remove_columns(('RA', 'Dec'))
-                tab.add_column(Column(ra, name='RA', unit=ra_unit), index=1)
-                tab.add_column(Column(dec, name='Dec', unit=dec_unit), index=2)
-
-                # convert proper motion columns
-                for col in ('Proper motion', 'dRA', 'dRA cos(Dec)', 'dDec'):
-                    if col in tab.colnames:
-                        tab[col].convert_unit_to(self._proper_motion_unit)
+                ra_unit = ra.unit
+
+            if self._dec_format is not None:
+                dec_unit = self._dec_format.get('unit', dec.unit)
+                dec = dec.to_string(**self._dec_format)
             else:
-                # convert from MPES string to Time
-                tab['JD'] = Time(tab['JD'], format='jd', scale='tt')
+                dec_unit = dec.unit
+
+            # replace columns
+            index = tab.colnames.index('RA')
+            tab.remove_columns(('RA', 'Dec'))
+            tab.add_column(Column(ra, name='RA', unit=ra_unit), index=index)
+            tab.add_column(Column(dec, name='Dec', unit=dec_unit),
+                           index=index + 1)
+
+            # convert proper motion columns
+            for col in ('Proper motion', 'dRA', 'dRA cos(Dec)', 'dDec'):
+                if col in tab.colnames:
+                    tab[col].convert_unit_to(self._proper_motion_unit)
+        else:
+            # convert from MPES string to Time
+            tab['JD'] = Time(tab['JD'], format='jd', scale='tt')
 
-            return tab
+        return tab
 
 
 MPC = MPCClass()
@@ -42,6 +42,7 @@ Then edit and remove all but the first 10 lines of observatories.
 This is sufficient for testing.
 
 """
+import json
 import os
 import pytest
 import numpy as np
@@ -367,8 +368,10 @@ def test_get_observatory_codes(patch_get):
     assert all([r == g for r, g in zip(result[0], greenwich)])
 
 
-def test_get_observatory_location(patch_get):
-    result = mpc.core.MPC.get_observatory_location('000')
+def test_get_observatory_location(patch_get, tmpdir):
+    mpc_ = mpc.MPCClass()
+    mpc_.cache_location = str(tmpdir)
+    result = mpc_.get_observatory_location('000')
     greenwich = [Angle(0.0, 'deg'), 0.62411, 0.77873, 'Greenwich']
     assert all([r == g for r, g in zip(result, greenwich)])
 
@@ -378,3 +381,134 @@ def test_get_observatory_location_fail():
         mpc.core.MPC.get_observatory_location(0)
     with pytest.raises(ValueError):
         mpc.core.MPC.get_observatory_location('00')
+
+
+def test_get_observatory_locations(patch_get, monkeypatch, tmpdir):
+    mpc_ = mpc.MPCClass()
+    mpc_.cache_location = str(tmpdir)
+    lon, cos, sin, name = mpc_.get_observatory_locations(
+        ['001', '000', '001'])
+    assert lon.unit == u.deg
+    assert np.all(lon.deg == [0.1542, 0.0, 0.1542])
+    assert np.all(cos == [0.62992, 0.62411, 0.62992])
+    assert np.all(sin == [0.77411, 0.77873, 0.77411])
+    assert list(name) == ['Crowborough', 'Greenwich', 'Crowborough']
+    assert np.all(mpc_.get_observatory_locations([1])[1] == [0.62992])
+
+    with pytest.raises(LookupError):
+        mpc_.get_observatory_locations(['000', 'XXX'])
+
+    # the parsed table is kept in the cache directory
+    def no_request(*args, **kwargs):
+        raise AssertionError('the observatory codes are requested again')
+
+    monkeypatch.setattr(mpc.MPCClass, '_request', no_request)
+    mpc_ = mpc.MPCClass()
+    mpc_.cache_location = str(tmpdir)
+    assert mpc_.get_observatory_location('000')[3] == 'Greenwich'
+
+
+def test_get_ephemerides(monkeypatch):
+    payloads = []
+
+    def recording_post(self, httpverb, url, data={}, **kwargs):
+        payloads.append(data)
+        return post_mockreturn(self, httpverb, url, data=data, **kwargs)
+
+    monkeypatch.setattr(mpc.MPCClass, '_request', recording_post)
+    tab = mpc.core.MPC.get_ephemerides(['2P', '1994 XG'], start='2018-07-30',
+                                       step='1d', number=3000, max_workers=2)
+    # 3000 dates are split into 1441 + 1441 + 118 for each target
+    assert len(payloads) == 6
+    requested = sorted((p['TextArea'], p['d'], p['l']) for p in payloads)
+    assert requested[:3] == [('1994 XG', '2018-07-30 000000', 1441),
+                             ('1994 XG', '2022-07-10 000000', 1441),
+                             ('1994 XG', '2026-06-20 000000', 118)]
+    assert tab.colnames[:4] == ['Target', 'Date', 'RA', 'Dec']
+    assert sorted(set(tab['Target'])) == ['1994 XG', '2P']
+    assert isinstance(tab['Date'], Time)
+    assert tab['RA'].unit == u.deg
+
+    single = mpc.core.MPC.get_ephemeris('2P')
+    first = tab[tab['Target'] == '2P'][:len(single)]
+    assert np.all(first['Date'] == single['Date'])
+    np.testing.assert_allclose(first['RA'], single['RA'])
+    np.testing.assert_allclose(first['Dec'], single['Dec'])
+
+
+def test_query_numbered_objects(monkeypatch, tmpdir):
+    catalog = [{'number': number,
+                'designation': '{} AB{}'.format(2000 + number, number),
+                'name': 'Name {}'.format(number) if number % 3 else None,
+                'inclination': '{:.5f}'.format(number / 10.),
+                'observations': 10 * number,
+                'neo': number == 5,
+                'updated_at': '2018-01-{:02d}T00:00:00Z'.format(number)}
+               for number in range(1, 26)]
+    requests = []
+
+    def object_request(self, httpverb, url, params={}, **kwargs):
+        requests.append(params)
+        objects = [obj for obj in catalog
+                   if obj['updated_at'] >= params.get('updated_at_min', '')]
+        if 'order_by_desc' in params:
+            objects = [{'number': objects[-1]['number']}]
+        else:
+            objects = [obj for obj in objects
+                       if params['number_min'] <= int(obj['number']) <=
+                       params['number_max']]
+        return MockResponse(json.dumps(objects[:params['limit']]).encode())
+
+    monkeypatch.setattr(mpc.MPCClass, '_request', object_request)
+    mpc_class = mpc.MPCClass()
+    mpc_class.cache_location = tmpdir.strpath
+
+    tab = mpc_class.query_numbered_objects(numbers=[3, 12, 13, 4],
+                                           page_size=10)
+    assert len(requests) == 2
+    assert list(tab['number']) == [3, 4, 12, 13]
+    assert tab['inclination'].dtype.kind == 'f'
+    np.testing.assert_allclose(tab['inclination'], [0.3, 0.4, 1.2, 1.3])
+    assert tab['observations'].dtype.kind == 'i'
+    assert tab['neo'].dtype.kind == 'b'
+    assert tab['designation'][0] == '2003 AB3'
+    assert list(tab['name'].mask) == [True, False, True, False]
+
+    del requests[:]
+    tab = mpc_class.query_numbered_objects(page_size=10, store=True,
+                                           max_workers=2)
+    # the highest number, then numbers 0-9, 10-19 and 20-29
+    assert len(requests) == 4
+    assert list(tab['number']) == list(range(1, 26))
+
+    # only the objects updated since are fetched again
+    del requests[:]
+    catalog[1]['inclination'] = '0.25000'
+    catalog[1]['updated_at'] = '2018-02-01T00:00:00Z'
+    tab = mpc_class.query_numbered_objects(page_size=10, store=True)
+    assert [params['updated_at_min'] for params in requests
+            if 'number_min' in params] == ['2018-01-09T00:00:00Z',
+                                           '2018-01-19T00:00:00Z',
+                                           '2018-01-25T00:00:00Z']
+    assert len(tab) == 25
+    assert tab['inclination'][1] == 0.25
+
+    # pages not fetched yet, and other query parameters, are fetched in full
+    store = tmpdir.join('objects.pickle').strpath
+    del requests[:]
+    tab = mpc_class.query_numbered_objects(numbers=range(1, 5), page_size=10,
+                                           store=store)
+    tab = mpc_class.query_numbered_objects(numbers=range(20, 23),
+                                           page_size=10, store=store)
+    assert list(tab['number']) == [20, 21, 22]
+    tab = mpc_class.query_numbered_objects(
+        numbers=range(1, 5), page_size=10, store=store,
+        return_fields='number,neo')
+    assert list(tab['neo']) == [False] * 4
+    assert not any('updated_at_min' in params for params in requests)
+
+    # numbers sent as strings
+    for obj in catalog:
+        obj['number'] = str(obj['number'])
+    tab = mpc_class.query_numbered_objects(numbers=[13, 4], page_size=10)
+    assert list(tab['number']) == [4, 13]
@@ -0,0 +1,28 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+import os
+import astropy.units as u
+from astropy.coordinates import SkyCoord
+
+from ...nasa_exoplanet_archive import NasaExoplanetArchive
+
+LOCAL_TABLE_PATH = os.path.join(os.path.abspath(os.path.dirname(__file__)),
+                                'data', 'nasa_exoplanet_archive.csv')
+
+
+def test_exoplanet_archive_indexed_queries():
+    simbad_coords = SkyCoord(ra='22h03m10.77207s', dec='+18d53m03.5430s')
+    result = NasaExoplanetArchive.query_region(simbad_coords, 1 * u.arcmin,
+                                               table_path=LOCAL_TABLE_PATH)
+    assert list(result['NAME_LOWERCASE']) == ['hd209458b']
+
+    result = NasaExoplanetArchive.query_criteria(
+        {'pl_orbper': (3 * u.day, 4 * u.day), 'st_dist': (40, 50)},
+        table_path=LOCAL_TABLE_PATH)
+    assert list(result['NAME_LOWERCASE']) == ['hd209458b']
+
+    result = NasaExoplanetArchive.query_region(simbad_coords, 1 * u.arcmin,
+                                               criteria={'st_dist': (50, None)},
+                                               table_path=LOCAL_TABLE_PATH)
+    assert len(result) == 0
@@ -78,7 +78,7 @@ class NvasClass(BaseQuery):
         if get_query_payload:
             return readable_objs
 
-        filelist = [obj.get_fits() for obj in readable_objs]
+        filelist = commons.get_fits_list(readable_objs)
 
         return filelist
 
@@ -2,11 +2,23 @@
 import xml.etree.ElementTree as ET
 import gzip
 import io
+
+import numpy as np
+from astropy.table import MaskedColumn, Table
+from astropy.utils.data import download_file
+
+from ..utils.commons import TableList
+from ..utils.pickle_cache import cache_directory, file_key, load_or_build
 from .utils import Number
 
 oec_server_url = "https://github.com/OpenExoplanetCatalogue/oec_gzip/raw/master/systems.xml.gz"
 
-__all__ = ['xml_element_to_dict', 'findvalue', 'get_catalogue']
+__all__ = ['xml_element_to_dict', 'findvalue', 'get_catalogue',
+           'get_catalogue_tables']
+
+# Elements that become rows of the tables returned by get_catalogue_tables
+_RECORD_TAGS = {'system': 'systems', 'star': 'stars', 'planet': 'planets'}
+_NUMBER_ATTRIBUTES = ('errorminus', 'errorplus', 'upperlimit', 'lowerlimit')
 
 try:
     import urllib.request as urllib2
@@ -93,3 +105,133 @@ def findvalue(element, searchstring):
         if "lowerlimit" in res.attrib:
             tempnum.lowerlimit = res.attrib["lowerlimit"]
         return tempnum
+
+
+def get_catalogue_tables(filepath=None, cache=True):
+    """
+    Parses the Open Exoplanet Catalogue into columnar tables.
+
+    The gzipped XML is decompressed and parsed as a stream with
+    `~xml.etree.ElementTree.iterparse`, so the element tree is never built.
+    Each ``<system>``, ``<star>`` and ``<planet>`` becomes a row of the
+    corresponding table; the text of its direct child elements becomes the
+    columns, and the ``errorminus``, ``errorplus``, ``upperlimit`` and
+    ``lowerlimit`` attributes become ``<column>_<attribute>`` columns.  When a
+    child element is repeated (e.g. alternative names), the first one is
+    kept.
+
+    Rows are linked through integer keys: ``system_id`` on all three tables
+    and ``star_id`` on the star and planet tables.  Planets that do not
+    orbit a single star (e.g. circumbinary planets) have a masked ``star_id``.
+
+    Parameters
+    -----------
+    filepath : str or None
+        if no filepath is given, remote source is used.
+    cache : bool
+        Cache the downloaded catalogue and the parsed tables.  The parsed
+        tables are pickled in the astroquery cache and
+        reused as long as the catalogue file is unchanged.
+
+    Returns
+    -------
+    tables : `~astroquery.utils.commons.TableList`
+        The ``systems``, ``stars`` and ``planets`` tables.
+    """
+    if filepath is None:
+        filepath = download_file(oec_server_url, cache=cache)
+
+    def parse():
+        with gzip.GzipFile(filepath) as fileobj:
+            return _iterparse_catalogue(fileobj)
+    directory = cache_directory('OpenExoplanetCatalogue') if cache else None
+    return load_or_build(directory, file_key(filepath), parse)
+
+
+def _iterparse_catalogue(fileobj):
+    """
+    Single pass over the catalogue XML, returning a `TableList`.
+    """
+    rows = dict((name, []) for name in _RECORD_TAGS.values())
+    counters = dict((name, 0) for name in _RECORD_TAGS.values())
+    # stack of (tag, record) pairs, record is None for container elements
+    # such as <binary> or <satellite>
+    stack = []
+    system_id = None
+    star_id = None
+
+    for event, elem in ET.iterparse(fileobj, events=('start', 'end')):
+        tag = elem.tag
+        if event == 'start':
+            if tag in _RECORD_TAGS:
+                name = _RECORD_TAGS[tag]
+                record = {}
+                if tag == 'system':
+                    system_id = counters[name]
+                    record['system_id'] = system_id
+                else:
+                    record['system_id'] = system_id
+                    if tag == 'star':
+                        star_id = counters[name]
+                        record['star_id'] = star_id
+                    elif stack and stack[-1][0] == 'star':
+                        record['star_id'] = star_id
+                counters[name] += 1
+                stack.append((tag, record))
+            elif tag != 'systems':
+                stack.append((tag, None))
+            continue
+
+        if tag == 'systems':
+            continue
+        tag, record = stack.pop()
+        if record is not None:
+            rows[_RECORD_TAGS[tag]].append(record)
+            elem.clear()
+        elif stack and stack[-1][1] is not None and len(elem) == 0:
+            parent = stack[-1][1]
+            if tag not in parent:
+                parent[tag] = elem.text.strip() if elem.text else None
+                for attr in _NUMBER_ATTRIBUTES:
+                    if attr in elem.attrib:
+                        parent[tag + '_' + attr] = elem.attrib[attr]
+        if not stack or stack[-1][1] is None:
+            # only elements directly below a record are kept
+            elem.clear()
+
+    return TableList([(name, _records_to_table(rows[name]))
+                      for name in ('systems', 'stars', 'planets')])
+
+
+def _records_to_table(records):
+    """
+    Turn a list of dicts into a `~astropy.table.Table`, converting each
+    column to float when all its values are numeric.
+    """
+    colnames = []
+    seen = set()
+    for record in records:
+        for key in record:
+            if key not in seen:
+                seen.add(key)
+                colnames.append(key)
+    # keys first, then the remaining columns in first-seen order
+    keys = [key for key in ('system_id', 'star_id') if key in seen]
+    colnames = keys + [name for name in colnames if name not in keys]
+
+    table = Table()
+    for name in colnames:
+        values = [record.get(name) for record in records]
+        mask = np.array([value is None for value in values], dtype=bool)
+        if name in keys:
+            data = np.array([-1 if value is None else value
+                             for value in values], dtype=int)
+        else:
+            data = np.array(['' if value is None else value
+                             for value in values])
+            try:
+                data = np.where(mask, 'nan', data).astype(float)
+            except ValueError:
+                pass
+        table[name] = MaskedColumn(data, mask=mask)
+    return table
@@ -1,6 +1,10 @@
 # Licensed under a 3-clause BSD style license - see LICENSE.rst
 import os
+
+from astropy.config import paths
+
 from ... import open_exoplanet_catalogue as oec
+from ...utils.pickle_cache import cache_directory
 
 
 # get file path of a static data file for testing
@@ -20,3 +24,49 @@ def test_function():
             kepler67b = planet
     assert oec.findvalue(kepler67b, 'name') == "Kepler-67 b"
     assert oec.findvalue(kepler67b, 'discoverymethod') == "transit"
+
+
+def test_catalogue_tables():
+    tables = oec.get_catalogue_tables(data_path('systems.xml.gz'),
+                                      cache=False)
+    cata = oec.get_catalogue(data_path('systems.xml.gz'))
+
+    assert tables.keys() == ['systems', 'stars', 'planets']
+    assert len(tables['systems']) == len(cata.findall('.//system'))
+    assert len(tables['stars']) == len(cata.findall('.//star'))
+    assert len(tables['planets']) == len(cata.findall('.//planet'))
+
+    planets = tables['planets']
+    kepler67b = planets[planets['name'] == 'Kepler-67 b'][0]
+    assert kepler67b['discoverymethod'] == 'transit'
+    assert planets['period'].dtype.kind == 'f'
+    assert abs(kepler67b['period'] -
+               oec.findvalue(cata.find(".//planet[name='Kepler-67 b']"),
+                             'period')) < 1e-10
+
+    star = tables['stars'][kepler67b['star_id']]
+    system = tables['systems'][kepler67b['system_id']]
+    assert star['system_id'] == kepler67b['system_id']
+    assert star['name'] == 'Kepler-67'
+    assert system['name'] == 'Kepler-67'
+
+    # circumbinary and free-floating planets are not attached to a star
+    assert (planets['star_id'].mask.sum() ==
+            len(cata.findall('.//binary/planet')) +
+            len(cata.findall('./system/planet')))
+
+
+def test_catalogue_tables_cache(tmpdir):
+    filepath = str(tmpdir.join('systems.xml.gz'))
+    with open(data_path('systems.xml.gz'), 'rb') as src:
+        with open(filepath, 'wb') as dst:
+            dst.write(src.read())
+
+    with paths.set_temp_cache(str(tmpdir)):
+        cache_dir = cache_directory('OpenExoplanetCatalogue')
+        tables = oec.get_catalogue_tables(filepath)
+        assert len(os.listdir(cache_dir)) == 1
+        cached = oec.get_catalogue_tables(filepath)
+    for name in tables.keys():
+        assert tables[name].colnames == cached[name].colnames
+        assert len(tables[name]) == len(cached[name])
@@ -20,6 +20,8 @@ import astropy.utils.data
 
 from . import version
 from .utils import system_tools
+from .utils.rate_limit import (THROTTLE_STATUS_CODES, get_rate_limiter,
+                               retry_after)
 
 __all__ = ['BaseQuery', 'QueryWithLogin']
 
@@ -143,7 +145,18 @@ class BaseQuery(object):
     """
     This is the base class for all the query classes in astroquery. It
     is implemented as an abstract class and must not be directly instantiated.
+
+    Subclasses can set ``RATE_LIMIT`` to the maximum number of requests per
+    second accepted by their service.  The requests to a host are then
+    throttled by a limiter shared by all the threads and instances, which
+    backs off when the service answers with ``429`` or ``503`` and resends
+    the request up to ``RATE_LIMIT_RETRIES`` times.
     """
+    # maximum number of requests per second, None for no limit
+    RATE_LIMIT = None
+    # number of requests that can be sent at once (default: RATE_LIMIT)
+    RATE_LIMIT_BURST = None
+    RATE_LIMIT_RETRIES = 3
 
     def __init__(self):
         S = self._session = requests.session()
@@ -228,20 +241,46 @@ class BaseQuery(object):
             query = AstroQuery(method, url, **req_kwargs)
             if ((self.cache_location is None) or (not self._cache_active) or (not cache)):
                 with suspend_cache(self):
-                    response = query.request(self._session, stream=stream,
-                                             auth=auth, verify=verify)
+                    response = self._rate_limited(
+                        url, query.request, self._session, stream=stream,
+                        auth=auth, verify=verify)
             else:
                 response = query.from_cache(self.cache_location)
                 if not response:
-                    response = query.request(self._session,
-                                             self.cache_location,
-                                             stream=stream,
-                                             auth=auth,
-                                             verify=verify)
+                    response = self._rate_limited(url, query.request,
+                                                  self._session,
+                                                  self.cache_location,
+                                                  stream=stream,
+                                                  auth=auth,
+                                                  verify=verify)
                     to_cache(response, query.request_file(self.cache_location))
             self._last_query = query
             return response
 
+    def _rate_limited(self, url, send, *args, **kwargs):
+        """
+        Send a request with ``send(*args, **kwargs)`` within the rate limit
+        of the class, and send it again if the service asks to slow down.
+        """
+        if not self.RATE_LIMIT:
+            return send(*args, **kwargs)
+
+        limiter = get_rate_limiter(url, self.RATE_LIMIT,
+                                   burst=self.RATE_LIMIT_BURST)
+        for attempt in range(self.RATE_LIMIT_RETRIES + 1):
+            limiter.acquire()
+            response = send(*args, **kwargs)
+            if response.status_code not in THROTTLE_STATUS_CODES:
+                limiter.success()
+                break
+            delay = retry_after(response)
+            log.debug("{0} answered {1}; slowing down to {2:.2f} requests/s"
+                      .format(url, response.status_code, limiter.rate / 2.))
+            limiter.back_off(delay)
+            if attempt < self.RATE_LIMIT_RETRIES:
+                response.close()
+        return response
+
     def _download_file(self, url, local_filepath, timeout=None, auth=None,
                        continuation=True, cache=False, method="GET", head_safe=False, **kwargs):
         """
@@ -250,11 +289,13 @@ class BaseQuery(object):
         """
 
         if head_safe:
-            response = self._session.request("HEAD", url, timeout=timeout, stream=True,
-                                             auth=auth, **kwargs)
+            response = self._rate_limited(url, self._session.request, "HEAD", url,
+                                          timeout=timeout, stream=True, auth=auth,
+                                          **kwargs)
         else:
-            response = self._session.request(method, url, timeout=timeout, stream=True,
-                                             auth=auth, **kwargs)
+            response = self._rate_limited(url, self._session.request, method, url,
+                                          timeout=timeout, stream=True, auth=auth,
+                                          **kwargs)
 
         response.raise_for_status()
         if 'content-length' in response.headers:
@@ -282,11 +323,16 @@ class BaseQuery(object):
                 # bytes are indexed from 0:
                 # https://en.wikipedia.org/wiki/List_of_HTTP_header_fields#range-request-header
                 end = "{0}".format(length-1) if length is not None else ""
-                self._session.headers['Range'] = "bytes={0}-{1}".format(existing_file_length,
-                                                                        end)
+                # the Range header is set on this request only: the session
+                # is shared by concurrent downloads
+                headers = dict(kwargs.pop('headers', None) or {})
+                headers['Range'] = "bytes={0}-{1}".format(existing_file_length,
+                                                          end)
 
-                response = self._session.request(method, url, timeout=timeout, stream=True,
-                                                 auth=auth, **kwargs)
+                response.close()
+                response = self._rate_limited(url, self._session.request, method, url,
+                                              timeout=timeout, stream=True, auth=auth,
+                                              headers=headers, **kwargs)
                 response.raise_for_status()
 
         elif cache and os.path.exists(local_filepath):
@@ -311,8 +357,9 @@ class BaseQuery(object):
         else:
             open_mode = 'wb'
             if head_safe:
-                response = self._session.request(method, url, timeout=timeout, stream=True,
-                                                 auth=auth, **kwargs)
+                response = self._rate_limited(url, self._session.request, method, url,
+                                              timeout=timeout, stream=True, auth=auth,
+                                              **kwargs)
                 response.raise_for_status()
 
         blocksize = astropy.utils.data.conf.download_block_size
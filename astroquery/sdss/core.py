@@ -622,7 +622,7 @@ class SDSSClass(BaseQuery):
             if isinstance(readable_objs, dict):
                 return readable_objs
             else:
-                return [obj.get_fits() for obj in readable_objs]
+                return commons.get_fits_list(readable_objs)
 
     def get_images_async(self, coordinates=None, radius=2. * u.arcsec,
                          matches=None, run=None, rerun=301, camcol=None,
@@ -771,7 +771,7 @@ class SDSSClass(BaseQuery):
             if isinstance(readable_objs, dict):
                 return readable_objs
             else:
-                return [obj.get_fits() for obj in readable_objs]
+                return commons.get_fits_list(readable_objs)
 
     def get_spectral_template_async(self, kind='qso', timeout=TIMEOUT,
                                     show_progress=True):
@@ -839,7 +839,7 @@ class SDSSClass(BaseQuery):
             kind=kind, timeout=timeout, show_progress=show_progress)
 
         if readable_objs is not None:
-            return [obj.get_fits() for obj in readable_objs]
+            return commons.get_fits_list(readable_objs)
 
     def _parse_result(self, response, verbose=False):
         """
@@ -28,6 +28,15 @@ class Conf(_config.ConfigNamespace):
         0,
         'Maximum number of rows that will be fetched from the result.')
 
+    max_script_lines = _config.ConfigItem(
+        10000,
+        'Maximum number of queries sent in one script by the bulk queries; '
+        'longer lists are split into several scripts.')
+
+    max_workers = _config.ConfigItem(
+        4,
+        'Maximum number of scripts sent to Simbad concurrently.')
+
 
 conf = Conf()
 
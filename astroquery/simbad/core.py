@@ -4,19 +4,23 @@ Simbad query class for accessing the Simbad Service
 """
 from __future__ import print_function
 import copy
+import io
 import re
 import json
 import os
 from collections import namedtuple
 import warnings
 import astropy.units as u
+from astropy import log
 from astropy.utils.data import get_pkg_data_filename
 import astropy.coordinates as coord
-from astropy.table import Table
+from astropy.table import Table, vstack
+import numpy as np
 import astropy.io.votable as votable
-from six import BytesIO
+import six
 from ..query import BaseQuery
 from ..utils import commons
+from ..utils.parallel import parallel_map
 from ..exceptions import TableParseError, LargeQueryWarning
 from . import conf
 from ..utils.process_asyncs import async_to_sync
@@ -90,15 +94,59 @@ def strip_field(f, keep_filters=False):
 
 error_regex = re.compile(r'(?ms)\[(?P<line>\d+)\]\s?(?P<msg>.+?)(\[|\Z)')
 SimbadError = namedtuple('SimbadError', ('line', 'msg'))
+# errors of script lines that do not go away when the line is sent again
+permanent_error_regex = re.compile(r'(?i)not found|no astronomical object|'
+                                   r'syntax|incorrect|invalid|unknown')
 VersionInfo = namedtuple('VersionInfo', ('major', 'minor', 'micro', 'patch'))
 
 
+# header lines of the sections of a script result, e.g. "::data::::"
+section_regex = re.compile(br'(?m)^::([A-Za-z]+):+\r?$')
+_WHITESPACE = frozenset(six.iterbytes(b' \t\r\n\x0b\x0c'))
+
+
+class _MemoryviewIO(io.RawIOBase):
+    """
+    A read-only, seekable file over a memoryview, which it does not copy.
+    """
+
+    def __init__(self, view):
+        self._view = view
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        view = self._view[self._position:self._position + len(buffer)]
+        size = len(view)
+        buffer[:size] = view
+        self._position += size
+        return size
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        self._position = max(0, offset)
+        return self._position
+
+    def tell(self):
+        return self._position
+
+
 class SimbadResult(object):
     __sections = ('script', 'console', 'error', 'data')
 
     def __init__(self, txt, verbose=False):
+        # the response is kept as bytes, and sections are decoded on access
+        if isinstance(txt, six.text_type):
+            txt = txt.encode('utf-8')
         self.__txt = txt
-        self.__stringio = None
         self.__indexes = {}
         self.verbose = verbose
         self.exectime = None
@@ -108,12 +156,21 @@ class SimbadResult(object):
         self.__warn()
 
     def __split_sections(self):
-        for section in self.__sections:
-            match = re.search(r'(?ims)^::%s:+?\r?$(?P<content>.*?)(^::|\Z)' %
-                              section, self.__txt)
-            if match:
-                self.__indexes[section] = (match.start('content'),
-                                           match.end('content'))
+        # a single scan for the section headers; a section ends at the next
+        # header line (one matching section_regex, e.g. "::data:::::")
+        txt = self.__txt
+        matches = list(section_regex.finditer(txt))
+        for match, next_match in zip(matches, matches[1:] + [None]):
+            section = match.group(1).decode('ascii').lower()
+            if section not in self.__sections or section in self.__indexes:
+                continue
+            start = match.end()
+            end = len(txt) if next_match is None else next_match.start()
+            while start < end and six.indexbytes(txt, start) in _WHITESPACE:
+                start += 1
+            while end > start and six.indexbytes(txt, end - 1) in _WHITESPACE:
+                end -= 1
+            self.__indexes[section] = (start, end)
 
     def __parse_console_section(self):
         if self.console is None:
@@ -136,9 +193,18 @@ class SimbadResult(object):
                           (error.line, error.msg))
 
     def __get_section(self, section_name):
+        view = self.section_view(section_name)
+        if view is not None:
+            return view.tobytes().decode('utf-8', 'replace')
+
+    def section_view(self, section_name):
+        """
+        The content of a section as a `memoryview` of the response, or
+        `None` if the section is missing.
+        """
         if section_name in self.__indexes:
-            return self.__txt[self.__indexes[section_name][0]:
-                              self.__indexes[section_name][1]].strip()
+            start, end = self.__indexes[section_name]
+            return memoryview(self.__txt)[start:end]
 
     @property
     def script(self):
@@ -156,6 +222,10 @@ class SimbadResult(object):
     def data(self):
         return self.__get_section('data')
 
+    @property
+    def data_view(self):
+        return self.section_view('data')
+
     @property
     def errors(self):
         result = []
@@ -186,7 +256,8 @@ class SimbadVOTableResult(SimbadResult):
     @property
     def table(self):
         if self.__table is None:
-            self.bytes = BytesIO(self.data.encode('utf8'))
+            # parse the data section in place
+            self.bytes = io.BufferedReader(_MemoryviewIO(self.data_view))
             tbl = votable.parse_single_table(self.bytes, pedantic=False)
             self.__table = tbl.to_table()
             self.__table.convert_bytestring_to_unicode()
@@ -201,24 +272,20 @@ class SimbadBibcodeResult(SimbadResult):
     @property
     def table(self):
         bibcode_match = bibcode_regex.search(self.script)
-        splitter = bibcode_match.group(2)
-        ref_list = [splitter + ref for ref in self.data.split(splitter)][1:]
-        max_len = max([len(r) for r in ref_list])
-        table = Table(names=['References'], dtype=['S%i' % max_len])
-        for ref in ref_list:
-            table.add_row([ref])
-        return table
+        splitter = bibcode_match.group(2).encode('utf-8')
+        refs = self.data_view.tobytes().split(splitter)[1:]
+        # a single column, built at once
+        refs = np.char.add(splitter, np.array(refs, dtype=bytes))
+        return Table([refs], names=['References'])
 
 
 class SimbadObjectIDsResult(SimbadResult):
     """Object identifier list Simbad result"""
     @property
     def table(self):
-        max_len = max([len(i) for i in self.data.splitlines()])
-        table = Table(names=['ID'], dtype=['S%i' % max_len])
-        for id in self.data.splitlines():
-            table.add_row([id.strip()])
-        return table
+        ids = np.char.strip(np.array(self.data_view.tobytes().splitlines(),
+                                     dtype=bytes))
+        return Table([ids], names=['ID'])
 
 
 @async_to_sync
@@ -230,9 +297,18 @@ class SimbadClass(BaseQuery):
     you submit more than that, your IP may be temporarily blacklisted
     (http://simbad.u-strasbg.fr/simbad/sim-help?Page=sim-url)
 
+    Queries are therefore throttled to ``RATE_LIMIT`` (6) per second, across
+    all threads and instances.
+
     """
     SIMBAD_URL = 'http://' + conf.server + '/simbad/sim-script'
     TIMEOUT = conf.timeout
+    RATE_LIMIT = 6
+    # queries per script of the bulk queries, number of scripts sent at once,
+    # and number of times lines with transient errors are sent again
+    MAX_SCRIPT_LINES = conf.max_script_lines
+    MAX_WORKERS = conf.max_workers
+    SCRIPT_RETRIES = 2
     WILDCARDS = {
         '*': 'Any string of characters (including an empty one)',
         '?': 'Any character (exactly one character)',
@@ -542,12 +618,18 @@ class SimbadClass(BaseQuery):
         return response
 
     def query_objects(self, object_names, wildcard=False, verbose=False,
-                      get_query_payload=False):
+                      get_query_payload=False, cache=True, max_workers=None):
         """
         Queries Simbad for the specified list of objects and returns the
         results as a `~astropy.table.Table`. Object names may be specified
         with wildcards if desired.
 
+        Long lists are split into scripts of at most ``MAX_SCRIPT_LINES``
+        objects, which are sent concurrently; the results are merged in the
+        order of ``object_names``.  Objects whose identification failed for
+        a transient reason (e.g. a timeout) are queried again, up to
+        ``SCRIPT_RETRIES`` times.
+
         Parameters
         ----------
         object_names : sequence of strs
@@ -556,16 +638,30 @@ class SimbadClass(BaseQuery):
             When `True`, the names may have wildcards in them. Defaults to
             `False`.
         get_query_payload : bool, optional
-            When set to `True` the method returns the HTTP request parameters.
-            Defaults to `False`.
+            When set to `True` the method returns the HTTP request parameters
+            of a single script with all the objects.  Defaults to `False`.
+        cache : bool, optional
+            Cache results or use cached results (default: `True`).
+        max_workers : int, optional
+            Maximum number of scripts sent at once.  Defaults to
+            ``conf.max_workers``.
 
         Returns
         -------
         table : `~astropy.table.Table`
-            Query results table
+            Query results table.  Its ``errors`` attribute lists the errors
+            of the objects, with their (1-based) position in
+            ``object_names`` as ``line``.
         """
-        return self.query_object('\n'.join(object_names), wildcard=wildcard,
-                                 get_query_payload=get_query_payload)
+        if get_query_payload:
+            return self.query_object('\n'.join(object_names),
+                                     wildcard=wildcard,
+                                     get_query_payload=get_query_payload)
+        command = 'query id wildcard ' if wildcard else 'query id '
+        return self._query_script_lines(
+            [command + name for name in object_names],
+            one_row_per_line=not wildcard, cache=cache,
+            max_workers=max_workers, verbose=verbose)
 
     def query_objects_async(self, object_names, wildcard=False, cache=True,
                             get_query_payload=False):
@@ -593,6 +689,59 @@ class SimbadClass(BaseQuery):
                                        wildcard=wildcard, cache=cache,
                                        get_query_payload=get_query_payload)
 
+    def query_region(self, coordinates, radius=2*u.arcmin, equinox=2000.0,
+                     epoch='J2000', cache=True, get_query_payload=False,
+                     verbose=False, max_workers=None):
+        """
+        Queries around the given coordinates and returns the result as a
+        `~astropy.table.Table`.
+
+        Many coordinates are split into scripts of at most
+        ``MAX_SCRIPT_LINES`` positions, which are sent concurrently; the
+        results are merged in the order of ``coordinates``.
+
+        Parameters
+        ----------
+        coordinates : str or `astropy.coordinates` object
+            the identifier or coordinates around which to query.
+        radius : str or `~astropy.units.Quantity`, optional
+            the radius of the region. If missing, set to default
+            value of 2 arcmin.  One radius per position is accepted.
+        equinox : float, optional
+            the equinox of the coordinates. If missing set to
+            default 2000.0.
+        epoch : str, optional
+            the epoch of the input coordinates. Must be specified as
+            [J|B] <epoch>. If missing, set to default J2000.
+        cache : bool, optional
+            Cache results or use cached results (default: `True`).
+        get_query_payload : bool, optional
+            When set to `True` the method returns the HTTP request parameters
+            of a single script with all the positions.  Defaults to `False`.
+        max_workers : int, optional
+            Maximum number of scripts sent at once.  Defaults to
+            ``conf.max_workers``.
+
+        Returns
+        -------
+        table : `~astropy.table.Table`
+            Query results table.  Its ``errors`` attribute lists the errors
+            of the positions, with their (1-based) position in
+            ``coordinates`` as ``line``.
+        """
+        query_lines = self._region_query_lines(coordinates, radius, equinox,
+                                               epoch)
+        if get_query_payload or len(query_lines) == 1:
+            response = self.query_region_async(
+                coordinates, radius=radius, equinox=equinox, epoch=epoch,
+                cache=cache, get_query_payload=get_query_payload)
+            if get_query_payload:
+                return response
+            return self._parse_result(response, verbose=verbose)
+        return self._query_script_lines(query_lines, cache=cache,
+                                        max_workers=max_workers,
+                                        verbose=verbose)
+
     def query_region_async(self, coordinates, radius=2*u.arcmin,
                            equinox=2000.0, epoch='J2000', cache=True,
                            get_query_payload=False):
@@ -623,6 +772,33 @@ class SimbadClass(BaseQuery):
              Response of the query from the server.
         """
 
+        query_lines = self._region_query_lines(coordinates, radius, equinox,
+                                               epoch)
+        if len(query_lines) > self.MAX_SCRIPT_LINES:
+            warnings.warn("For very large queries, you may receive a "
+                          "timeout error.  SIMBAD suggests splitting "
+                          "queries with >{0} entries into multiple "
+                          "threads, which `query_region` does "
+                          "automatically".format(self.MAX_SCRIPT_LINES),
+                          LargeQueryWarning)
+
+        header = self._get_query_header()
+        footer = self._get_query_footer()
+        request_payload = {'script': "\n".join([header] + query_lines +
+                                               [footer])}
+
+        if get_query_payload:
+            return request_payload
+
+        response = self._request("POST", self.SIMBAD_URL, data=request_payload,
+                                 timeout=self.TIMEOUT, cache=cache)
+        return response
+
+    def _region_query_lines(self, coordinates, radius=2*u.arcmin,
+                            equinox=2000.0, epoch='J2000'):
+        """
+        The ``query coo`` script lines of a region query, one per position.
+        """
         equinox = validate_equinox(equinox)
         epoch = validate_epoch(epoch)
 
@@ -631,53 +807,29 @@ class SimbadClass(BaseQuery):
         if radius is None:
             radius = 2*u.arcmin
 
-        header = self._get_query_header()
-        footer = self._get_query_footer()
-
         ra, dec, frame = _parse_coordinates(coordinates)
 
         # handle the vector case
         if isinstance(ra, list):
-            vector = True
-
-            if len(ra) > 10000:
-                warnings.warn("For very large queries, you may receive a "
-                              "timeout error.  SIMBAD suggests splitting "
-                              "queries with >10000 entries into multiple "
-                              "threads", LargeQueryWarning)
-
             if len(set(frame)) > 1:
                 raise ValueError("Coordinates have different frames")
             else:
                 frame = set(frame).pop()
 
-            if vector and _has_length(radius) and len(radius) == len(ra):
-                # all good, continue
-                pass
-            elif vector and _has_length(radius) and len(radius) != len(ra):
+            if _has_length(radius) and len(radius) == len(ra):
+                radius = [_parse_radius(rad) for rad in radius]
+            elif _has_length(radius) and len(radius) != len(ra):
                 raise ValueError("Mismatch between radii and coordinates")
-            elif vector and not _has_length(radius):
+            else:
                 radius = [_parse_radius(radius)] * len(ra)
 
-            if vector:
-                query_str = "\n".join([base_query_str
-                                      .format(ra=ra_, dec=dec_, rad=rad_,
-                                              frame=frame, equinox=equinox)
-                                      for ra_, dec_, rad_ in zip(ra, dec, radius)])
+            return [base_query_str.format(ra=ra_, dec=dec_, rad=rad_,
+                                          frame=frame, equinox=equinox)
+                    for ra_, dec_, rad_ in zip(ra, dec, radius)]
 
-        else:
-            radius = _parse_radius(radius)
-            query_str = base_query_str.format(ra=ra, dec=dec, frame=frame,
-                                              rad=radius, equinox=equinox)
-
-        request_payload = {'script': "\n".join([header, query_str, footer])}
-
-        if get_query_payload:
-            return request_payload
-
-        response = self._request("POST", self.SIMBAD_URL, data=request_payload,
-                                 timeout=self.TIMEOUT, cache=cache)
-        return response
+        radius = _parse_radius(radius)
+        return [base_query_str.format(ra=ra, dec=dec, frame=frame,
+                                      rad=radius, equinox=equinox)]
 
     def query_catalog(self, catalog, verbose=False, cache=True,
                       get_query_payload=False):
@@ -911,6 +1063,122 @@ class SimbadClass(BaseQuery):
                                  timeout=self.TIMEOUT, cache=cache)
         return response
 
+    def _query_script_lines(self, lines, one_row_per_line=False, cache=True,
+                            max_workers=None, verbose=False):
+        """
+        Run one script query per element of ``lines`` and merge the results.
+
+        The lines are split into scripts of at most ``MAX_SCRIPT_LINES``
+        lines, of equal sizes, which are sent concurrently (within the rate
+        limit of the class) and parsed as they come.  Lines that raised a
+        transient error are sent again, without the lines that succeeded.
+
+        Rows are returned in the order of ``lines``.  If a line may return
+        several rows (``one_row_per_line=False``), lines sent again are sent
+        one per script so that their rows can be put back in place, but
+        their rows then follow the other rows of their original script.
+        """
+        if max_workers is None:
+            max_workers = self.MAX_WORKERS
+        prefix = []
+        if self.ROW_LIMIT > 0:
+            prefix.append("set limit " + str(self.ROW_LIMIT))
+        prefix.extend(self._get_query_header().split("\n"))
+        footer = self._get_query_footer()
+
+        nscripts = -(-len(lines) // self.MAX_SCRIPT_LINES)
+        scripts = [list(range(len(lines) * i // nscripts,
+                              len(lines) * (i + 1) // nscripts))
+                   for i in range(nscripts)]
+
+        tables, keys, errors = [], [], []
+        for attempt in range(self.SCRIPT_RETRIES + 1):
+            last_attempt = attempt == self.SCRIPT_RETRIES
+            # results of transient errors must not be read from the cache
+            use_cache = cache and attempt == 0
+
+            def request(indices):
+                script = "\n".join(prefix + [lines[i] for i in indices] +
+                                   [footer])
+                return self._request("POST", self.SIMBAD_URL,
+                                     data={'script': script},
+                                     timeout=self.TIMEOUT, cache=use_cache)
+
+            responses = parallel_map(request, scripts, max_workers=max_workers)
+
+            retry = []
+            for indices, response in zip(scripts, responses):
+                self.last_response = response
+                with warnings.catch_warnings():
+                    # the errors are reported once, below
+                    warnings.simplefilter('ignore')
+                    result = SimbadVOTableResult(response.content,
+                                                 verbose=verbose)
+                self.last_parsed_result = result
+
+                failed = set()
+                for error in result.errors:
+                    position = error.line - len(prefix) - 1
+                    if not 0 <= position < len(indices):
+                        # e.g., closing the VOTable
+                        continue
+                    failed.add(position)
+                    if (last_attempt or
+                            permanent_error_regex.search(error.msg)):
+                        errors.append(SimbadError(indices[position] + 1,
+                                                  error.msg))
+                    else:
+                        retry.append(indices[position])
+
+                if result.data_view is None:
+                    if not failed:
+                        # the whole script failed
+                        if last_attempt:
+                            raise TableParseError(
+                                "Failed to parse SIMBAD result! The raw "
+                                "response can be found in self.last_response")
+                        retry.extend(indices)
+                    continue
+                try:
+                    table = result.table
+                except Exception as ex:
+                    self.last_table_parse_error = ex
+                    raise TableParseError("Failed to parse SIMBAD result! "
+                                          "Exception: " + str(ex))
+                succeeded = [index for position, index in enumerate(indices)
+                             if position not in failed]
+                if one_row_per_line and len(table) == len(succeeded):
+                    keys.append(succeeded)
+                else:
+                    keys.append([indices[0]] * len(table))
+                tables.append(table)
+
+            if not retry:
+                break
+            retry.sort()
+            if one_row_per_line:
+                nscripts = -(-len(retry) // self.MAX_SCRIPT_LINES)
+                scripts = [retry[len(retry) * i // nscripts:
+                                 len(retry) * (i + 1) // nscripts]
+                           for i in range(nscripts)]
+            else:
+                scripts = [[index] for index in retry]
+            log.debug("Sending {0} SIMBAD script lines again"
+                      .format(len(retry)))
+
+        tables = [table for table in tables if len(table) > 0]
+        if not tables:
+            return None
+        result_table = vstack(tables, metadata_conflicts='silent')
+        order = np.argsort(np.concatenate(keys).astype(int), kind='mergesort')
+        result_table = result_table[order]
+        result_table.errors = sorted(errors)
+        if errors:
+            warnings.warn("{0} of the {1} queries raised an error (recorded "
+                          "in the `errors` attribute of the result table)"
+                          .format(len(errors), len(lines)))
+        return result_table
+
     def _get_query_header(self, get_raw=False):
         votable_fields = ','.join(self.get_votable_fields())
         # if get_raw is set then don't fetch as votable
@@ -1001,9 +1269,9 @@ class SimbadClass(BaseQuery):
         """
         self.last_response = result
         try:
-            content = result.text
+            content = result.content
             self.last_parsed_result = resultclass(content, verbose=verbose)
-            if self.last_parsed_result.data is None:
+            if self.last_parsed_result.data_view is None:
                 return None
             resulttable = self.last_parsed_result.table
             if len(resulttable) == 0:
@@ -435,3 +435,92 @@ def test_regression_issue388():
                                                simbad.core.SimbadVOTableResult)
     assert parsed_table['MAIN_ID'][0] == b'M   1'
     assert len(parsed_table) == 1
+
+
+def simbad_script_response(script, attempts):
+    """
+    A SIMBAD script result with one row per ``query id`` line, an error for
+    the names starting with 'bad', and a transient error the first time a
+    name starting with 'flaky' is queried.
+    """
+    names, errors = [], []
+    for number, line in enumerate(script.split('\n'), 1):
+        if not line.startswith('query id '):
+            continue
+        name = line[len('query id '):]
+        attempts[name] = attempts.get(name, 0) + 1
+        if name.startswith('bad'):
+            errors.append('[{0}] Identifier not found in the database : {1}'
+                          .format(number, name))
+        elif name.startswith('flaky') and attempts[name] == 1:
+            errors.append('[{0}] java.net.SocketTimeoutException: Read timed '
+                          'out'.format(number))
+        else:
+            names.append(name)
+    votable = six.BytesIO()
+    Table([names or np.array([], dtype=str)],
+          names=['MAIN_ID']).write(votable, format='votable')
+    text = '::script::\n\n{0}\n\n'.format(script)
+    if errors:
+        text += '::error::\n\n{0}\n\n'.format('\n'.join(errors))
+    text += '::data::\n\n' + votable.getvalue().decode('utf-8')
+    return MockResponse(text.encode('utf-8'))
+
+
+def test_query_objects_split(monkeypatch):
+    scripts = []
+    attempts = {}
+
+    def script_request(self, method, url, data, timeout, cache=True,
+                       **kwargs):
+        scripts.append((data['script'], cache))
+        return simbad_script_response(data['script'], attempts)
+
+    monkeypatch.setattr(simbad.SimbadClass, '_request', script_request)
+    sb = simbad.SimbadClass()
+    sb.MAX_SCRIPT_LINES = 4
+    names = ['m{0}'.format(i) for i in range(10)]
+    names[2] = 'bad1'
+    names[5] = 'flaky1'
+    names[8] = 'flaky2'
+    with pytest.warns(UserWarning, match='1 of the 10 queries'):
+        result = sb.query_objects(names, max_workers=2)
+    # 10 lines in 3 scripts, then the two transient failures in one script
+    assert [script.count('query id') for script, cache in scripts] == \
+        [3, 3, 4, 2]
+    assert [cache for script, cache in scripts] == [True] * 3 + [False]
+    assert list(result['MAIN_ID']) == [name for name in names
+                                       if name != 'bad1']
+    assert result.errors == [simbad.core.SimbadError(
+        3, 'Identifier not found in the database : bad1')]
+    assert attempts['bad1'] == 1
+
+
+def test_query_region_split(patch_post):
+    sb = simbad.SimbadClass()
+    sb.MAX_SCRIPT_LINES = 1
+    single = sb.query_region(ICRS_COORDS, radius=0.5 * u.arcsec)
+    result = sb.query_region(multicoords, radius=[0.5, 1] * u.arcsec)
+    assert len(result) == 2 * len(single)
+    payload = sb.query_region(multicoords, radius=[0.5, 1] * u.arcsec,
+                              get_query_payload=True)
+    assert 'radius=0.5s' in payload['script']
+    assert 'radius=1.0s' in payload['script']
+
+
+def test_result_sections():
+    content = (b'::script::::\n\nformat object "%IDLIST"\nquery id m1\n\n'
+               b'::console::::\n\nC.D.S.  -  SIMBAD4 rel 1.207  -  '
+               b'2013.06.28\ntotal execution time: 0.143 secs\n\n'
+               b'::data::::\n\n  M   1  \nNGC  1952\n\n')
+    result = simbad.core.SimbadObjectIDsResult(content)
+    assert result.script == 'format object "%IDLIST"\nquery id m1'
+    assert result.exectime == 0.143
+    assert result.error_raw is None
+    assert result.data_view.tobytes() == b'M   1  \nNGC  1952'
+    table = result.table
+    assert table['ID'].dtype.kind == 'S'
+    assert list(table['ID']) == ['M   1', 'NGC  1952']
+    # text is accepted too
+    assert simbad.core.SimbadObjectIDsResult(
+        content.decode('utf-8')).data == 'M   1  \nNGC  1952'
@@ -28,6 +28,9 @@ class Conf(_config.ConfigNamespace):
     lines_limit = _config.ConfigItem(
         1000,
         'Limit to number of lines exported.')
+    max_workers = _config.ConfigItem(
+        4,
+        'Maximum number of concurrent requests sent by query_lines_chunked.')
 
 
 conf = Conf()
@@ -6,13 +6,20 @@ ftp://ftp.cv.nrao.edu/NRAO-staff/bkent/slap/idl/
 
 :author: Adam Ginsburg <adam.g.ginsburg@gmail.com>
 """
+import collections
+import hashlib
+import math
 import warnings
 import sys
+
+import numpy as np
 from astropy.io import ascii
 from astropy import units as u
 from astropy import log
+from astropy.table import Table, vstack
 from ..query import BaseQuery
 from ..utils import async_to_sync, prepend_docstr_nosections
+from ..utils.parallel import parallel_map
 from . import conf
 from . import load_species_table
 from .utils import clean_column_headings
@@ -34,6 +41,16 @@ class SplatalogueClass(BaseQuery):
     QUERY_URL = conf.query_url
     TIMEOUT = conf.timeout
     LINES_LIMIT = conf.lines_limit
+    MAX_WORKERS = conf.max_workers
+    # query_lines_chunked windows are aligned on a grid of this many MHz
+    # times a power of two, and aim at this fraction of the export limit
+    WINDOW_GRID = 1
+    WINDOW_FILL = 0.5
+    # width of the frequency bins in which line densities are remembered
+    DENSITY_BIN = 1 * u.GHz
+    # `~astroquery.utils.line_store.LineStore` used by `query_lines` and
+    # `query_lines_chunked`; None disables it
+    line_store = None
     versions = ('v1.0', 'v2.0', 'v3.0', 'vall')
     # global constant, not user-configurable
     ALL_LINE_LISTS = ('Lovas', 'SLAIM', 'JPL', 'CDMS', 'ToyoMA', 'OSU',
@@ -73,6 +90,9 @@ class SplatalogueClass(BaseQuery):
         super(SplatalogueClass, self).__init__()
         self.data = self._default_kwargs()
         self.set_default_options(**kwargs)
+        # lines/MHz seen in past chunked queries, per query signature and
+        # frequency bin
+        self._line_densities = {}
 
     def set_default_options(self, **kwargs):
         """
@@ -459,6 +479,66 @@ class SplatalogueClass(BaseQuery):
 
         return response
 
+    @prepend_docstr_nosections("\n" + _parse_kwargs.__doc__)
+    def query_lines(self, min_frequency=None, max_frequency=None,
+                    cache=True, **kwargs):
+        """
+        Queries the service and returns a table object.
+
+        If `line_store` is set, queries over a frequency range are answered
+        from it when the range was covered by an earlier query with the same
+        options, and results below the export limit are added to it.
+
+        Returns
+        -------
+        table : A `~astropy.table.Table` object.
+        """
+        verbose = kwargs.pop('verbose', False)
+        get_query_payload = kwargs.pop('get_query_payload', False)
+        payload = self.query_lines_async(min_frequency, max_frequency,
+                                         get_query_payload=True, **kwargs)
+        if get_query_payload:
+            return payload
+
+        def fetch():
+            response = self.query_lines_async(min_frequency, max_frequency,
+                                              cache=cache, **kwargs)
+            return self._parse_result(response, verbose=verbose)
+
+        if self.line_store is None or 'from' not in payload:
+            self.table = fetch()
+        else:
+            self.table = self._stored_query(payload, fetch,
+                                            limit=payload.get('limit'))
+        return self.table
+
+    def _stored_query(self, payload, fetch, limit=None):
+        """
+        Run ``fetch`` through `line_store` for the frequency range of
+        ``payload``.
+        """
+        options = dict((k, v) for k, v in payload.items()
+                       if k not in ('from', 'to'))
+        return self.line_store.query('Splatalogue', options,
+                                     payload['from'], payload['to'], fetch,
+                                     self._line_frequencies, limit=limit)
+
+    @staticmethod
+    def _line_frequencies(table):
+        """
+        Frequency of each line in GHz: the computed one, or the measured one
+        for lines without a computed frequency.
+        """
+        frequencies = np.ma.masked_all(len(table), dtype=float)
+        for name in ('Meas Freq-GHz(rest frame,redshifted)',
+                     'Freq-GHz(rest frame,redshifted)'):
+            if name in table.colnames:
+                column = np.ma.masked_invalid(np.ma.array(table[name],
+                                                          dtype=float))
+                frequencies = np.ma.where(np.ma.getmaskarray(column),
+                                          frequencies, column)
+        return frequencies
+
     def _parse_result(self, response, verbose=False):
         """
         Parse a response into an `~astropy.table.Table`
@@ -482,6 +562,241 @@ class SplatalogueClass(BaseQuery):
 
         return result
 
+    def query_lines_chunked(self, min_frequency, max_frequency, cache=True,
+                            max_workers=None, **kwargs):
+        """
+        Query a wide frequency range by splitting it into windows that are
+        fetched concurrently and merged into one table.
+
+        Windows are sized from the line densities seen in earlier chunked
+        queries with the same options, so that each is expected to stay well
+        below the export limit, and are aligned on a fixed frequency grid so
+        that the per-request cache is reused by overlapping queries.  A
+        window that hits the export limit is split in two and fetched again.
+        Lines exactly at a window edge, returned by both neighbours, appear
+        only once in the result.  If `line_store` is set, the whole range is
+        answered from it when possible, and the merged result is added to it,
+        except for the windows that hit the export limit.
+
+        Parameters
+        ----------
+        min_frequency : `astropy.units`
+            Minimum frequency (or any spectral() equivalent)
+        max_frequency : `astropy.units`
+            Maximum frequency (or any spectral() equivalent)
+        cache : bool
+            Cache the response of each window.
+        max_workers : int or None
+            Maximum number of concurrent requests.  Defaults to
+            ``conf.max_workers``.
+        kwargs : dict
+            Any other keyword accepted by `query_lines` except ``band``.
+
+        Returns
+        -------
+        table : `~astropy.table.Table`
+            The lines in all windows, in frequency order of the windows.
+        """
+        if kwargs.get('band', 'any') != 'any':
+            raise ValueError("query_lines_chunked requires a frequency "
+                             "range, not a band.")
+        if max_workers is None:
+            max_workers = self.MAX_WORKERS
+
+        payload = self.query_lines_async(min_frequency, max_frequency,
+                                         get_query_payload=True, **kwargs)
+        limit = payload['limit']
+        low, high = payload['from'] * 1e3, payload['to'] * 1e3
+        signature = hashlib.sha224(repr(sorted(
+            (k, v) for k, v in payload.items()
+            if k not in ('from', 'to'))).encode('utf-8')).hexdigest()
+        densities = self._line_densities.setdefault(signature, {})
+
+        def fetch(window):
+            response = self.query_lines_async(window[0] * u.MHz,
+                                              window[1] * u.MHz,
+                                              cache=cache, **kwargs)
+            response.raise_for_status()
+            if not response.text.strip():
+                return window, None
+            return window, self._parse_result(response)
+
+        if self.line_store is None:
+            return self._fetch_windows(fetch, low, high, densities, limit,
+                                       max_workers)
+
+        options = dict((k, v) for k, v in payload.items()
+                       if k not in ('from', 'to'))
+        table = self.line_store.lookup('Splatalogue', options,
+                                       payload['from'], payload['to'])
+        if table is None:
+            truncated = []
+            table = self._fetch_windows(fetch, low, high, densities, limit,
+                                        max_workers, truncated=truncated)
+            self._store_windows(options, payload['from'], payload['to'],
+                                table, [(lo / 1e3, hi / 1e3)
+                                        for lo, hi in truncated])
+        return table
+
+    def _store_windows(self, options, low, high, table, truncated):
+        """
+        Add the lines of [low, high] GHz to `line_store`, except in the
+        ``truncated`` windows, which hit the export limit.
+        """
+        frequencies = self._line_frequencies(table)
+        if not truncated:
+            self.line_store.insert('Splatalogue', options, low, high, table,
+                                   frequencies)
+            return
+        if not np.all(np.isfinite(frequencies.filled(np.nan))):
+            # lines of unknown frequency cannot be assigned to a range
+            return
+
+        ranges = []
+        start = low
+        for lo, hi in sorted(truncated):
+            if lo > start:
+                ranges.append((start, lo))
+            start = max(start, hi)
+        if start < high:
+            ranges.append((start, high))
+        for start, stop in ranges:
+            inside = ((frequencies >= start) & (frequencies <= stop)).filled(
+                False)
+            self.line_store.insert('Splatalogue', options, start, stop,
+                                   table[inside], frequencies[inside])
+
+    def _fetch_windows(self, fetch, low, high, densities, limit,
+                       max_workers, truncated=None):
+        """
+        Fetch [low, high] MHz in windows, splitting those that hit the
+        export limit, and merge the results.  The windows that still hit
+        the limit are appended to ``truncated``, if given.
+        """
+        windows = self._plan_windows(low, high, densities, limit)
+        tables = {}
+        while windows:
+            results = parallel_map(fetch, windows, max_workers=max_workers)
+            windows = []
+            for (lo, hi), table in results:
+                nlines = 0 if table is None else len(table)
+                self._record_density(densities, lo, hi, nlines)
+                if nlines >= limit and hi - lo > 1e-3:
+                    mid = (lo + hi) / 2.
+                    windows.extend([(lo, mid), (mid, hi)])
+                    continue
+                if nlines >= limit:
+                    warnings.warn("Window {0}-{1} MHz returned {2} lines, "
+                                  "the export limit; the result may be "
+                                  "truncated.".format(lo, hi, nlines))
+                    if truncated is not None:
+                        truncated.append((lo, hi))
+                tables[lo] = hi, table
+
+        merged = []
+        below = None
+        for lo in sorted(tables):
+            hi, table = tables[lo]
+            if table is None or len(table) == 0:
+                below = None
+                continue
+            if below is not None and below[0] == lo:
+                # lines at a shared window edge are returned by both windows
+                duplicates = self._edge_duplicates(below[1], table, lo)
+                below = hi, table
+                if duplicates:
+                    table = table.copy()
+                    table.remove_rows(duplicates)
+            else:
+                below = hi, table
+            merged.append(table)
+        tables = [table for table in merged if len(table) > 0]
+        if not tables:
+            return Table()
+        # a column that is empty in one window may have been read with a
+        # different type than in the others
+        for name in tables[0].colnames:
+            kinds = set(tbl[name].dtype.kind for tbl in tables)
+            if len(kinds) > 1 and kinds & set('US'):
+                for tbl in tables:
+                    tbl[name] = tbl[name].astype(str)
+        return vstack(tables, join_type='outer', metadata_conflicts='silent')
+
+    @classmethod
+    def _edge_duplicates(cls, lower, upper, edge):
+        """
+        Indices of the rows of ``upper`` at its lower ``edge`` (MHz) that
+        repeat a row of ``lower``, the window below, at the same edge.  Rows
+        repeated within a window are legitimate and kept.
+        """
+        names = [name for name in lower.colnames if name in upper.colnames]
+
+        def edge_rows(table):
+            frequencies = cls._line_frequencies(table).filled(np.nan) * 1e3
+            indices = np.flatnonzero(np.isclose(frequencies, edge, rtol=0,
+                                                atol=1e-6))
+            return indices, [tuple(str(table[name][index]) for name in names)
+                             for index in indices]
+
+        below = collections.Counter(edge_rows(lower)[1])
+        duplicates = []
+        for index, row in zip(*edge_rows(upper)):
+            if below[row] > 0:
+                below[row] -= 1
+                duplicates.append(index)
+        return duplicates
+
+    def _density_bins(self, low, high):
+        """
+        Range of density bins overlapping [low, high] MHz.
+        """
+        width = self.DENSITY_BIN.to(u.MHz).value
+        return range(int(math.floor(low / width)),
+                     int(math.floor(high / width)) + 1)
+
+    def _record_density(self, densities, low, high, nlines):
+        density = nlines / max(high - low, 1e-3)
+        for key in self._density_bins(low, high):
+            # keep the largest density seen, so that windows stay small
+            # enough even when the lines are clustered
+            if density > densities.get(key, 0):
+                densities[key] = density
+
+    def _plan_windows(self, low, high, densities, limit):
+        """
+        Split [low, high] MHz into windows aligned on the grid, each expected
+        to hold at most ``WINDOW_FILL * limit`` lines according to the
+        recorded ``densities``.  Without any recorded density a window spans
+        at most one density bin.
+        """
+        target = self.WINDOW_FILL * limit
+        bin_width = self.DENSITY_BIN.to(u.MHz).value
+        windows = []
+        start = low
+        while start < high:
+            width = self.WINDOW_GRID
+            end = min((math.floor(start / width) + 1) * width, high)
+            while True:
+                wider = width * 2
+                wider_end = min((math.floor(start / wider) + 1) * wider,
+                                high)
+                bins = self._density_bins(start, wider_end)
+                if any(key not in densities for key in bins):
+                    fits = wider_end - start <= bin_width
+                else:
+                    expected = max(densities[key] for key in bins) * (
+                        wider_end - start)
+                    fits = expected <= target
+                if not fits or end >= high:
+                    break
+                width, end = wider, wider_end
+            windows.append((start, end))
+            start = end
+        if not windows:
+            # min_frequency == max_frequency
+            windows.append((low, high))
+        return windows
+
     def get_fixed_table(self, columns=None):
         """
         Convenience function to get the table with html column names made human
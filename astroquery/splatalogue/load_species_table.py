@@ -1,10 +1,13 @@
 # Licensed under a 3-clause BSD style license - see LICENSE.rst
 import json
-import re
 from .build_species_table import data_path
+from ..utils.lookup_index import IndexedLookuptable, load_lookuptable
 
+# species tables already loaded in this session, by file name
+_lookuptables = {}
 
-class SpeciesLookuptable(dict):
+
+class SpeciesLookuptable(IndexedLookuptable):
 
     def find(self, s, flags=0, return_dict=True,):
         """
@@ -25,10 +28,8 @@ class SpeciesLookuptable(dict):
         corresponding to matches
         """
 
-        R = re.compile(s, flags)
-
-        out = SpeciesLookuptable(dict((k, v) for k, v in self.items()
-                                      if R.search(k)))
+        out = SpeciesLookuptable(dict((k, self[k])
+                                      for k in self.find_keys(s, flags)))
 
         if return_dict:
             return out
@@ -36,11 +37,20 @@ class SpeciesLookuptable(dict):
             return out.values()
 
 
-def species_lookuptable(filename='species.json'):
-    with open(data_path(filename), 'r') as f:
+def _build_species_lookuptable(path):
+    with open(path, 'r') as f:
         J = json.load(f)
 
-    lookuptable = SpeciesLookuptable(dict((v, k) for d in J.values()
-                                          for k, v in d.items()))
+    return SpeciesLookuptable(dict((v, k) for d in J.values()
+                                   for k, v in d.items()))
 
-    return lookuptable
+
+def species_lookuptable(filename='species.json'):
+    """
+    Load the species name -> ID table.  The table and its search index are
+    built once, cached on disk, and shared by all callers in the session.
+    """
+    if filename not in _lookuptables:
+        _lookuptables[filename] = load_lookuptable(
+            data_path(filename), _build_species_lookuptable, 'Splatalogue')
+    return _lookuptables[filename]
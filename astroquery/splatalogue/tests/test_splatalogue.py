@@ -8,6 +8,7 @@ from astropy import units as u
 from astropy.tests.helper import remote_data
 
 from ... import splatalogue
+from ...utils.line_store import LineStore
 from ...utils.testing_tools import MockResponse
 
 SPLAT_DATA = 'CO_colons.csv'
@@ -164,3 +165,152 @@ def test_exclude_remote():
         chemical_name='Formaldehyde',
         exclude='none')
     assert len(results) >= 1
+
+
+def chunked_mockreturn(self, method, url, data=None, timeout=10, files=None,
+                       params=None, headers=None, **kwargs):
+    # one line every MHz between 80 and 120 GHz, truncated at the limit;
+    # the lines every 250 MHz are listed ``copies`` times
+    low, high = data['from'] * 1e3, data['to'] * 1e3
+    freqs = [f for f in range(80000, 120001)
+             for copy in range(chunked_mockreturn.copies if f % 250 == 0
+                               else 1)
+             if low - 1e-6 <= f <= high + 1e-6][:data['limit']]
+    lines = ["Species:Chemical Name:Freq-GHz(rest frame,redshifted):Linelist"]
+    lines += ["X:Unobtainium:{0:.3f}:CDMS".format(f / 1e3) for f in freqs]
+    chunked_mockreturn.calls += 1
+    return MockResponse("\n".join(lines).encode('utf-8'), **kwargs)
+
+
+chunked_mockreturn.copies = 1
+
+
+def test_query_lines_chunked(monkeypatch):
+    monkeypatch.setattr(requests.Session, 'request', chunked_mockreturn)
+    S = splatalogue.SplatalogueClass()
+
+    chunked_mockreturn.calls = 0
+    result = S.query_lines_chunked(99.5 * u.GHz, 100.5 * u.GHz, cache=False,
+                                   export_limit=300, max_workers=4)
+    freqs = list(result['Freq-GHz(rest frame,redshifted)'])
+    # every line once, including those on window edges
+    assert len(freqs) == 1001
+    assert len(set(freqs)) == len(freqs)
+    assert sorted(freqs) == freqs
+    assert chunked_mockreturn.calls > 4
+
+    # the densities learned above size the windows right away, so that none
+    # of them hits the limit and has to be split
+    densities, = S._line_densities.values()
+    windows = S._plan_windows(99500, 100500, densities, 300)
+    assert all(hi - lo <= 150 for lo, hi in windows)
+    chunked_mockreturn.calls = 0
+    result = S.query_lines_chunked(99.5 * u.GHz, 100.5 * u.GHz, cache=False,
+                                   export_limit=300, max_workers=4)
+    assert len(result) == 1001
+    assert chunked_mockreturn.calls == len(windows)
+
+    with pytest.raises(ValueError):
+        S.query_lines_chunked(None, None, band='alma3')
+
+
+@pytest.mark.parametrize('export_limit', (300, 5000))
+def test_query_lines_chunked_duplicates(monkeypatch, export_limit):
+    monkeypatch.setattr(requests.Session, 'request', chunked_mockreturn)
+    monkeypatch.setattr(chunked_mockreturn, 'copies', 2)
+    S = splatalogue.SplatalogueClass()
+    # a window edge on a listed line
+    monkeypatch.setattr(S, '_plan_windows', lambda low, high, densities,
+                        limit: [(low, 100000), (100000, high)])
+
+    result = S.query_lines_chunked(99.5 * u.GHz, 100.5 * u.GHz, cache=False,
+                                   export_limit=export_limit)
+    freqs = list(result['Freq-GHz(rest frame,redshifted)'])
+    # repeated lines are kept, and only the edge lines are merged
+    assert len(freqs) == 1006
+    assert freqs.count(100.) == 2
+    assert freqs.count(99.75) == 2
+    assert sorted(freqs) == freqs
+
+
+def test_plan_windows():
+    S = splatalogue.SplatalogueClass()
+    windows = S._plan_windows(100000.5, 103000, {}, 1000)
+    assert windows[0][0] == 100000.5
+    assert windows[-1][1] == 103000
+    assert all(w1[1] == w2[0] for w1, w2 in zip(windows[:-1], windows[1:]))
+    assert all(hi - lo <= 1000 for lo, hi in windows)
+
+    # 1 line/MHz and a limit of 1000 lines: windows of at most 500 MHz
+    densities = dict((key, 1.) for key in range(90, 110))
+    windows = S._plan_windows(100000, 103000, densities, 1000)
+    assert all(hi - lo <= 500 for lo, hi in windows)
+    assert all(lo % 256 == 0 for lo, hi in windows[1:])
+
+
+def test_line_store(monkeypatch, tmpdir):
+    monkeypatch.setattr(requests.Session, 'request', chunked_mockreturn)
+    S = splatalogue.SplatalogueClass()
+    S.line_store = LineStore(str(tmpdir))
+
+    chunked_mockreturn.calls = 0
+    result = S.query_lines(99.5 * u.GHz, 100.5 * u.GHz, cache=False,
+                           export_limit=2000)
+    assert len(result) == 1001
+    assert chunked_mockreturn.calls == 1
+
+    # sub-ranges of a stored range are answered locally
+    result = S.query_lines(99.8 * u.GHz, 100 * u.GHz, cache=False,
+                           export_limit=2000)
+    assert len(result) == 201
+    result = S.query_lines_chunked(99.6 * u.GHz, 100.4 * u.GHz, cache=False,
+                                   export_limit=2000)
+    assert len(result) == 801
+    assert chunked_mockreturn.calls == 1
+
+    # other options or ranges go to the server; truncated results are not
+    # stored
+    S.query_lines(99.8 * u.GHz, 100 * u.GHz, cache=False, export_limit=100)
+    S.query_lines(99.8 * u.GHz, 100 * u.GHz, cache=False, export_limit=100)
+    S.query_lines(100 * u.GHz, 101 * u.GHz, cache=False, export_limit=2000)
+    assert chunked_mockreturn.calls == 4
+    payload = S.query_lines(99.5 * u.GHz, 101 * u.GHz, export_limit=2000,
+                            get_query_payload=True)
+    options = dict((k, v) for k, v in payload.items()
+                   if k not in ('from', 'to'))
+    assert S.line_store.coverage('Splatalogue', options) == [(99.5, 101.)]
+
+    result = S.query_lines(99.5 * u.GHz, 101 * u.GHz, cache=False,
+                           export_limit=2000)
+    assert len(result) == 1501
+    assert chunked_mockreturn.calls == 4
+
+
+def test_line_store_truncated(monkeypatch, tmpdir):
+    monkeypatch.setattr(requests.Session, 'request', chunked_mockreturn)
+    # more lines at 100 GHz than the export limit
+    monkeypatch.setattr(chunked_mockreturn, 'copies', 5)
+    S = splatalogue.SplatalogueClass()
+    S.line_store = LineStore(str(tmpdir))
+
+    with pytest.warns(UserWarning, match='export limit'):
+        S.query_lines_chunked(99.99 * u.GHz, 100.01 * u.GHz, cache=False,
+                              export_limit=3)
+    payload = S.query_lines(99.99 * u.GHz, 100.01 * u.GHz, export_limit=3,
+                            get_query_payload=True)
+    options = dict((k, v) for k, v in payload.items()
+                   if k not in ('from', 'to'))
+    # only the window around 100 GHz is left out
+    (low, mid1), (mid2, high) = S.line_store.coverage('Splatalogue', options)
+    assert (low, high) == (99.99, 100.01)
+    assert 99.999 < mid1 < 100 < mid2 < 100.001
+
+    chunked_mockreturn.calls = 0
+    result = S.query_lines_chunked(99.99 * u.GHz, 99.995 * u.GHz,
+                                   cache=False, export_limit=3)
+    assert len(result) == 6
+    assert chunked_mockreturn.calls == 0
+    with pytest.warns(UserWarning, match='export limit'):
+        S.query_lines_chunked(99.99 * u.GHz, 100.01 * u.GHz, cache=False,
+                              export_limit=3)
+    assert chunked_mockreturn.calls > 0
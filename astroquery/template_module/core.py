@@ -250,7 +250,7 @@ class TemplateClass(BaseQuery):
         if get_query_payload:
             return readable_objs  # simply return the dict of HTTP request params
         # otherwise return the images as a list of astropy.fits.HDUList
-        return [obj.get_fits() for obj in readable_objs]
+        return commons.get_fits_list(readable_objs)
 
     @prepend_docstr_nosections(get_images.__doc__)
     def get_images_async(self, coordinates, radius, get_query_payload=False):
@@ -9,9 +9,10 @@ import astropy.units as u
 import numpy.testing as npt
 
 from ... import ukidss
+from ...wfau import core as wfau_core
 from ...utils import commons
 from ...utils.testing_tools import MockResponse
-from ...exceptions import InvalidQueryError
+from ...exceptions import InvalidQueryError, TimeoutError
 
 DATA_FILES = {"vo_results": "vo_results.html",
               "image_results": "image_results.html",
@@ -72,8 +73,10 @@ def patch_parse_coordinates(request):
 
 
 def get_mockreturn(method='GET', url='default_url',
-                   params=None, timeout=10, **kwargs):
-    if "Image" in url:
+                   params=None, timeout=10, cache=True, **kwargs):
+    if url.endswith(".xml"):
+        filename = DATA_FILES["votable"]
+    elif "Image" in url:
         filename = DATA_FILES["image_results"]
         url = "Image_URL"
     elif "SQL" in url:
@@ -174,3 +177,39 @@ def test_query_region_async(patch_get):
 def test_check_page_err(patch_get):
     with pytest.raises(InvalidQueryError):
         ukidss.core.Ukidss._check_page("error", "dummy")
+
+
+def test_parse_result_error(monkeypatch):
+    broken = b'<?xml version="1.0"?><VOTABLE><RESOURCE><TABLE>'
+    monkeypatch.setattr(ukidss.Ukidss, '_wfau_get',
+                        lambda url, **kwargs: MockResponse(broken))
+    response = MockResponse(open(data_path(DATA_FILES["vo_results"]),
+                                 "rb").read())
+    with pytest.raises(Exception):
+        ukidss.core.Ukidss._parse_result(response)
+    # the streamed VOTable is kept readable for inspection
+    assert ukidss.core.Ukidss.response == broken.decode('utf-8')
+
+
+def test_check_page_backoff(monkeypatch):
+    pages = [b"running", b"running", b"running", b"done"]
+    waits = []
+    monkeypatch.setattr(ukidss.Ukidss, '_request',
+                        lambda *args, **kwargs: MockResponse(pages.pop(0)))
+    monkeypatch.setattr(wfau_core.time, 'sleep', waits.append)
+    response = ukidss.core.Ukidss._check_page("results", "done",
+                                              wait_time=1, max_wait_time=2)
+    assert response.content == b"done"
+    # checked at once, then with growing waits, and not after success
+    assert waits == [1, 1.5, 2]
+
+    pages[:] = [b"running"] * 3
+    with pytest.raises(TimeoutError):
+        ukidss.core.Ukidss._check_page("results", "done", max_attempts=3)
+
+    # given up after 30 s of waiting in total, as with the fixed waits
+    pages[:] = [b"running"] * 30
+    del waits[:]
+    with pytest.raises(TimeoutError):
+        ukidss.core.Ukidss._check_page("results", "done")
+    assert sum(waits) == 30
@@ -3,6 +3,7 @@
 Common functions and classes that are required by all query classes.
 """
 
+import io
 import re
 import warnings
 import os
@@ -23,6 +24,8 @@ from astropy.coordinates import BaseCoordinateFrame
 
 from ..exceptions import TimeoutError
 from .. import version
+from .name_resolve import resolve_name
+from .parallel import parallel_map
 
 
 def ICRSCoordGenerator(*args, **kwargs):
@@ -138,6 +141,9 @@ def parse_coordinates(coordinates):
     object or is a name that is resolvable. Otherwise asserts
     that the argument is an astropy.coordinates object.
 
+    Names are resolved through the shared name cache of
+    `astroquery.utils.name_resolve`.
+
     Parameters
     ----------
     coordinates : str or `astropy.coordinates` object
@@ -172,9 +178,9 @@ def parse_coordinates(coordinates):
                                   "ICRS coordinate provided in degrees.")
 
                 except ValueError:
-                    c = ICRSCoord.from_name(coordinates)
+                    c = resolve_name(coordinates)
             else:
-                c = ICRSCoord.from_name(coordinates)
+                c = resolve_name(coordinates)
 
     elif isinstance(coordinates, CoordClasses):
         if hasattr(coordinates, 'frame'):
@@ -350,6 +356,7 @@ class FileContainer(object):
     def __init__(self, target, **kwargs):
         kwargs.setdefault('cache', True)
         self._target = target
+        self._cache = kwargs['cache']
         self._timeout = kwargs.get('remote_timeout', aud.conf.remote_timeout)
         if (os.path.splitext(target)[1] == '.fits' and not
                 ('encoding' in kwargs and kwargs['encoding'] == 'binary')):
@@ -361,10 +368,16 @@ class FileContainer(object):
         """
         Assuming the contained file is a FITS file, read it
         and return the file parsed as FITS HDUList
-        """
-        filedata = self.get_string()
 
-        self._fits = fits.HDUList.fromstring(filedata)
+        A file downloaded to the cache is opened memory-mapped, so that only
+        its headers are read until the data are accessed.
+        """
+        if not hasattr(self, '_fits'):
+            filename = self._fetch()
+            if filename is not None:
+                self._fits = fits.open(filename, memmap=True)
+            else:
+                self._fits = fits.HDUList.fromstring(self.get_string())
 
         return self._fits
 
@@ -412,15 +425,26 @@ class FileContainer(object):
         else:
             shutil.copy(target, savepath)
 
-    def get_string(self):
+    def _fetch(self):
         """
-        Download the file as a string
+        Download the file, once.
+
+        Returns the name of the file on disk if it stays there (i.e. it is
+        cached and not compressed), and otherwise keeps its content in
+        memory and returns `None`.
         """
-        if not hasattr(self, '_string'):
+        if not hasattr(self, '_filename'):
             try:
                 with self._readable_object as f:
-                    data = f.read()
-                    self._string = data
+                    filename = getattr(f, 'name', None)
+                    if (self._cache and
+                            isinstance(f, (io.FileIO, io.BufferedReader)) and
+                            isinstance(filename, six.string_types) and
+                            os.path.isfile(filename)):
+                        self._filename = filename
+                    else:
+                        self._string = f.read()
+                        self._filename = None
             except URLError as e:
                 if isinstance(e.reason, socket.timeout):
                     raise TimeoutError("Query timed out, time elapsed {t}s".
@@ -428,6 +452,18 @@ class FileContainer(object):
                 else:
                     raise e
 
+        return self._filename
+
+    def get_string(self):
+        """
+        Download the file as a string
+        """
+        if not hasattr(self, '_string'):
+            filename = self._fetch()
+            if filename is not None:
+                with open(filename, 'rb') as f:
+                    self._string = f.read()
+
         return self._string
 
     def get_stringio(self):
@@ -449,6 +485,27 @@ class FileContainer(object):
                     .format(self._target, id(self._readable_object)))
 
 
+def get_fits_list(file_containers, max_workers=4):
+    """
+    Download the files of `FileContainer` objects concurrently and return
+    them parsed as FITS HDULists.
+
+    Parameters
+    ----------
+    file_containers : list of `FileContainer`
+        The files, e.g. as returned by the ``get_images_async`` methods.
+    max_workers : int
+        Maximum number of files downloaded at once.
+
+    Returns
+    -------
+    hdulists : list of `~astropy.io.fits.HDUList`
+        In the order of ``file_containers``.
+    """
+    return parallel_map(lambda obj: obj.get_fits(), file_containers,
+                        max_workers=max_workers)
+
+
 def get_readable_fileobj(*args, **kwargs):
     """
     Overload astropy's get_readable_fileobj so that we can safely monkeypatch
@@ -0,0 +1,74 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+"""
+Small JSON files kept in the astroquery cache directory.
+
+The name resolution cache (`astroquery.utils.name_resolve`) and the response
+times of the VO services (`astroquery.vo_conesearch.vos_catalog`) are plain
+dictionaries saved as JSON.  `read_json` and `write_json` read and replace
+such a file, logging a warning instead of failing a query when the file
+cannot be read or written.
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import json
+import os
+import shutil
+
+from astropy.logger import log
+
+__all__ = ['read_json', 'write_json']
+
+
+def read_json(filename, what='file'):
+    """
+    The dictionary saved in ``filename``, or an empty one if the file is
+    missing or unreadable.
+
+    Parameters
+    ----------
+    filename : str or None
+        Name of the JSON file; `None` for no file.
+    what : str
+        Description of the file for the warning.
+    """
+    if filename is None or not os.path.exists(filename):
+        return {}
+    try:
+        with open(filename, 'r') as f:
+            return json.load(f)
+    except (IOError, ValueError) as ex:
+        log.warning("Could not read the {0} {1}: {2}"
+                    .format(what, filename, ex))
+        return {}
+
+
+def write_json(filename, content, what='file'):
+    """
+    Replace ``filename`` with ``content``.
+
+    The file is written next to its final name and then moved in place, so
+    that other processes never read a partial file.
+
+    Parameters
+    ----------
+    filename : str or None
+        Name of the JSON file; nothing is written if `None`.
+    content : dict
+        The dictionary to save.
+    what : str
+        Description of the file for the warning.
+    """
+    if filename is None:
+        return
+    try:
+        directory = os.path.dirname(filename)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        temporary = '{0}.{1}.tmp'.format(filename, os.getpid())
+        with open(temporary, 'w') as f:
+            json.dump(content, f)
+        shutil.move(temporary, filename)
+    except (IOError, OSError) as ex:
+        log.warning("Could not save the {0} {1}: {2}"
+                    .format(what, filename, ex))
@@ -0,0 +1,258 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+"""
+Local store of spectral line query results.
+
+Line catalog services (`astroquery.splatalogue`, `astroquery.jplspec`,
+`astroquery.hitran`) are queried over frequency ranges.  A `LineStore` keeps
+the lines returned by earlier queries on disk, sorted by frequency, together
+with the frequency intervals they cover.  A later query with the same options
+whose range lies within a covered interval is answered locally with a binary
+search, without going to the network.
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import hashlib
+import os
+import pickle
+import shutil
+import threading
+
+import numpy as np
+from astropy.config import paths
+from astropy.logger import log
+from astropy.table import vstack
+
+__all__ = ['LineStore']
+
+
+def _signature(options):
+    """
+    Stable hash of the query options other than the frequency range.
+    """
+    if isinstance(options, dict):
+        options = options.items()
+    items = sorted((str(k), repr(v)) for k, v in options)
+    return hashlib.sha224(repr(items).encode('utf-8')).hexdigest()
+
+
+def _merge_intervals(intervals):
+    merged = []
+    for low, high in sorted(intervals):
+        if merged and low <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], high))
+        else:
+            merged.append((low, high))
+    return merged
+
+
+class LineStore(object):
+    """
+    On-disk store of spectral lines, indexed by frequency.
+
+    Lines are grouped by service and by query options: only a query with
+    exactly the same options (line lists, species, energy limits...) can be
+    answered from lines stored by an earlier one.  Each group is stored in
+    its own file and loaded into memory on first use.
+
+    Parameters
+    ----------
+    location : str or None
+        Directory of the store.  Defaults to ``LineStore`` in the astroquery
+        cache directory.
+
+    Examples
+    --------
+    Enable the store for a service by setting its ``line_store`` attribute::
+
+        >>> from astroquery.splatalogue import Splatalogue
+        >>> from astroquery.utils.line_store import LineStore
+        >>> Splatalogue.line_store = LineStore()  # doctest: +SKIP
+    """
+
+    def __init__(self, location=None):
+        if location is None:
+            location = os.path.join(paths.get_cache_dir(), 'astroquery',
+                                    'LineStore')
+        self.location = location
+        self._entries = {}
+        self._lock = threading.RLock()
+
+    def _entry_file(self, service, signature):
+        return os.path.join(self.location, service, signature + ".pickle")
+
+    def _entry(self, service, options):
+        signature = _signature(options)
+        key = (service, signature)
+        with self._lock:
+            if key not in self._entries:
+                entry = None
+                filename = self._entry_file(service, signature)
+                if os.path.exists(filename):
+                    with open(filename, "rb") as f:
+                        entry = pickle.load(f)
+                self._entries[key] = entry
+            return key, self._entries[key]
+
+    def coverage(self, service, options):
+        """
+        Frequency intervals covered by the stored lines.
+
+        Parameters
+        ----------
+        service : str
+            Name of the service, e.g. ``'Splatalogue'``.
+        options : dict or list of pairs
+            The query options, without the frequency range.
+
+        Returns
+        -------
+        intervals : list of tuple
+            Sorted, non-overlapping ``(low, high)`` pairs, in the frequency
+            unit used by the service.
+        """
+        _, entry = self._entry(service, options)
+        return [] if entry is None else list(entry['intervals'])
+
+    def lookup(self, service, options, low, high):
+        """
+        Lines with frequencies in ``[low, high]``, or `None` if that range
+        is not fully covered by the store.
+        """
+        _, entry = self._entry(service, options)
+        if entry is None:
+            return None
+        if not any(start <= low and high <= stop
+                   for start, stop in entry['intervals']):
+            return None
+        frequencies = entry['frequencies']
+        first = np.searchsorted(frequencies, low, side='left')
+        last = np.searchsorted(frequencies, high, side='right')
+        log.debug("Answering {0} query {1}-{2} from the line store"
+                  .format(service, low, high))
+        return entry['table'][first:last]
+
+    def insert(self, service, options, low, high, table, frequencies):
+        """
+        Store the complete set of lines in ``[low, high]``.
+
+        Lines already stored in that range are replaced by ``table``.  The
+        caller must only insert complete results, not ones truncated by a
+        server-side line limit.  Tables with rows of unknown frequency are
+        not stored, since they could not be found again.
+
+        Parameters
+        ----------
+        service : str
+            Name of the service.
+        options : dict or list of pairs
+            The query options, without the frequency range.
+        low, high : float
+            The queried frequency range.
+        table : `~astropy.table.Table`
+            The lines returned by the query.
+        frequencies : array-like
+            Frequency of each line of ``table``, in the unit of ``low`` and
+            ``high``.
+        """
+        frequencies = np.asarray(np.ma.filled(frequencies, np.nan),
+                                 dtype=float)
+        if not np.all(np.isfinite(frequencies)):
+            log.debug("Not storing {0} lines with unknown frequencies"
+                      .format(service))
+            return
+
+        order = np.argsort(frequencies, kind='mergesort')
+        table, frequencies = table[order], frequencies[order]
+
+        key, entry = self._entry(service, options)
+        with self._lock:
+            if entry is not None and len(entry['table']) > 0:
+                old = entry['frequencies']
+                keep = (old < low) | (old > high)
+                if len(table) > 0:
+                    tables = [entry['table'][keep], table]
+                    table = vstack(_homogenize(tables), join_type='outer',
+                                   metadata_conflicts='silent')
+                    frequencies = np.concatenate([old[keep], frequencies])
+                    order = np.argsort(frequencies, kind='mergesort')
+                    table, frequencies = table[order], frequencies[order]
+                else:
+                    table, frequencies = entry['table'][keep], old[keep]
+            intervals = [] if entry is None else entry['intervals']
+            entry = {'intervals': _merge_intervals(intervals + [(low, high)]),
+                     'table': table,
+                     'frequencies': frequencies}
+            self._entries[key] = entry
+
+            filename = self._entry_file(*key)
+            if not os.path.exists(os.path.dirname(filename)):
+                os.makedirs(os.path.dirname(filename))
+            with open(filename + ".tmp", "wb") as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            shutil.move(filename + ".tmp", filename)
+
+    def query(self, service, options, low, high, fetch, frequencies,
+              limit=None):
+        """
+        Answer a query from the store if possible, otherwise ``fetch`` it
+        and store the result.
+
+        Parameters
+        ----------
+        service : str
+            Name of the service.
+        options : dict or list of pairs
+            The query options, without the frequency range.
+        low, high : float
+            The queried frequency range.
+        fetch : callable
+            Called without arguments to run the query remotely; returns a
+            `~astropy.table.Table`.
+        frequencies : callable
+            Called with a table, returns the frequency of each line.
+        limit : int or None
+            Server-side limit on the number of lines; results that reach it
+            may be truncated and are not stored.
+
+        Returns
+        -------
+        table : `~astropy.table.Table`
+        """
+        table = self.lookup(service, options, low, high)
+        if table is None:
+            table = fetch()
+            if limit is None or len(table) < limit:
+                self.insert(service, options, low, high, table,
+                            frequencies(table))
+        return table
+
+    def clear(self, service=None):
+        """
+        Remove the stored lines of one service, or of all services.
+        """
+        with self._lock:
+            path = self.location
+            if service is not None:
+                path = os.path.join(path, service)
+            self._entries = dict((key, value) for key, value
+                                 in self._entries.items()
+                                 if service is not None and
+                                 key[0] != service)
+            if os.path.exists(path):
+                shutil.rmtree(path)
+
+
+def _homogenize(tables):
+    """
+    Cast to str the columns read as text in some tables and as numbers in
+    others, which happens when a column is empty in some of the results.
+    """
+    for name in tables[0].colnames:
+        kinds = set(tbl[name].dtype.kind for tbl in tables
+                    if name in tbl.colnames)
+        if len(kinds) > 1 and kinds & set('US'):
+            for tbl in tables:
+                if name in tbl.colnames:
+                    tbl[name] = tbl[name].astype(str)
+    return tables
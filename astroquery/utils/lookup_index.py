@@ -0,0 +1,249 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+"""
+Search indexes for the name -> ID lookup tables shipped with some services
+(e.g. the `astroquery.splatalogue` and `astroquery.jplspec` species tables).
+
+The lookup tables are searched with regular expressions.  Most searches are
+plain strings such as ``' CO '`` or ``'Formaldehyde'``, which `LookupIndex`
+answers from a trigram or prefix index and only verifies with the regular
+expression on the few candidate keys.  Anything else falls back to a full
+regular expression scan.  Results are memoized per ``(pattern, flags)``.
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import bisect
+import re
+
+from .pickle_cache import cache_directory, file_key, load_or_build
+
+__all__ = ['LookupIndex', 'IndexedLookuptable', 'load_lookuptable']
+
+# characters with a special meaning in a regular expression
+_REGEX_SPECIAL = frozenset('.^$*+?{}[]\\|()')
+# flags that do not change the meaning of a literal pattern; IGNORECASE is
+# handled with the lowercase indexes
+_LITERAL_FLAGS = re.IGNORECASE | re.UNICODE
+# number of memoized search results kept per index
+_MAX_RESULTS = 1024
+
+
+def _parse_literal(pattern):
+    """
+    Split a pattern of the form ``[^]literal[$]`` into its parts, or return
+    `None` if the pattern uses any other regular expression syntax.
+    """
+    anchored_start = pattern.startswith('^')
+    if anchored_start:
+        pattern = pattern[1:]
+    anchored_end = pattern.endswith('$') and not pattern.endswith('\\$')
+    if anchored_end:
+        pattern = pattern[:-1]
+    if _REGEX_SPECIAL.intersection(pattern):
+        return None
+    return anchored_start, pattern, anchored_end
+
+
+def _trigrams(string):
+    return set(string[i:i + 3] for i in range(len(string) - 2))
+
+
+class LookupIndex(object):
+    """
+    Trigram and prefix index over a list of string keys.
+
+    Parameters
+    ----------
+    keys : iterable
+        The keys to index; they are searched through their `str`
+        representation.  Search results are positions in this sequence.
+    """
+
+    def __init__(self, keys):
+        self.keys = list(keys)
+        self._strings = [str(key) for key in self.keys]
+        self._patterns = {}
+        self._results = {}
+
+        self._trigram_index = ({}, {})
+        for case_folded, index in enumerate(self._trigram_index):
+            for position, key in enumerate(self._strings):
+                if case_folded:
+                    key = key.lower()
+                for trigram in _trigrams(key):
+                    index.setdefault(trigram, []).append(position)
+
+        self._prefix_index = []
+        for case_folded in (False, True):
+            folded = [key.lower() if case_folded else key
+                      for key in self._strings]
+            order = sorted(range(len(folded)), key=folded.__getitem__)
+            self._prefix_index.append(([folded[i] for i in order], order))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def compile(self, pattern, flags=0):
+        """
+        Return the compiled regular expression, from the pattern cache.
+        """
+        key = (pattern, flags)
+        if key not in self._patterns:
+            self._patterns[key] = re.compile(pattern, flags)
+        return self._patterns[key]
+
+    def search(self, pattern, flags=0):
+        """
+        Positions of the keys for which ``re.search(pattern, key, flags)``
+        matches, in key order.
+
+        Parameters
+        ----------
+        pattern : str
+            Regular expression.
+        flags : int
+            `re` flags.
+
+        Returns
+        -------
+        positions : tuple of int
+        """
+        key = (pattern, flags)
+        if key not in self._results:
+            if len(self._results) >= _MAX_RESULTS:
+                self._results.clear()
+            regex = self.compile(pattern, flags)
+            candidates = self._candidates(pattern, flags)
+            if candidates is None:
+                candidates = range(len(self._strings))
+            self._results[key] = tuple(i for i in candidates
+                                       if regex.search(self._strings[i]))
+        return self._results[key]
+
+    def _candidates(self, pattern, flags):
+        """
+        Sorted positions of the keys that may match ``pattern``, or `None`
+        if the indexes cannot narrow down the search.
+        """
+        if flags & ~_LITERAL_FLAGS:
+            return None
+        literal = _parse_literal(pattern)
+        if literal is None:
+            return None
+        anchored_start, literal, anchored_end = literal
+        case_folded = bool(flags & re.IGNORECASE)
+        if case_folded:
+            literal = literal.lower()
+
+        if anchored_start:
+            folded, order = self._prefix_index[case_folded]
+            start = bisect.bisect_left(folded, literal)
+            stop = start
+            while stop < len(folded) and folded[stop].startswith(literal):
+                stop += 1
+            return sorted(order[start:stop])
+
+        trigrams = _trigrams(literal)
+        if not trigrams:
+            return None
+        index = self._trigram_index[case_folded]
+        postings = sorted((index.get(trigram, []) for trigram in trigrams),
+                          key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                break
+        return sorted(candidates)
+
+
+class IndexedLookuptable(dict):
+    """
+    A `dict` whose keys can be searched with regular expressions through a
+    `LookupIndex`.  The index is built on first use and dropped whenever the
+    dictionary is modified.
+    """
+
+    _index = None
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = LookupIndex(self.keys())
+        return self._index
+
+    def find_keys(self, s, flags=0):
+        """
+        Keys matching the regular expression ``s``.
+
+        Parameters
+        ----------
+        s : str
+            String to compile as a regular expression
+        flags : int
+            re (regular expression) flags
+
+        Returns
+        -------
+        keys : list
+        """
+        index = self.index
+        return [index.keys[i] for i in index.search(s, flags)]
+
+    def _invalidate(self):
+        self._index = None
+
+    def __setitem__(self, key, value):
+        self._invalidate()
+        super(IndexedLookuptable, self).__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self._invalidate()
+        super(IndexedLookuptable, self).__delitem__(key)
+
+    def clear(self):
+        self._invalidate()
+        super(IndexedLookuptable, self).clear()
+
+    def pop(self, *args):
+        self._invalidate()
+        return super(IndexedLookuptable, self).pop(*args)
+
+    def popitem(self):
+        self._invalidate()
+        return super(IndexedLookuptable, self).popitem()
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self._invalidate()
+        return super(IndexedLookuptable, self).setdefault(key, default)
+
+    def update(self, *args, **kwargs):
+        self._invalidate()
+        super(IndexedLookuptable, self).update(*args, **kwargs)
+
+
+def load_lookuptable(source, builder, cache_name):
+    """
+    Build a lookup table from a data file, reusing a pickled copy (index
+    included) from the astroquery cache while the data file is unchanged.
+
+    Parameters
+    ----------
+    source : str
+        Path of the data file the table is built from.
+    builder : callable
+        Called as ``builder(source)``, returns an `IndexedLookuptable`.
+    cache_name : str
+        Subdirectory of the astroquery cache to store the table in.
+
+    Returns
+    -------
+    lookuptable : `IndexedLookuptable`
+    """
+    def build():
+        lookuptable = builder(source)
+        # build the index now so that it is stored along with the table
+        lookuptable.index
+        return lookuptable
+    return load_or_build(cache_directory(cache_name), file_key(source), build)
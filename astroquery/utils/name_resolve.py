@@ -0,0 +1,339 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+"""
+Shared, persistent cache of object name resolutions.
+
+Query methods accept object names wherever they accept coordinates, and
+resolve them with `astropy.coordinates.SkyCoord.from_name`, a request to
+the CDS Sesame service.  `resolve_name` and `resolve_names` answer from a
+process-wide `NameResolveCache` instead: a name already resolved costs a
+dictionary lookup, and the resolutions are kept on disk (in the astroquery
+cache directory) for ``ttl``, so that they are shared between sessions.
+
+`resolve_names` resolves all the names missing from the cache with a single
+Sesame request.  The cache can be seeded from a local file, e.g. for tests
+that must run offline::
+
+    >>> from astroquery.utils.name_resolve import get_name_cache
+    >>> get_name_cache().seed('names.ecsv')  # doctest: +SKIP
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import atexit
+import os
+import threading
+import time
+from xml.etree import ElementTree
+
+import requests
+import six
+from six.moves.urllib_parse import quote
+import astropy.units as u
+from astropy.config import paths
+from astropy.coordinates import SkyCoord, name_resolve
+from astropy.logger import log
+from astropy.table import Table
+import astropy.utils.data as aud
+
+from .json_store import read_json, write_json
+
+__all__ = ['NameResolveCache', 'get_name_cache', 'resolve_name',
+           'resolve_names']
+
+
+def _key(name):
+    return ' '.join(name.split())
+
+
+_sesame = None
+_sesame_lock = threading.Lock()
+
+
+def _get_sesame():
+    """
+    The query object sending the Sesame requests, with a pooled session and
+    the rate limit of the CDS services.
+    """
+    global _sesame
+    with _sesame_lock:
+        if _sesame is None:
+            # imported here: astroquery.query imports this module
+            from ..query import BaseQuery
+
+            class SesameClass(BaseQuery):
+                RATE_LIMIT = 6
+
+            _sesame = SesameClass()
+    return _sesame
+
+
+def _query_sesame(names):
+    """
+    Resolve many names with one Sesame request.
+
+    Returns a dictionary of (RA, Dec) in degrees by name, without the names
+    Sesame could not resolve.
+    """
+    database = name_resolve.sesame_database.get().upper()[0]
+    query = '&'.join(quote(name) for name in names)
+    sesame = _get_sesame()
+    for url in name_resolve.sesame_url.get():
+        try:
+            response = sesame._request(
+                'GET',
+                '{0}/-oxp/{1}?{2}'.format(url.rstrip('/'), database, query),
+                timeout=aud.conf.remote_timeout, cache=False)
+            response.raise_for_status()
+            root = ElementTree.fromstring(response.content)
+            break
+        except (requests.exceptions.RequestException,
+                ElementTree.ParseError) as ex:
+            log.debug("Sesame query to {0} failed: {1}".format(url, ex))
+    else:
+        return {}
+
+    positions = {}
+    by_key = dict((_key(name), name) for name in names)
+    # one Target per name, in the order of the query; match them by the
+    # name they echo when there is one
+    for name, target in zip(names, root.iter('Target')):
+        echoed = target.find('name')
+        if echoed is not None and echoed.text:
+            name = by_key.get(_key(echoed.text))
+            if name is None:
+                continue
+        ra = target.find('.//jradeg')
+        dec = target.find('.//jdedeg')
+        if ra is not None and dec is not None:
+            positions[name] = (float(ra.text), float(dec.text))
+    return positions
+
+
+class NameResolveCache(object):
+    """
+    A thread-safe cache of name resolutions, optionally kept on disk.
+
+    Parameters
+    ----------
+    filename : str or None
+        JSON file of the cache.  The cache is kept in memory only if
+        `None`.
+    ttl : `~astropy.units.Quantity`
+        Time after which a resolution is made again.
+    """
+
+    def __init__(self, filename=None, ttl=30 * u.day):
+        self.filename = filename
+        self.ttl = u.Quantity(ttl, u.s).value
+        self._lock = threading.RLock()
+        # name -> [ra, dec, time of the resolution (None for seeded names)]
+        self._entries = None
+        # entries not written to the file yet
+        self._unsaved = {}
+        self._coords = {}
+
+    def _load(self):
+        if self._entries is None:
+            self._entries = read_json(self.filename, 'name cache')
+        return self._entries
+
+    def save(self):
+        """
+        Write the resolutions added since the last save to the file of the
+        cache.
+        """
+        with self._lock:
+            if self.filename is None or not self._unsaved:
+                self._unsaved = {}
+                return
+            # keep the names resolved meanwhile by other processes
+            entries = read_json(self.filename, 'name cache')
+            entries.update(self._unsaved)
+            write_json(self.filename, entries, 'name cache')
+            self._unsaved = {}
+
+    def get(self, name):
+        """
+        The cached coordinates of ``name``, or `None`.
+        """
+        key = _key(name)
+        with self._lock:
+            entry = self._load().get(key)
+            if entry is None:
+                return None
+            if entry[2] is not None and time.time() - entry[2] > self.ttl:
+                self._coords.pop(key, None)
+                return None
+            coords = self._coords.get(key)
+            if coords is None:
+                coords = self._coords[key] = SkyCoord(
+                    entry[0], entry[1], unit='deg', frame='icrs')
+            return coords
+
+    def update(self, positions, seeded=False, save=True):
+        """
+        Add resolutions, given as a dictionary of (RA, Dec) in degrees or
+        of `~astropy.coordinates.SkyCoord` by name.
+
+        Resolutions that are not seeded are written to the file of the cache
+        by `save`, at once if ``save`` is `True`; seeded ones only if
+        ``save`` is `True`.
+        """
+        now = None if seeded else time.time()
+        new_entries = {}
+        for name, position in positions.items():
+            if isinstance(position, SkyCoord):
+                position = position.icrs
+                position = (position.ra.deg, position.dec.deg)
+            new_entries[_key(name)] = [float(position[0]),
+                                       float(position[1]), now]
+        with self._lock:
+            self._load().update(new_entries)
+            for key in new_entries:
+                self._coords.pop(key, None)
+            if save or not seeded:
+                self._unsaved.update(new_entries)
+            if save:
+                self.save()
+
+    def seed(self, source, save=False):
+        """
+        Add resolutions that never expire.
+
+        Parameters
+        ----------
+        source : str, `~astropy.table.Table` or dict
+            A table, or the name of a file readable by
+            `astropy.table.Table.read`, with the columns ``name``, ``ra``
+            and ``dec`` (in degrees); or a dictionary of positions by name.
+        save : bool
+            Also save the resolutions to the file of the cache.
+        """
+        if isinstance(source, six.string_types):
+            source = Table.read(source, format='ascii')
+        if isinstance(source, Table):
+            source = dict((str(row['name']), (row['ra'], row['dec']))
+                          for row in source)
+        self.update(source, seeded=True, save=save)
+
+    def clear(self):
+        """
+        Empty the cache, and remove its file.
+        """
+        with self._lock:
+            self._entries = {}
+            self._coords = {}
+            self._unsaved = {}
+            if self.filename is not None and os.path.exists(self.filename):
+                os.remove(self.filename)
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_name_cache():
+    """
+    The process-wide `NameResolveCache`, kept in
+    ``NameResolve/names.json`` in the astroquery cache directory.  The names
+    resolved one by one are written to the file at exit.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = NameResolveCache(os.path.join(
+                paths.get_cache_dir(), 'astroquery', 'NameResolve',
+                'names.json'))
+            atexit.register(_default_cache.save)
+    return _default_cache
+
+
+def resolve_name(name, cache=True):
+    """
+    The ICRS coordinates of an object name, from the name cache or Sesame.
+
+    Parameters
+    ----------
+    name : str
+        The name of the object.
+    cache : bool
+        Use and update the name cache (default: `True`).
+
+    Returns
+    -------
+    coordinates : `~astropy.coordinates.SkyCoord`
+
+    Raises
+    ------
+    `~astropy.coordinates.name_resolve.NameResolveError`
+        If the name cannot be resolved.
+    """
+    name_cache = get_name_cache()
+    coords = name_cache.get(name) if cache else None
+    if coords is None:
+        coords = SkyCoord.from_name(name)
+        if cache:
+            # written with the next batch of names, or at exit
+            name_cache.update({name: coords}, save=False)
+    return coords
+
+
+def resolve_names(names, cache=True):
+    """
+    The ICRS coordinates of many object names.
+
+    The names missing from the name cache are resolved with a single Sesame
+    request; names Sesame does not resolve in that request are resolved one
+    by one with `~astropy.coordinates.SkyCoord.from_name`.
+
+    Parameters
+    ----------
+    names : list of str
+        The names of the objects.
+    cache : bool
+        Use and update the name cache (default: `True`).
+
+    Returns
+    -------
+    coordinates : `~astropy.coordinates.SkyCoord`
+        The coordinates, in the order of ``names``.
+
+    Raises
+    ------
+    `~astropy.coordinates.name_resolve.NameResolveError`
+        If some of the names cannot be resolved.
+    """
+    name_cache = get_name_cache()
+    positions = {}
+    missing = []
+    for name in names:
+        if name in positions or name in missing:
+            continue
+        coords = name_cache.get(name) if cache else None
+        if coords is None:
+            missing.append(name)
+        else:
+            positions[name] = (coords.ra.deg, coords.dec.deg)
+
+    if missing:
+        resolved = _query_sesame(missing) if len(missing) > 1 else {}
+        unresolved = []
+        for name in missing:
+            if name not in resolved:
+                try:
+                    coords = SkyCoord.from_name(name)
+                except name_resolve.NameResolveError:
+                    unresolved.append(name)
+                    continue
+                resolved[name] = (coords.ra.deg, coords.dec.deg)
+        if cache:
+            name_cache.update(resolved)
+        positions.update(resolved)
+        if unresolved:
+            raise name_resolve.NameResolveError(
+                "Unable to find coordinates for {0}".format(
+                    ', '.join(repr(name) for name in sorted(unresolved))))
+
+    return SkyCoord([positions[name][0] for name in names],
+                    [positions[name][1] for name in names],
+                    unit='deg', frame='icrs')
@@ -0,0 +1,51 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+"""
+Helpers to run independent requests concurrently in a thread pool.
+
+Thread pools are used rather than processes because the work is dominated
+by network I/O.  Without `concurrent.futures` (Python 2 without the
+``futures`` backport) everything runs serially.
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+HAS_FUTURES = True
+try:
+    # part of the standard library on Python 3, and provided by the
+    # ``futures`` backport on Python 2
+    from concurrent.futures import ThreadPoolExecutor, as_completed  # noqa
+except ImportError:
+    HAS_FUTURES = False
+    ThreadPoolExecutor = as_completed = None
+
+__all__ = ['parallel_map']
+
+
+def parallel_map(function, iterable, max_workers=None):
+    """
+    Apply ``function`` to every item of ``iterable`` in a thread pool.
+
+    Parameters
+    ----------
+    function : callable
+        Called once per item.
+    iterable : iterable
+        The items.
+    max_workers : int or None
+        Maximum number of concurrent calls.  Defaults to the number of items,
+        capped at 8.  ``1`` runs the calls serially in the calling thread.
+
+    Returns
+    -------
+    results : list
+        The return values, in the order of ``iterable``.  The first exception
+        raised by ``function`` is re-raised.
+    """
+    items = list(iterable)
+    if max_workers is None:
+        max_workers = min(8, len(items))
+    if not HAS_FUTURES or max_workers <= 1 or len(items) <= 1:
+        return [function(item) for item in items]
+
+    with ThreadPoolExecutor(max_workers) as executor:
+        return list(executor.map(function, items))
@@ -0,0 +1,99 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+"""
+Objects pickled in the astroquery cache directory.
+
+Some objects are slow to build but rarely change, e.g. the tables parsed
+from the Open Exoplanet Catalogue, the indexed lookup tables of
+`astroquery.utils.lookup_index` or the ALMA query validation schema.
+`load_or_build` keeps a pickled copy of such an object under a key, such as
+the `file_key` of the file it is built from, and only builds it again when
+the key changes or the copy is too old.
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import hashlib
+import os
+import pickle
+import shutil
+import time
+
+from astropy.config import paths
+from astropy.logger import log
+
+__all__ = ['cache_directory', 'file_key', 'load_or_build']
+
+
+def cache_directory(name):
+    """
+    The directory ``name`` of the astroquery cache.
+    """
+    return os.path.join(paths.get_cache_dir(), 'astroquery', name)
+
+
+def file_key(filepath):
+    """
+    A key that changes with the file: its path, size and modification time.
+    """
+    stat = os.stat(filepath)
+    return "{0}{1}{2}".format(os.path.abspath(filepath), stat.st_size,
+                              stat.st_mtime)
+
+
+def load_or_build(directory, key, build, prefix='', max_age=None):
+    """
+    The object pickled in ``directory`` under ``key``, or the result of
+    ``build()``, which is then pickled there.
+
+    Parameters
+    ----------
+    directory : str or None
+        Directory of the pickled objects.  Nothing is cached if `None`.
+    key : str
+        Identifies the object; the pickle file is named after its hash.
+    build : callable
+        Called without arguments to build the object when no valid copy is
+        cached.
+    prefix : str
+        Prefix of the name of the pickle file.
+    max_age : float or None
+        Age in seconds after which the object is built again.  If `None`,
+        the copy is kept as long as the key is unchanged.
+
+    Returns
+    -------
+    obj : object
+        The cached or built object.
+    """
+    if directory is None:
+        return build()
+
+    filename = os.path.join(directory, "{0}{1}.pickle".format(
+        prefix, hashlib.sha224(key.encode('utf-8')).hexdigest()))
+    if (os.path.exists(filename) and
+            (max_age is None or
+             time.time() - os.path.getmtime(filename) < max_age)):
+        try:
+            with open(filename, 'rb') as f:
+                obj = pickle.load(f)
+            log.debug("Retrieving {0}".format(filename))
+            return obj
+        except Exception:
+            # unreadable, e.g. pickled by another Python version: build it
+            # again below
+            pass
+
+    obj = build()
+    try:
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        # written next to its final name, so that other processes never
+        # read a partial file
+        temporary = '{0}.{1}.tmp'.format(filename, os.getpid())
+        with open(temporary, 'wb') as f:
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+        shutil.move(temporary, filename)
+        log.debug("Caching {0}".format(filename))
+    except (IOError, OSError, pickle.PicklingError) as ex:
+        log.warning("Could not cache {0}: {1}".format(filename, ex))
+    return obj
@@ -0,0 +1,148 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+"""
+Per-host request rate limits shared by all the query classes.
+
+Services such as SIMBAD block clients that send more than a few queries per
+second.  A query class declares the limit of its service with the
+``RATE_LIMIT`` attribute (requests per second) of
+`~astroquery.query.BaseQuery`, and every request sent to that host, from any
+thread or instance, first takes a token from the `RateLimiter` of the host.
+
+When the service answers ``429 Too Many Requests`` or ``503 Service
+Unavailable``, the limiter stops sending for the time given in the
+``Retry-After`` header and halves its rate; the rate then grows back to the
+declared limit as requests succeed.
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import threading
+import time
+from email.utils import mktime_tz, parsedate_tz
+
+from six.moves.urllib_parse import urlparse
+
+__all__ = ['RateLimiter', 'get_rate_limiter', 'retry_after']
+
+# status codes of responses asking to slow down
+THROTTLE_STATUS_CODES = (429, 503)
+
+_clock = getattr(time, 'monotonic', time.time)
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+class RateLimiter(object):
+    """
+    A thread-safe token bucket.
+
+    The bucket holds up to ``burst`` tokens and is refilled at ``rate``
+    tokens per second; each request takes one token, and waits for it if
+    the bucket is empty.  Requests are served in the order they ask for a
+    token.
+
+    Parameters
+    ----------
+    rate : float
+        Maximum number of requests per second.
+    burst : int, optional
+        Number of requests that can be sent at once after a pause.
+        Defaults to one second of requests.
+    min_rate : float, optional
+        Lowest rate the limiter slows down to after ``429`` or ``503``
+        responses.  Defaults to a tenth of ``rate``.
+    """
+
+    def __init__(self, rate, burst=None, min_rate=None, clock=_clock,
+                 sleep=time.sleep):
+        self.max_rate = float(rate)
+        self.rate = self.max_rate
+        self.burst = max(1, int(rate) if burst is None else int(burst))
+        self.min_rate = (self.max_rate / 10. if min_rate is None
+                         else float(min_rate))
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        # the time at which the bucket would be full again (the
+        # "theoretical arrival time" of the equivalent cell rate algorithm)
+        self._full_at = clock()
+
+    def reserve(self):
+        """
+        Take a token, and return the time to wait before using it.
+        """
+        with self._lock:
+            now = self._clock()
+            interval = 1. / self.rate
+            full_at = max(self._full_at, now)
+            wait = full_at - (self.burst - 1) * interval - now
+            self._full_at = full_at + interval
+        return max(0., wait)
+
+    def acquire(self):
+        """
+        Wait for a token.
+        """
+        wait = self.reserve()
+        if wait > 0:
+            self._sleep(wait)
+
+    def success(self):
+        """
+        Record a successful request, bringing the rate back up towards the
+        declared limit.
+        """
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20.)
+
+    def back_off(self, delay=None):
+        """
+        Halve the rate and stop sending for ``delay`` seconds (by default,
+        one interval at the new rate).
+        """
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2.)
+            interval = 1. / self.rate
+            if delay is None:
+                delay = interval
+            # the next token is available after the delay, without burst
+            self._full_at = max(self._full_at, self._clock() + delay +
+                                (self.burst - 1) * interval)
+
+
+def get_rate_limiter(url, rate, burst=None):
+    """
+    The `RateLimiter` shared by the requests to the host of ``url``.
+
+    The limiter is created with ``rate`` and ``burst`` by the first request
+    to the host; a lower ``rate`` declared later for the same host takes
+    over.
+    """
+    host = urlparse(url).netloc.lower()
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            limiter = _limiters[host] = RateLimiter(rate, burst=burst)
+        elif rate < limiter.max_rate:
+            limiter.max_rate = float(rate)
+            limiter.rate = min(limiter.rate, limiter.max_rate)
+    return limiter
+
+
+def retry_after(response):
+    """
+    The delay in seconds given by the ``Retry-After`` header of a response
+    (either a number of seconds or an HTTP date), or `None`.
+    """
+    headers = getattr(response, 'headers', None) or {}
+    value = headers.get('Retry-After')
+    if value is None:
+        return None
+    try:
+        return max(0., float(value))
+    except ValueError:
+        date = parsedate_tz(value)
+        if date is None:
+            return None
+        return max(0., mktime_tz(date) - time.time())
@@ -0,0 +1,182 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+"""
+In-memory spatial and range indexes over locally cached tables.
+
+Services such as `astroquery.nasa_exoplanet_archive` and
+`astroquery.exoplanet_orbit_database` download their full catalog once and
+keep it in memory.  `TableIndex` sits on top of such a table and answers cone
+and parameter-range queries without scanning every row.
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import numpy as np
+
+import astropy.units as u
+from astropy import coordinates as coord
+
+from . import commons
+
+__all__ = ['TableIndex']
+
+
+class TableIndex(object):
+    """
+    Sky and sorted-column indexes over an `~astropy.table.Table`.
+
+    The sky index is a declination zone index: the unit vectors of all
+    sources are kept sorted by declination, so a cone query only computes
+    separations for the rows inside the ``dec +/- radius`` band.  Range
+    indexes are built lazily, one argsort per column, the first time a column
+    is used in a predicate; masked and NaN values are left out of the index.
+
+    Parameters
+    ----------
+    table : `~astropy.table.Table` or `~astropy.table.QTable`
+        The table to index.  It is not copied, so the index must be rebuilt
+        if the table is modified.
+    coord_column : str
+        Name of the `~astropy.coordinates.SkyCoord` column used for the sky
+        index.
+    """
+
+    def __init__(self, table, coord_column='sky_coord'):
+        self.table = table
+        self.coord_column = coord_column
+        self._sky_order = None
+        self._sky_dec = None
+        self._sky_xyz = None
+        self._columns = {}
+
+    def _build_sky_index(self):
+        sky_coord = self.table[self.coord_column].icrs
+        dec = sky_coord.dec.to(u.rad).value
+        ra = sky_coord.ra.to(u.rad).value
+        good = np.isfinite(ra) & np.isfinite(dec)
+        rows = np.flatnonzero(good)
+        order = rows[np.argsort(dec[rows], kind='mergesort')]
+        cos_dec = np.cos(dec[order])
+        self._sky_order = order
+        self._sky_dec = dec[order]
+        self._sky_xyz = np.column_stack([cos_dec * np.cos(ra[order]),
+                                         cos_dec * np.sin(ra[order]),
+                                         np.sin(dec[order])])
+
+    def _column_index(self, colname):
+        if colname not in self._columns:
+            column = self.table[colname]
+            unit = getattr(column, 'unit', None)
+            mask = getattr(column, 'mask', None)
+            values = getattr(column, 'unmasked', column)
+            values = np.asarray(getattr(values, 'value', values))
+            good = np.ones(len(values), dtype=bool)
+            if mask is not None:
+                good &= ~np.asarray(mask)
+            if values.dtype.kind in 'fc':
+                good &= np.isfinite(values)
+            rows = np.flatnonzero(good)
+            order = rows[np.argsort(values[rows], kind='mergesort')]
+            self._columns[colname] = (order, values[order], unit)
+        return self._columns[colname]
+
+    def cone(self, coordinates, radius):
+        """
+        Row numbers of the sources within ``radius`` of ``coordinates``.
+
+        Parameters
+        ----------
+        coordinates : str or `astropy.coordinates` object
+            The center of the cone.
+        radius : str or `~astropy.units.Quantity`
+            The radius of the cone.
+
+        Returns
+        -------
+        rows : `~numpy.ndarray`
+            Sorted row numbers into ``table``.
+        """
+        if self._sky_order is None:
+            self._build_sky_index()
+        center = commons.parse_coordinates(coordinates).icrs
+        radius = coord.Angle(radius).to(u.rad).value
+        dec0 = center.dec.to(u.rad).value
+        ra0 = center.ra.to(u.rad).value
+
+        start = np.searchsorted(self._sky_dec, dec0 - radius, side='left')
+        stop = np.searchsorted(self._sky_dec, dec0 + radius, side='right')
+
+        xyz0 = np.array([np.cos(dec0) * np.cos(ra0),
+                         np.cos(dec0) * np.sin(ra0),
+                         np.sin(dec0)])
+        inside = (self._sky_xyz[start:stop].dot(xyz0) >=
+                  np.cos(min(radius, np.pi)))
+        return np.sort(self._sky_order[start:stop][inside])
+
+    def range(self, colname, min=None, max=None):
+        """
+        Row numbers where ``min <= table[colname] <= max``.
+
+        Parameters
+        ----------
+        colname : str
+            Column to filter on.
+        min, max : scalar, `~astropy.units.Quantity` or None
+            Inclusive bounds; `None` leaves that side open.  Quantities are
+            converted to the unit of the column.
+
+        Returns
+        -------
+        rows : `~numpy.ndarray`
+            Sorted row numbers into ``table``.
+        """
+        order, values, unit = self._column_index(colname)
+        lo, hi = 0, len(values)
+        if min is not None:
+            lo = np.searchsorted(values, self._to_column_unit(min, unit),
+                                 side='left')
+        if max is not None:
+            hi = np.searchsorted(values, self._to_column_unit(max, unit),
+                                 side='right')
+        return np.sort(order[lo:hi])
+
+    @staticmethod
+    def _to_column_unit(value, unit):
+        if isinstance(value, u.Quantity):
+            if unit is None:
+                return value.to(u.dimensionless_unscaled).value
+            return value.to(unit).value
+        return value
+
+    def query(self, coordinates=None, radius=None, criteria=None):
+        """
+        Select the rows matching a cone and/or a set of range predicates.
+
+        Parameters
+        ----------
+        coordinates : str or `astropy.coordinates` object, optional
+            Center of a cone search.  Requires ``radius``.
+        radius : str or `~astropy.units.Quantity`, optional
+            Radius of the cone search.
+        criteria : dict, optional
+            Mapping of column name to an inclusive ``(min, max)`` tuple;
+            either bound may be `None`.
+
+        Returns
+        -------
+        table : `~astropy.table.Table`
+            The matching rows, in table order.
+        """
+        rows = None
+        if coordinates is not None:
+            if radius is None:
+                raise ValueError("A radius is required for a cone search.")
+            rows = self.cone(coordinates, radius)
+
+        for colname, (vmin, vmax) in (criteria or {}).items():
+            selected = self.range(colname, vmin, vmax)
+            rows = (selected if rows is None else
+                    np.intersect1d(rows, selected, assume_unique=True))
+
+        if rows is None:
+            return self.table
+        return self.table[rows]
@@ -0,0 +1,201 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+"""
+Extract members of a remote tarball while it downloads.
+
+Archives such as `astroquery.alma` and `astroquery.esasky` deliver data as
+(possibly multi-GB) tarballs of which only a few members are wanted.
+`extract_tar_stream` reads the tarball straight from the HTTP response with
+`tarfile` in stream mode, writes the matching members to disk as they go by
+and skips everything else, so that the tarball itself never lands on disk.
+
+The byte offset of the last completed member is recorded next to the
+extracted files.  If the connection drops, or the extraction is interrupted
+and started again later, the download resumes from that member boundary with
+an HTTP Range request.
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import tarfile
+
+import requests
+import six
+import urllib3
+from astropy.logger import log
+
+__all__ = ['extract_tar_stream']
+
+# errors after which the download is resumed; a truncated body shows up as
+# a tarfile.ReadError
+_STREAM_ERRORS = (requests.exceptions.RequestException,
+                  urllib3.exceptions.HTTPError, tarfile.ReadError, IOError)
+# how often the resume point is saved while skipping members
+_SAVE_EVERY = 100
+
+
+def _padded(size):
+    return (size + tarfile.BLOCKSIZE - 1) // tarfile.BLOCKSIZE * tarfile.BLOCKSIZE
+
+
+class _TarStreamExtractor(object):
+
+    def __init__(self, session, url, match, path, headers=None,
+                 timeout=None, max_retries=3, chunk_size=2**20, send=None,
+                 overwrite=False):
+        self.session = session
+        self.send = send or session.request
+        self.overwrite = overwrite
+        self.url = url
+        self.match = match
+        self.path = path
+        self.headers = headers or {}
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.chunk_size = chunk_size
+        self.state_file = os.path.join(
+            path, ".{0}.tarstream".format(
+                hashlib.sha224(url.encode('utf-8')).hexdigest()))
+        # offset of the first member not handled yet, and the files
+        # extracted before it
+        self.offset = 0
+        self.files = []
+
+    def extract(self):
+        if os.path.exists(self.state_file):
+            with open(self.state_file, 'r') as f:
+                state = json.load(f)
+            self.offset, self.files = state['offset'], state['files']
+            log.info("Resuming extraction of {0} at byte {1}"
+                     .format(self.url, self.offset))
+
+        retries = 0
+        while True:
+            headers = dict(self.headers)
+            if self.offset:
+                headers['Range'] = 'bytes={0}-'.format(self.offset)
+            response = self.send('GET', self.url, headers=headers,
+                                 timeout=self.timeout, stream=True)
+            try:
+                if response.status_code == 416:
+                    # nothing left after the last member but the end marker
+                    break
+                response.raise_for_status()
+                # a server ignoring the Range header sends the whole tarball:
+                # the members already handled are then read through
+                base = self.offset if response.status_code == 206 else 0
+                self._extract_members(response.raw, base)
+                break
+            except _STREAM_ERRORS as ex:
+                if isinstance(ex, requests.HTTPError) or \
+                        retries >= self.max_retries:
+                    raise
+                retries += 1
+                log.warning("Download of {0} interrupted ({1}); resuming at "
+                            "byte {2}".format(self.url, ex, self.offset))
+            finally:
+                response.close()
+
+        if os.path.exists(self.state_file):
+            os.remove(self.state_file)
+        return self.files
+
+    def _extract_members(self, fileobj, base):
+        if hasattr(fileobj, 'decode_content'):
+            fileobj.decode_content = True
+        skipped = 0
+        with tarfile.open(fileobj=fileobj, mode='r|') as tar:
+            for member in tar:
+                end = base + member.offset_data + _padded(member.size)
+                if end <= self.offset:
+                    continue
+                if member.isfile() and self.match(member.name):
+                    self.files.append(self._write(tar, member))
+                    skipped = 0
+                else:
+                    skipped += 1
+                self.offset = end
+                if skipped % _SAVE_EVERY == 0:
+                    self._save_state()
+
+    def _write(self, tar, member):
+        parts = member.name.replace('\\', '/').split('/')
+        if os.path.isabs(member.name) or '..' in parts:
+            raise ValueError("Refusing to extract {0} outside of {1}"
+                             .format(member.name, self.path))
+        filename = os.path.join(self.path, *parts)
+        if (not self.overwrite and os.path.exists(filename) and
+                os.path.getsize(filename) == member.size):
+            log.debug("Found {0} with the expected size".format(filename))
+            return filename
+
+        log.info("Extracting {0} to {1}".format(member.name, self.path))
+        directory = os.path.dirname(filename)
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        source = tar.extractfile(member)
+        with open(filename + '.part', 'wb') as f:
+            shutil.copyfileobj(source, f, self.chunk_size)
+        if os.path.exists(filename):
+            os.remove(filename)
+        os.rename(filename + '.part', filename)
+        return filename
+
+    def _save_state(self):
+        with open(self.state_file, 'w') as f:
+            json.dump({'url': self.url, 'offset': self.offset,
+                       'files': self.files}, f)
+
+
+def extract_tar_stream(session, url, match=None, path='.', headers=None,
+                       timeout=None, max_retries=3, send=None,
+                       overwrite=False):
+    """
+    Download a tarball and extract the matching members as it streams in.
+
+    Only the matching regular files are written to disk; the tarball is not
+    saved.  Members already on disk with the expected size are not written
+    again, unless ``overwrite`` is set.
+
+    Parameters
+    ----------
+    session : `requests.Session`
+        Session used for the (streamed) GET requests.
+    url : str
+        URL of the (uncompressed) tarball.
+    match : str, callable or None
+        Regular expression matched against the member names, or a function
+        of the member name returning True for the members to extract.  All
+        files are extracted if `None`.
+    path : str
+        Directory to extract the members to, keeping their relative paths.
+    headers : dict or None
+        Additional HTTP headers.
+    timeout : int or None
+        Timeout of the requests.
+    max_retries : int
+        Number of times the download is resumed after a connection error.
+    send : callable or None
+        Function sending the requests, with the arguments of
+        `requests.Session.request`, e.g. to go through the rate limiter of a
+        `~astroquery.query.BaseQuery`.  Defaults to ``session.request``.
+    overwrite : bool
+        Write the matching members even if they are already on disk.
+
+    Returns
+    -------
+    files : list
+        The paths of the extracted files.
+    """
+    if match is None:
+        def match(name):
+            return True
+    elif isinstance(match, six.string_types):
+        match = re.compile(match).match
+    return _TarStreamExtractor(session, url, match, path, headers=headers,
+                               timeout=timeout, max_retries=max_retries,
+                               send=send, overwrite=overwrite).extract()
@@ -0,0 +1,56 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+import numpy as np
+from astropy.table import Table
+
+from ..line_store import LineStore
+
+
+def lines(low, high):
+    freqs = np.arange(low, high + 1)
+    return Table([freqs * 1.0, ['L{0}'.format(f) for f in freqs]],
+                 names=('freq', 'name'))
+
+
+def test_line_store(tmpdir):
+    store = LineStore(str(tmpdir))
+    options = {'species': 'CO'}
+    assert store.lookup('Test', options, 10, 20) is None
+
+    store.insert('Test', options, 10, 20, lines(10, 20), lines(10, 20)['freq'])
+    result = store.lookup('Test', options, 12.5, 15)
+    assert list(result['freq']) == [13, 14, 15]
+    assert store.lookup('Test', options, 15, 25) is None
+    assert store.lookup('Test', {'species': 'CS'}, 12, 15) is None
+
+    # adjacent and overlapping ranges are merged; rows in the new range
+    # replace the stored ones
+    table = lines(18, 30)[::-1]
+    store.insert('Test', options, 18, 30, table, table['freq'])
+    assert store.coverage('Test', options) == [(10, 30)]
+    result = store.lookup('Test', options, 10, 30)
+    assert list(result['freq']) == list(range(10, 31))
+
+    # the store is persistent
+    store = LineStore(str(tmpdir))
+    assert len(store.lookup('Test', options, 15, 25)) == 11
+
+    # rows without a frequency cannot be stored
+    frequencies = np.ma.array([1., 2.], mask=[False, True])
+    store.insert('Test', options, 0, 5, lines(1, 2), frequencies)
+    assert store.lookup('Test', options, 0, 5) is None
+
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return lines(40, 49)
+
+    store.query('Test', options, 40, 50, fetch, lambda t: t['freq'], limit=10)
+    store.query('Test', options, 40, 50, fetch, lambda t: t['freq'], limit=10)
+    assert len(calls) == 2
+    store.query('Test', options, 40, 50, fetch, lambda t: t['freq'])
+    store.query('Test', options, 40, 45, fetch, lambda t: t['freq'])
+    assert len(calls) == 3
+
+    store.clear('Test')
+    assert store.coverage('Test', options) == []
@@ -0,0 +1,60 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+import os
+import re
+
+import pytest
+from astropy.config import paths
+
+from ..lookup_index import LookupIndex, IndexedLookuptable, load_lookuptable
+from ..pickle_cache import cache_directory
+from ...splatalogue.load_species_table import species_lookuptable
+
+KEYS = list(species_lookuptable().keys())
+
+
+@pytest.mark.parametrize(('pattern', 'flags'),
+                         [(' CO ', 0),
+                          (' co ', re.IGNORECASE),
+                          ('Formaldehyde', 0),
+                          ('formaldehyde', re.IGNORECASE),
+                          ('^03', 0),
+                          ('^0302', re.IGNORECASE),
+                          ('Glycine$', 0),
+                          ('^07510 H2NCH2COOH - I v=0 - Glycine$', 0),
+                          ('H2C.O', 0),
+                          ('CO', 0),
+                          ('', 0),
+                          ('H2 CO', re.VERBOSE),
+                          ('no such species', 0)])
+def test_search_matches_full_scan(pattern, flags):
+    index = LookupIndex(KEYS)
+    regex = re.compile(pattern, flags)
+    expected = tuple(i for i, key in enumerate(KEYS) if regex.search(key))
+    assert index.search(pattern, flags) == expected
+    # second call is served from the result cache
+    assert index.search(pattern, flags) is index.search(pattern, flags)
+
+
+def test_indexed_lookuptable_invalidation():
+    table = IndexedLookuptable({'CO': 1, 'H2CO': 2})
+    assert sorted(table.find_keys('CO$')) == ['CO', 'H2CO']
+    table['HCO+'] = 3
+    assert sorted(table.find_keys('CO')) == ['CO', 'H2CO', 'HCO+']
+    del table['CO']
+    assert table.find_keys('^CO') == []
+
+
+def test_load_lookuptable(tmpdir):
+    source = tmpdir.join('table.txt')
+    source.write('CO 1\nH2CO 2\n')
+
+    def builder(path):
+        with open(path) as f:
+            return IndexedLookuptable(line.split() for line in f)
+
+    with paths.set_temp_cache(str(tmpdir)):
+        table = load_lookuptable(str(source), builder, 'test_lookup_index')
+        assert len(os.listdir(cache_directory('test_lookup_index'))) == 1
+        cached = load_lookuptable(str(source), builder, 'test_lookup_index')
+    assert cached == table
+    assert cached.find_keys('H2') == ['H2CO']
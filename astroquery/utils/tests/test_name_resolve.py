@@ -0,0 +1,116 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+import types
+
+import numpy as np
+import pytest
+from astropy.coordinates import SkyCoord, name_resolve as astropy_resolve
+
+from .. import commons, name_resolve
+from ..name_resolve import NameResolveCache, resolve_name, resolve_names
+from ..testing_tools import MockResponse
+
+POSITIONS = {'M31': (10.6847083, 41.26875),
+             'M 1': (83.63308, 22.0145)}
+
+SESAME_XML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<Sesame>
+<Target option="A"><name>M31</name>
+<Resolver name="S=Simbad"><jradeg>10.6847083</jradeg>
+<jdedeg>41.26875</jdedeg></Resolver></Target>
+<Target option="A"><name>nothing</name><INFO>*** Nothing found ***</INFO>
+</Target>
+</Sesame>
+"""
+
+
+@pytest.fixture
+def from_name(monkeypatch):
+    calls = []
+
+    def fromname(cls, name):
+        calls.append(name)
+        if ' '.join(name.split()) not in POSITIONS:
+            raise astropy_resolve.NameResolveError(name)
+        ra, dec = POSITIONS[' '.join(name.split())]
+        return SkyCoord(ra, dec, unit='deg', frame='icrs')
+    monkeypatch.setattr(SkyCoord, 'from_name',
+                        types.MethodType(fromname, SkyCoord))
+    return calls
+
+
+def test_resolve_name(from_name):
+    coords = resolve_name('M31')
+    assert resolve_name('M31') is not coords
+    assert resolve_name('  M31 ').ra.deg == coords.ra.deg
+    assert from_name == ['M31']
+    assert commons.parse_coordinates('M31').dec.deg == coords.dec.deg
+    assert from_name == ['M31']
+    resolve_name('M31', cache=False)
+    assert from_name == ['M31', 'M31']
+    with pytest.raises(astropy_resolve.NameResolveError):
+        resolve_name('nothing')
+
+
+def test_persistent_cache(from_name, tmpdir, monkeypatch):
+    filename = tmpdir.join('names.json').strpath
+    cache = NameResolveCache(filename, ttl=1e4)
+    cache.update({'M31': POSITIONS['M31']})
+    assert NameResolveCache(filename).get('M31').ra.deg == 10.6847083
+    assert NameResolveCache(filename).get('M32') is None
+
+    # expired resolutions are not used
+    now = name_resolve.time.time()
+    monkeypatch.setattr(name_resolve.time, 'time', lambda: now + 2e4)
+    assert NameResolveCache(filename, ttl=1e4).get('M31') is None
+    # seeded ones never expire
+    seeds = tmpdir.join('seed.csv')
+    seeds.write('name,ra,dec\nM 31,10.6847083,41.26875\n')
+    cache = NameResolveCache(filename, ttl=1e4)
+    cache.seed(seeds.strpath, save=True)
+    assert cache.get('M 31').dec.deg == 41.26875
+    assert NameResolveCache(filename, ttl=1e4).get('M  31') is not None
+
+
+def test_batched_saves(from_name, tmpdir, monkeypatch):
+    filename = tmpdir.join('names.json').strpath
+    cache = NameResolveCache(filename)
+    monkeypatch.setattr(name_resolve, '_default_cache', cache)
+    written = []
+    write_json = name_resolve.write_json
+    monkeypatch.setattr(name_resolve, 'write_json',
+                        lambda *args: written.append(args[0]) or
+                        write_json(*args))
+
+    # names resolved one by one are kept in memory until saved
+    resolve_name('M31')
+    resolve_name('M 1')
+    assert written == []
+    assert NameResolveCache(filename).get('M31') is None
+    cache.save()
+    cache.save()
+    assert written == [filename]
+    assert NameResolveCache(filename).get('M 1').ra.deg == 83.63308
+
+
+def test_resolve_names(from_name, monkeypatch):
+    queried = []
+
+    def request(method, url, timeout=None, cache=True):
+        queried.append(url)
+        return MockResponse(SESAME_XML)
+    monkeypatch.setattr(name_resolve._get_sesame(), '_request', request)
+
+    coords = resolve_names(['M31', 'M 1', 'M31'])
+    # one Sesame request for both names; 'M 1' is not in its answer
+    assert len(queried) == 1
+    assert queried[0].endswith('/-oxp/A?M31&M%201')
+    assert from_name == ['M 1']
+    np.testing.assert_allclose(coords.ra.deg, [10.6847083, 83.63308,
+                                               10.6847083])
+
+    coords = resolve_names(['M 1', 'M31'])
+    assert len(queried) == 1 and from_name == ['M 1']
+
+    with pytest.raises(astropy_resolve.NameResolveError) as ex:
+        resolve_names(['M31', 'nothing', 'nowhere'])
+    assert "'nothing', 'nowhere'" in str(ex.value)
@@ -0,0 +1,46 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+import os
+
+from .. import pickle_cache
+from ..pickle_cache import file_key, load_or_build
+
+
+def test_load_or_build(tmpdir, monkeypatch):
+    source = tmpdir.join('source.txt')
+    source.write('a')
+    directory = str(tmpdir.join('cache'))
+    built = []
+
+    def build():
+        built.append(source.read())
+        return {'content': source.read()}
+
+    assert load_or_build(directory, file_key(str(source)), build,
+                         prefix='test_') == {'content': 'a'}
+    assert [name.startswith('test_') for name in os.listdir(directory)] == \
+        [True]
+    assert load_or_build(directory, file_key(str(source)), build,
+                         prefix='test_') == {'content': 'a'}
+    assert built == ['a']
+
+    # built again when the file changes...
+    source.write('bc')
+    assert load_or_build(directory, file_key(str(source)), build) == \
+        {'content': 'bc'}
+    # ...or the cached copy is too old or unreadable
+    load_or_build(directory, 'key', build, max_age=10)
+    now = pickle_cache.time.time()
+    monkeypatch.setattr(pickle_cache.time, 'time', lambda: now + 20)
+    load_or_build(directory, 'key', build, max_age=30)
+    assert len(built) == 3
+    load_or_build(directory, 'key', build, max_age=10)
+    assert len(built) == 4
+    for name in os.listdir(directory):
+        with open(os.path.join(directory, name), 'wb') as f:
+            f.write(b'truncated')
+    load_or_build(directory, 'key', build)
+    assert len(built) == 5
+
+    # nothing cached without a directory
+    load_or_build(None, 'key', build)
+    assert len(built) == 6
@@ -0,0 +1,131 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+import threading
+import time
+
+import pytest
+from six.moves import BaseHTTPServer
+
+from ... import query
+from ..parallel import parallel_map
+from ..rate_limit import RateLimiter, get_rate_limiter, retry_after
+from ..testing_tools import MockResponse
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0.
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_rate_limiter():
+    clock = FakeClock()
+    limiter = RateLimiter(5, burst=2, clock=clock, sleep=clock.sleep)
+    for i in range(6):
+        limiter.acquire()
+    # two requests at once, then one every 0.2 s
+    assert clock.now == pytest.approx(0.8)
+
+    # 429 without Retry-After: half the rate, wait one interval
+    limiter.back_off()
+    assert limiter.rate == 2.5
+    limiter.acquire()
+    assert clock.now == pytest.approx(1.2)
+    limiter.back_off(10)
+    limiter.acquire()
+    assert clock.now == pytest.approx(11.2)
+
+    for i in range(100):
+        limiter.success()
+    assert limiter.rate == 5
+    limiter.back_off()
+    limiter.back_off()
+    limiter.back_off()
+    limiter.back_off()
+    assert limiter.rate == 0.5
+
+
+def test_retry_after():
+    assert retry_after(MockResponse(b'', headers={})) is None
+    assert retry_after(MockResponse(b'', headers={'Retry-After': '3'})) == 3
+    date = time.strftime('%a, %d %b %Y %H:%M:%S GMT',
+                         time.gmtime(time.time() + 60))
+    delay = retry_after(MockResponse(b'', headers={'Retry-After': date}))
+    assert 55 < delay <= 60
+
+
+class ThrottledHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """
+    Answer 429 to requests sent less than 1 / ``rate`` s after the previous
+    one.
+    """
+    rate = 20.
+    times = []
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with self.lock:
+            now = time.time()
+            throttled = (len(self.times) > 0 and
+                         now - self.times[-1] < 0.9 / self.rate)
+            if not throttled:
+                self.times.append(now)
+        if throttled:
+            self.send_response(429)
+            self.send_header('Retry-After', '0.1')
+        else:
+            self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def throttled_server():
+    server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), ThrottledHandler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    ThrottledHandler.times = []
+    yield 'http://127.0.0.1:{0}/'.format(server.server_address[1])
+    server.shutdown()
+    server.server_close()
+
+
+class LimitedQuery(query.BaseQuery):
+    RATE_LIMIT = 20
+    RATE_LIMIT_BURST = 1
+
+
+def test_rate_limited_requests(throttled_server, tmpdir):
+    limited = LimitedQuery()
+    limited.cache_location = tmpdir.strpath
+    urls = [throttled_server + str(i) for i in range(10)]
+    responses = parallel_map(
+        lambda url: limited._request('GET', url, cache=False), urls,
+        max_workers=4)
+    assert [response.status_code for response in responses] == [200] * 10
+    assert len(ThrottledHandler.times) == 10
+
+
+def test_rate_adapts(throttled_server, tmpdir):
+    # the service accepts 20 requests/s but the class declares more
+    LimitedQuery.RATE_LIMIT = 200
+    try:
+        limited = LimitedQuery()
+        limited.cache_location = tmpdir.strpath
+        url = throttled_server.replace('127.0.0.1', 'localhost')
+        responses = [limited._request('GET', url + str(i), cache=False)
+                     for i in range(5)]
+    finally:
+        LimitedQuery.RATE_LIMIT = 20
+    assert responses[-1].status_code == 200
+    assert get_rate_limiter(url, 200).rate < 200
@@ -0,0 +1,72 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+import numpy as np
+import pytest
+
+import astropy.units as u
+from astropy.coordinates import SkyCoord
+from astropy.table import MaskedColumn, QTable, Table
+
+from ..table_index import TableIndex
+
+
+@pytest.fixture
+def table():
+    np.random.seed(42)
+    nrows = 2000
+    ra = np.random.uniform(0, 360, nrows)
+    dec = np.degrees(np.arcsin(np.random.uniform(-1, 1, nrows)))
+    period = MaskedColumn(np.random.uniform(0.5, 500, nrows),
+                          mask=np.random.uniform(size=nrows) < 0.1)
+    tbl = Table()
+    tbl['sky_coord'] = SkyCoord(ra=ra * u.deg, dec=dec * u.deg)
+    tbl['period'] = period
+    tbl['period'].unit = u.day
+    tbl['mass'] = np.random.uniform(0, 10, nrows)
+    tbl['mass'].unit = u.M_jup
+    return tbl
+
+
+@pytest.mark.parametrize(('center', 'radius'),
+                         [((10, 20), 5 * u.deg),
+                          ((200, 89), 3 * u.deg),
+                          ((359.5, -30), 10 * u.deg),
+                          ((0, 0), 180 * u.deg)])
+def test_cone_matches_full_scan(table, center, radius):
+    center = SkyCoord(*center, unit='deg')
+    index = TableIndex(table)
+    expected = np.flatnonzero(table['sky_coord'].separation(center) <= radius)
+    np.testing.assert_array_equal(index.cone(center, radius), expected)
+
+
+def test_range_matches_full_scan(table):
+    index = TableIndex(table)
+    period = table['period']
+    expected = np.flatnonzero(~period.mask & (period.data >= 10) &
+                              (period.data <= 20))
+    rows = index.range('period', 10 * u.day, 480 * u.hour)
+    np.testing.assert_array_equal(rows, expected)
+
+    rows = index.range('mass', min=5 * u.M_jup)
+    np.testing.assert_array_equal(
+        rows, np.flatnonzero(table['mass'] >= 5))
+
+    qtable = QTable(table)
+    rows = TableIndex(qtable).range('mass', 5 * u.M_jup, 6000 * u.M_earth)
+    np.testing.assert_array_equal(
+        rows, np.flatnonzero((qtable['mass'] >= 5 * u.M_jup) &
+                             (qtable['mass'] <= 6000 * u.M_earth)))
+
+
+def test_query_combines_predicates(table):
+    index = TableIndex(table)
+    center = SkyCoord(45, 45, unit='deg')
+    result = index.query(center, 30 * u.deg,
+                         criteria={'mass': (2 * u.M_jup, 4 * u.M_jup)})
+    sep = table['sky_coord'].separation(center)
+    mass = table['mass']
+    expected = (sep <= 30 * u.deg) & (mass >= 2) & (mass <= 4)
+    assert len(result) == expected.sum()
+    assert np.all(result['mass'] >= 2)
+
+    with pytest.raises(ValueError):
+        index.query(coordinates=center)
@@ -0,0 +1,105 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+import io
+import os
+import tarfile
+
+import pytest
+import requests
+
+from ..tar_stream import extract_tar_stream
+
+
+def make_tarball():
+    data = io.BytesIO()
+    with tarfile.open(fileobj=data, mode='w') as tf:
+        for ii in range(6):
+            for suffix in ('fits', 'txt'):
+                content = '{0} {1}'.format(ii, suffix).encode('ascii') * 300
+                info = tarfile.TarInfo('dir/member{0}.{1}'.format(ii, suffix))
+                info.size = len(content)
+                tf.addfile(info, io.BytesIO(content))
+    return data.getvalue()
+
+
+class TruncatedBody(io.BytesIO):
+    """
+    Response body dropping the connection after ``limit`` bytes.
+    """
+
+    def __init__(self, data, limit):
+        super(TruncatedBody, self).__init__(data)
+        self.limit = limit
+
+    def read(self, size=-1):
+        if self.tell() >= self.limit:
+            raise requests.exceptions.ConnectionError("connection dropped")
+        if size < 0 or self.tell() + size > self.limit:
+            size = self.limit - self.tell()
+        return super(TruncatedBody, self).read(size)
+
+
+class MockStreamResponse(object):
+    def __init__(self, raw, status_code):
+        self.raw = raw
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class MockSession(object):
+    def __init__(self, data, limits=(), honor_range=True):
+        self.data = data
+        self.limits = list(limits)
+        self.honor_range = honor_range
+        self.ranges = []
+
+    def request(self, method, url, headers=None, **kwargs):
+        start = 0
+        if 'Range' in headers and self.honor_range:
+            start = int(headers['Range'][6:-1])
+        self.ranges.append(headers.get('Range'))
+        body = self.data[start:]
+        limit = self.limits.pop(0) if self.limits else len(body)
+        return MockStreamResponse(TruncatedBody(body, limit),
+                                  206 if start else 200)
+
+
+@pytest.mark.parametrize('honor_range', (True, False))
+def test_extract_tar_stream(tmpdir, honor_range):
+    data = make_tarball()
+    session = MockSession(data, limits=[len(data) // 3, len(data) // 3],
+                          honor_range=honor_range)
+    files = extract_tar_stream(session, 'http://example.org/data.tar',
+                               match=r'.*\.fits$', path=str(tmpdir))
+
+    assert [os.path.basename(fn) for fn in files] == [
+        'member{0}.fits'.format(ii) for ii in range(6)]
+    assert sorted(os.listdir(str(tmpdir.join('dir')))) == sorted(
+        os.path.basename(fn) for fn in files)
+    with open(files[3], 'rb') as f:
+        assert f.read() == b'3 fits' * 300
+    # resumed twice, at member boundaries
+    assert session.ranges[0] is None
+    assert len(session.ranges) == 3
+    offsets = [int(r[6:-1]) for r in session.ranges[1:]]
+    assert all(offset % tarfile.BLOCKSIZE == 0 for offset in offsets)
+    # no resume state is left behind
+    assert not [fn for fn in os.listdir(str(tmpdir)) if fn != 'dir']
+
+
+def test_extract_tar_stream_gives_up(tmpdir):
+    data = make_tarball()
+    session = MockSession(data, limits=[len(data) // 3] * 2)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        extract_tar_stream(session, 'http://example.org/data.tar',
+                           path=str(tmpdir), max_retries=1)
+    # a later call resumes where the first one stopped
+    session = MockSession(data)
+    files = extract_tar_stream(session, 'http://example.org/data.tar',
+                               path=str(tmpdir))
+    assert len(files) == 12
+    assert session.ranges[0] is not None
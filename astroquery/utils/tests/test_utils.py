@@ -461,6 +461,25 @@ def test_filecontainer_get(patch_getreadablefileobj):
     assert isinstance(ff, fits.HDUList)
 
 
+def test_filecontainer_memmap(patch_getreadablefileobj, tmpdir):
+    files = [commons.FileContainer(fitsfilepath, encoding='binary')
+             for i in range(3)]
+    hdulists = commons.get_fits_list(files, max_workers=3)
+    # opened from the download cache, not read in memory
+    assert all(ff._file.memmap for ff in hdulists)
+    assert hdulists[0].filename() != fitsfilepath
+    assert files[0].get_string()[:6] == b'SIMPLE'
+
+
+def test_filecontainer_compressed(tmpdir):
+    # compressed files are read in memory
+    gzipped = tmpdir.join('image.fits.gz').strpath
+    fits.open(fitsfilepath).writeto(gzipped)
+    ff = commons.FileContainer(gzipped, encoding='binary').get_fits()
+    assert ff.filename() is None
+    assert ff[0].header['SIMPLE']
+
+
 @pytest.mark.parametrize(('coordinates', 'expected'),
                          [("5h0m0s 0d0m0s", True),
                           ("m1", False)
@@ -468,3 +487,17 @@ def test_filecontainer_get(patch_getreadablefileobj):
 def test_is_coordinate(coordinates, expected):
     out = commons._is_coordinate(coordinates)
     assert out == expected
+
+
+def test_parallel_map():
+    from ..parallel import parallel_map
+
+    assert parallel_map(lambda x: x ** 2, range(20), max_workers=4) == [
+        x ** 2 for x in range(20)]
+    assert parallel_map(lambda x: x, [], max_workers=4) == []
+
+    def fail(x):
+        raise ValueError(x)
+
+    with pytest.raises(ValueError):
+        parallel_map(fail, range(3))
@@ -45,6 +45,15 @@ class Conf(_config.ConfigNamespace):
         'Maximum number of rows that will be fetched from the result '
         '(set to -1 for unlimited).')
 
+    max_targets = _config.ConfigItem(
+        5000,
+        'Maximum number of positions sent in one region query; longer lists '
+        'are split into several queries.')
+
+    max_workers = _config.ConfigItem(
+        4,
+        'Maximum number of region queries sent to VizieR concurrently.')
+
 
 conf = Conf()
 
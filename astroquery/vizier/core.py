@@ -7,6 +7,7 @@ import json
 import copy
 import re
 
+import numpy as np
 import six
 from six import BytesIO
 import astropy.units as u
@@ -21,8 +22,9 @@ from ..query import BaseQuery
 from ..utils import commons
 from ..utils import async_to_sync
 from ..utils import schema
+from ..utils.parallel import parallel_map
 from . import conf
-from ..exceptions import TableParseError
+from ..exceptions import TableParseError, LargeQueryWarning
 
 
 __all__ = ['Vizier', 'VizierClass']
@@ -44,6 +46,8 @@ class VizierClass(BaseQuery):
     _schema_catalog = schema.Schema(
         schema.Or([_str_schema], _str_schema, None),
         error="catalog must be a list of strings or a single string")
+    MAX_TARGETS = conf.max_targets
+    MAX_WORKERS = conf.max_workers
 
     def __init__(self, columns=["*"], column_filters={}, catalog=None,
                  keywords=None, ucd="", timeout=conf.timeout,
@@ -313,6 +317,107 @@ class VizierClass(BaseQuery):
             data=data_payload, timeout=self.TIMEOUT, cache=cache)
         return response
 
+    def query_region(self, coordinates, radius=None, inner_radius=None,
+                     width=None, height=None, catalog=None,
+                     get_query_payload=False, cache=True,
+                     return_type='votable', verbose=False, max_workers=None):
+        """
+        Queries around the given coordinates and returns the result as a
+        `~astroquery.utils.TableList`.
+
+        Lists of more than ``MAX_TARGETS`` positions are split into queries
+        of equal sizes, which are sent concurrently; their tables are merged
+        per catalog, with the ``_q`` column still indexing the whole list.
+        The row limit applies to each of these queries.
+
+        Parameters
+        ----------
+        coordinates : str, `astropy.coordinates` object, or `~astropy.table.Table`
+            The target around which to search. It may be specified as a
+            string in which case it is resolved using online services or as
+            the appropriate `astropy.coordinates` object. ICRS coordinates
+            may also be entered as a string.  If a table is used, each of
+            its rows will be queried, as long as it contains two columns
+            named ``_RAJ2000`` and ``_DEJ2000`` with proper angular units.
+        radius : convertible to `~astropy.coordinates.Angle`
+            The radius of the circular region to query.
+        inner_radius : convertible to `~astropy.coordinates.Angle`
+            When set in addition to ``radius``, the queried region becomes
+            annular, with outer radius ``radius`` and inner radius
+            ``inner_radius``.
+        width : convertible to `~astropy.coordinates.Angle`
+            The width of the square region to query.
+        height : convertible to `~astropy.coordinates.Angle`
+            When set in addition to ``width``, the queried region becomes
+            rectangular, with the specified ``width`` and ``height``.
+        catalog : str or list, optional
+            The catalog(s) which must be searched for this identifier.
+            If not specified, all matching catalogs will be searched.
+        get_query_payload : bool, optional
+            Return the payload of a single query with all the positions
+            instead of sending it.
+        max_workers : int, optional
+            Maximum number of queries sent at once.  Defaults to
+            ``conf.max_workers``.
+
+        Returns
+        -------
+        table_list : `~astroquery.utils.TableList`
+        """
+        catalog = VizierClass._schema_catalog.validate(catalog)
+        positions, multiple = _target_positions(coordinates)
+        if (get_query_payload or return_type != 'votable' or
+                len(positions) <= self.MAX_TARGETS):
+            data_payload = self._region_payload(
+                positions, multiple, radius, inner_radius, width, height,
+                catalog)
+            if get_query_payload:
+                return data_payload
+            response = self._request(
+                method='POST',
+                url=self._server_to_url(return_type=return_type),
+                data=data_payload, timeout=self.TIMEOUT, cache=cache)
+            result = self._parse_result(response, verbose=verbose)
+            self.table = result
+            return result
+
+        if max_workers is None:
+            max_workers = self.MAX_WORKERS
+        nqueries = -(-len(positions) // self.MAX_TARGETS)
+        bounds = [len(positions) * i // nqueries for i in range(nqueries + 1)]
+
+        def query(i):
+            data_payload = self._region_payload(
+                positions[bounds[i]:bounds[i + 1]], True, radius,
+                inner_radius, width, height, catalog)
+            response = self._request(
+                method='POST', url=self._server_to_url(), data=data_payload,
+                timeout=self.TIMEOUT, cache=cache)
+            return self._parse_result(response, verbose=verbose)
+
+        results = parallel_map(query, range(nqueries),
+                               max_workers=max_workers)
+
+        # merge the tables of each catalog; ``_q`` is the (1-based) index of
+        # the position in its own query
+        table_dict = OrderedDict()
+        for offset, result in zip(bounds, results):
+            if result is None:
+                continue
+            for name, table in zip(result.keys(), result):
+                if '_q' in table.colnames:
+                    table['_q'] = table['_q'].astype(np.int64) + offset
+                table_dict.setdefault(name, []).append(table)
+        for name, tables in table_dict.items():
+            if len(tables) > 1:
+                table_dict[name] = tbl.vstack(tables,
+                                              metadata_conflicts='silent')
+            else:
+                table_dict[name] = tables[0]
+        result = commons.TableList(table_dict)
+        self.table = result
+        return result
+
     def query_region_async(self, coordinates, radius=None, inner_radius=None,
                            width=None, height=None, catalog=None,
                            get_query_payload=False, cache=True,
@@ -352,48 +457,38 @@ class VizierClass(BaseQuery):
 
         """
         catalog = VizierClass._schema_catalog.validate(catalog)
+        positions, multiple = _target_positions(coordinates)
+        if len(positions) > self.MAX_TARGETS:
+            warnings.warn("VizieR may reject queries of more than {0} "
+                          "positions, which `query_region` splits "
+                          "automatically".format(self.MAX_TARGETS),
+                          LargeQueryWarning)
+        data_payload = self._region_payload(positions, multiple, radius,
+                                            inner_radius, width, height,
+                                            catalog)
+
+        if get_query_payload:
+            return data_payload
+
+        response = self._request(
+            method='POST', url=self._server_to_url(return_type=return_type),
+            data=data_payload, timeout=self.TIMEOUT, cache=cache)
+        return response
+
+    def _region_payload(self, positions, multiple, radius=None,
+                        inner_radius=None, width=None, height=None,
+                        catalog=None):
+        """
+        The payload of a region query around ``positions``, the strings
+        made by `_target_positions`.
+        """
         center = {}
         columns = []
-        if isinstance(coordinates, (commons.CoordClasses,) + six.string_types):
-            c = commons.parse_coordinates(coordinates).transform_to('fk5')
-
-            if not c.isscalar:
-                pos_list = []
-                for pos in c:
-                    ra_deg = pos.ra.to_string(unit="deg", decimal=True,
-                                              precision=8)
-                    dec_deg = pos.dec.to_string(unit="deg", decimal=True,
-                                                precision=8, alwayssign=True)
-                    pos_list += ["{}{}".format(ra_deg, dec_deg)]
-                center["-c"] = "<<;" + ";".join(pos_list)
-                columns += ["_q"]  # request a reference to the input table
-            else:
-                ra = c.ra.to_string(unit='deg', decimal=True, precision=8)
-                dec = c.dec.to_string(unit="deg", decimal=True, precision=8,
-                                      alwayssign=True)
-                center["-c"] = "{ra}{dec}".format(ra=ra, dec=dec)
-        elif isinstance(coordinates, tbl.Table):
-            if (("_RAJ2000" in coordinates.keys()) and ("_DEJ2000" in
-                                                        coordinates.keys())):
-                pos_list = []
-                sky_coord = coord.SkyCoord(coordinates["_RAJ2000"],
-                                           coordinates["_DEJ2000"],
-                                           unit=(coordinates["_RAJ2000"].unit,
-                                                 coordinates["_DEJ2000"].unit))
-                for (ra, dec) in zip(sky_coord.ra, sky_coord.dec):
-                    ra_deg = ra.to_string(unit="deg", decimal=True,
-                                          precision=8)
-                    dec_deg = dec.to_string(unit="deg", decimal=True,
-                                            precision=8, alwayssign=True)
-                    pos_list += ["{}{}".format(ra_deg, dec_deg)]
-                center["-c"] = "<<;" + ";".join(pos_list)
-                columns += ["_q"]  # request a reference to the input table
-            else:
-                raise ValueError("Table must contain '_RAJ2000' and "
-                                 "'_DEJ2000' columns!")
+        if multiple:
+            center["-c"] = "<<;" + ";".join(positions)
+            columns += ["_q"]  # request a reference to the input table
         else:
-            raise TypeError("Coordinates must be one of: string, astropy "
-                            "coordinates, or table containing coordinates!")
+            center["-c"] = positions[0]
         # decide whether box or radius
         if radius is not None:
             # is radius a disk or an annulus?
@@ -431,16 +526,8 @@ class VizierClass(BaseQuery):
             raise Exception(
                 "At least one of radius, width/height must be specified")
 
-        data_payload = self._args_to_payload(center=center, columns=columns,
-                                             catalog=catalog)
-
-        if get_query_payload:
-            return data_payload
-
-        response = self._request(
-            method='POST', url=self._server_to_url(return_type=return_type),
-            data=data_payload, timeout=self.TIMEOUT, cache=cache)
-        return response
+        return self._args_to_payload(center=center, columns=columns,
+                                     catalog=catalog)
 
     def query_constraints_async(self, catalog=None, return_type='votable',
                                 cache=True, get_query_payload=False,
@@ -738,6 +825,44 @@ def parse_vizier_votable(data, verbose=False, invalid='warn',
         return commons.TableList(table_dict)
 
 
+def _target_positions(coordinates):
+    """
+    Format the targets of a region query for VizieR.
+
+    Returns
+    -------
+    positions : `~numpy.ndarray`
+        The positions, as strings of decimal FK5 RA and Dec in degrees.
+    multiple : bool
+        Whether a list of positions was given, which VizieR indexes with the
+        ``_q`` column.
+    """
+    if isinstance(coordinates, (commons.CoordClasses,) + six.string_types):
+        c = commons.parse_coordinates(coordinates).transform_to('fk5')
+        multiple = not c.isscalar
+        ra, dec = c.ra, c.dec
+    elif isinstance(coordinates, tbl.Table):
+        if (("_RAJ2000" in coordinates.keys()) and ("_DEJ2000" in
+                                                    coordinates.keys())):
+            sky_coord = coord.SkyCoord(coordinates["_RAJ2000"],
+                                       coordinates["_DEJ2000"],
+                                       unit=(coordinates["_RAJ2000"].unit,
+                                             coordinates["_DEJ2000"].unit))
+            multiple = True
+            ra, dec = sky_coord.ra, sky_coord.dec
+        else:
+            raise ValueError("Table must contain '_RAJ2000' and "
+                             "'_DEJ2000' columns!")
+    else:
+        raise TypeError("Coordinates must be one of: string, astropy "
+                        "coordinates, or table containing coordinates!")
+    # formatted at once, as Angle.to_string(decimal=True, precision=8) would
+    positions = np.char.add(
+        np.char.mod('%.8f', np.atleast_1d(ra.to(u.deg).value)),
+        np.char.mod('%+.8f', np.atleast_1d(dec.to(u.deg).value)))
+    return positions, multiple
+
+
 def _parse_angle(angle):
     """
     Returns the Vizier-formatted units and values for box/radius
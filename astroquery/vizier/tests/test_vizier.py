@@ -5,9 +5,12 @@ from numpy import testing as npt
 import pytest
 from astropy.table import Table
 import astropy.units as u
+from astropy.io import votable
 import six
+from six import BytesIO
 from six.moves import urllib_parse as urlparse
 from ... import vizier
+from ...exceptions import LargeQueryWarning
 from ...utils import commons
 from ...utils.testing_tools import MockResponse
 
@@ -227,3 +230,52 @@ class TestVizierClass:
     def test_column_filters_unicode(self):
         v = vizier.core.Vizier(column_filters={u'Vmag': u'>10'})
         assert len(v.column_filters) == 1
+
+
+def test_target_positions():
+    targets = commons.ICRSCoordGenerator(ra=[299.590, 0.0000000001],
+                                         dec=[35.201, -0.0000000001],
+                                         unit=(u.deg, u.deg)).fk5
+    positions, multiple = vizier.core._target_positions(targets)
+    assert multiple
+    assert list(positions) == [
+        ra.to_string(unit='deg', decimal=True, precision=8) +
+        dec.to_string(unit='deg', decimal=True, precision=8, alwayssign=True)
+        for ra, dec in zip(targets.ra, targets.dec)]
+    positions, multiple = vizier.core._target_positions(targets[0])
+    assert not multiple and len(positions) == 1
+
+
+def test_query_region_split(monkeypatch):
+    payloads = []
+
+    def post(self, method, url, data=None, timeout=10, **kwargs):
+        # one row, indexed by ``_q``, per position of the list (the signs
+        # of the declinations are decoded as spaces)
+        payloads.append(data)
+        datad = dict(urlparse.parse_qsl(d)[0] for d in data.split('\n'))
+        positions = datad['-c'][3:].split(';')
+        table = Table([list(range(1, len(positions) + 1)),
+                       [float(p.split()[0]) for p in positions]],
+                      names=['_q', 'RAJ2000'], dtype=['i2', 'f8'])
+        content = BytesIO()
+        votable.from_table(table).to_xml(content)
+        return MockResponse(content.getvalue())
+    monkeypatch.setattr(requests.Session, 'request', post)
+
+    viz = vizier.core.VizierClass(catalog='II/246')
+    viz.MAX_TARGETS = 3
+    ras = [10. + i for i in range(7)]
+    targets = commons.ICRSCoordGenerator(ra=ras, dec=[1.] * 7,
+                                         unit=(u.deg, u.deg)).fk5
+    with pytest.warns(LargeQueryWarning):
+        payload = viz.query_region_async(targets, radius=1 * u.arcmin,
+                                         get_query_payload=True)
+    assert payload.count(';') == 7
+
+    result = viz.query_region(targets, radius=1 * u.arcmin, max_workers=2)
+    assert sorted(payload.count(';') for payload in payloads) == [2, 2, 3]
+    assert len(result) == 1
+    table = result[0]
+    assert list(table['_q']) == list(range(1, 8))
+    npt.assert_allclose(table['RAJ2000'], targets.ra.deg)
@@ -28,6 +28,16 @@ class Conf(_config.ConfigNamespace):
         'If True, raise an error when the result violates the spec, '
         'otherwise issue warning(s).')
 
+    # Config related to querying several services
+    race = _config.ConfigItem(
+        1,
+        'Number of services queried at once; the first valid result is '
+        'used. 1 queries them one after the other.')
+    hedge_percentile = _config.ConfigItem(
+        90.,
+        'With hedge=True, percentile of the recent response times of a '
+        'service after which the next service is also queried.')
+
 
 conf = Conf()
 
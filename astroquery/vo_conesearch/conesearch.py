@@ -7,7 +7,6 @@ Support VO Simple Cone Search capabilities.
 """
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
-import six
 
 # STDLIB
 import warnings
@@ -88,7 +87,8 @@ class AsyncConeSearch(AsyncBase):
 
 
 def conesearch(center, radius, verb=1, catalog_db=None, pedantic=None,
-               verbose=True, cache=True, timeout=None, query_all=False):
+               verbose=True, cache=True, timeout=None, query_all=False,
+               race=None, hedge=False):
     """
     Perform Cone Search and returns the result of the
     first successful query.
@@ -155,7 +155,7 @@ def conesearch(center, radius, verb=1, catalog_db=None, pedantic=None,
               database (see :ref:`vo-sec-client-vos`).
 
             - Any of the above 3 options combined in a list, in which case
-              they are tried in order.
+              they are tried in order (see ``race`` and ``hedge``).
 
     pedantic : bool or `None`
         When `True`, raise an error when the result violates the spec,
@@ -179,6 +179,18 @@ def conesearch(center, radius, verb=1, catalog_db=None, pedantic=None,
     query_all : bool
         This is used by :func:`search_all`.
 
+    race : int or `None`
+        Number of services queried at once, the fastest ones first
+        (see `~astroquery.vo_conesearch.vos_catalog.ServiceLatencies`);
+        the first valid result is returned. When not provided, uses the
+        configuration setting ``astroquery.vo_conesearch.conf.race``,
+        which defaults to 1: the services are tried in order.
+
+    hedge : bool
+        Also query the next service when one has not answered after
+        the ``astroquery.vo_conesearch.conf.hedge_percentile`` percentile
+        of its recent response times.
+
     Returns
     -------
     obj : `astropy.io.votable.tree.Table`
@@ -193,61 +205,58 @@ def conesearch(center, radius, verb=1, catalog_db=None, pedantic=None,
         If VO service request fails.
 
     """
-    # Not using default ConeSearch instance because the attributes are
-    # tweaked to match user inputs to this function.
-    cs = ConeSearchClass()
-
-    n_timed_out = 0
+    timed_out = []
     service_type = conf.conesearch_dbname
     catalogs = vos_catalog._get_catalogs(
         service_type, catalog_db, cache=cache, verbose=verbose)
-    if query_all:
-        result = {}
-    else:
-        result = None
-
-    if pedantic is not None:
-        cs.PEDANTIC = pedantic
-    if timeout is not None:
-        cs.TIMEOUT = timeout
-
-    for name, catalog in catalogs:
-        if isinstance(catalog, six.string_types):
-            if catalog.startswith('http'):
-                url = catalog
-            else:
-                remote_db = vos_catalog.get_remote_catalog_db(
-                    service_type, cache=cache, verbose=verbose)
-                catalog = remote_db.get_catalog(catalog)
-                url = catalog['url']
-        else:
-            url = catalog['url']
-
+    urls = [vos_catalog._get_catalog_url(service_type, catalog, cache=cache,
+                                         verbose=verbose)
+            for name, catalog in catalogs]
+    if race is None:
+        race = conf.race
+
+    def query(url):
+        # Not using default ConeSearch instance because the attributes are
+        # tweaked to match user inputs to this function.
+        cs = ConeSearchClass()
         cs.URL = url
+        if pedantic is not None:
+            cs.PEDANTIC = pedantic
+        if timeout is not None:
+            cs.TIMEOUT = timeout
 
         if verbose:  # pragma: no cover
             color_print('Trying {0}'.format(url), 'green')
 
-        try:
-            r = cs.query_region(center, radius, verb=verb, cache=cache,
-                                verbose=verbose)
-
-        except Exception as e:
-            err_msg = str(e)
-            vo_warn(W25, (url, err_msg))
-            if not query_all and 'ConnectTimeoutError' in err_msg:
-                n_timed_out += 1
-        else:
-            if query_all:
-                result[r.url] = r
+        return cs.query_region(center, radius, verb=verb, cache=cache,
+                               verbose=verbose)
+
+    def failed(url, e):
+        err_msg = str(e)
+        vo_warn(W25, (url, err_msg))
+        if 'ConnectTimeoutError' in err_msg:
+            timed_out.append(url)
+
+    if query_all:
+        result = {}
+        latencies = vos_catalog.get_service_latencies()
+        for url in urls:
+            try:
+                with latencies.timing(url):
+                    r = query(url)
+            except Exception as e:
+                vo_warn(W25, (url, str(e)))
             else:
-                result = r
-                break
+                result[r.url] = r
+        latencies.save()
+        return result
 
+    result = vos_catalog._call_services(urls, query, race=race, hedge=hedge,
+                                        on_error=failed)
     if result is None:
         err_msg = 'None of the available catalogs returned valid results.'
-        if n_timed_out > 0:
-            err_msg += ' ({0} URL(s) timed out.)'.format(n_timed_out)
+        if len(timed_out) > 0:
+            err_msg += ' ({0} URL(s) timed out.)'.format(len(timed_out))
         raise VOSError(err_msg)
 
     return result
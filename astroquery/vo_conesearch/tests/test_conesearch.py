@@ -263,3 +263,32 @@ def test_validate_coord(c, ans):
     """Valid coordinates should not raise an error."""
     result = _validate_coord(c)
     np.testing.assert_allclose(result, ans)
+
+
+def test_conesearch_race(monkeypatch):
+    latencies = vos_catalog.ServiceLatencies()
+    monkeypatch.setattr(vos_catalog, '_service_latencies', latencies)
+    latencies.record('http://fast?', 0.01)
+    queried = []
+
+    def query_region(self, *args, **kwargs):
+        queried.append(self.URL)
+        if self.URL == 'http://broken?':
+            raise VOSError('down')
+        if self.URL == 'http://slow?':
+            time.sleep(0.5)
+        return self.URL
+    monkeypatch.setattr(conesearch.ConeSearchClass, 'query_region',
+                        query_region)
+
+    urls = ['http://slow?', 'http://broken?', 'http://fast?']
+    # the known fast service and the next one; not the broken one
+    assert conesearch.conesearch(SCS_CENTER, SCS_SR, catalog_db=urls,
+                                 race=2, verbose=False) == 'http://fast?'
+    assert sorted(queried) == ['http://fast?', 'http://slow?']
+    assert latencies.failure_rate('http://fast?') == 0
+
+    with pytest.raises(VOSError):
+        conesearch.conesearch(SCS_CENTER, SCS_SR, verbose=False,
+                              catalog_db=['http://broken?'], hedge=True)
+    assert latencies.failure_rate('http://broken?') == 1
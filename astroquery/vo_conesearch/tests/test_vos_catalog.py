@@ -13,6 +13,8 @@ from __future__ import (absolute_import, division, print_function,
 
 # STDLIB
 import os
+import threading
+import time
 
 # THIRD-PARTY
 import pytest
@@ -24,8 +26,10 @@ from astropy.utils.data import get_pkg_data_filename
 # LOCAL
 from ..exceptions import (VOSError, MissingCatalog, DuplicateCatalogName,
                           DuplicateCatalogURL)
+from .. import vos_catalog
 from ..validator import conf as validator_conf
-from ..vos_catalog import VOSCatalog, VOSDatabase
+from ..vo_async import race_services
+from ..vos_catalog import VOSCatalog, VOSDatabase, ServiceLatencies
 
 __doctest_skip__ = ['*']
 
@@ -207,3 +211,99 @@ def test_db_from_registry():
 
     # Should have over 9k catalogs; Update test if this changes.
     assert len(db) > 9000
+
+
+def test_service_latencies(tmpdir):
+    filename = tmpdir.join('latencies.json').strpath
+    latencies = ServiceLatencies(filename, size=3)
+    for t in (0.4, 0.1, 0.2, 0.3):
+        latencies.record('slow?', t)
+    latencies.record('fast?', 0.1)
+    latencies.record('broken?', 0.01)
+    with pytest.raises(VOSError):
+        with latencies.timing('broken?'):
+            raise VOSError('down')
+    assert latencies.percentile('slow?', 50) == 0.2
+    assert latencies.percentile('new?', 50) is None
+    assert latencies.failure_rate('broken?') == 0.5
+
+    # persisted between sessions, once saved
+    assert not os.path.exists(filename)
+    latencies.save()
+    latencies = ServiceLatencies(filename)
+    assert (latencies.order(['new?', 'broken?', 'slow?', 'fast?']) ==
+            ['fast?', 'slow?', 'new?', 'broken?'])
+
+
+def test_race_services():
+    released = threading.Event()
+    answers = {'a': 'slow', 'b': 'fast', 'c': VOSError('down')}
+
+    def request(url):
+        if url == 'a':
+            released.wait(5)
+        if isinstance(answers[url], Exception):
+            raise answers[url]
+        return answers[url]
+
+    errors = []
+    start = time.time()
+    # the two first services at once; the slow one is abandoned
+    assert race_services(['a', 'c', 'b'], request, race=2,
+                         on_error=lambda url, e: errors.append(url)) == \
+        ('b', 'fast')
+    assert errors == ['c']
+    # one at a time, hedged after 0.1 s
+    assert race_services(['a', 'b'], request,
+                         hedge_after=lambda url: 0.1) == ('b', 'fast')
+    assert time.time() - start < 2
+    released.set()
+    assert race_services(['c'], request) is None
+
+
+def test_race_services_hedges():
+    released = threading.Event()
+    lock = threading.Lock()
+    running = [0, 0]  # now, most at once
+
+    def request(url):
+        with lock:
+            running[0] += 1
+            running[1] = max(running)
+        released.wait(0.5)
+        with lock:
+            running[0] -= 1
+        if url != 'last':
+            raise VOSError('down')
+        return url
+
+    # each query hedged once: never more than twice race at once
+    urls = ['s{0}'.format(i) for i in range(8)] + ['last']
+    assert race_services(urls, request, race=2,
+                         hedge_after=lambda url: 0.01) == ('last', 'last')
+    assert running[1] == 4
+    released.set()
+
+
+def test_call_services_latencies(monkeypatch, tmpdir):
+    latencies = ServiceLatencies(tmpdir.join('latencies.json').strpath)
+    monkeypatch.setattr(vos_catalog, '_service_latencies', latencies)
+    saved = []
+    monkeypatch.setattr(vos_catalog, 'write_json',
+                        lambda *args: saved.append(args[0]))
+
+    def request(url):
+        if url == 'broken?':
+            raise VOSError('down')
+        return url
+
+    # services tried in order: nothing recorded
+    assert vos_catalog._call_services(['broken?', 'fast?'],
+                                      request) == 'fast?'
+    assert latencies.failure_rate('broken?') == 0
+    assert saved == []
+    # raced: recorded, and saved once
+    assert vos_catalog._call_services(['broken?', 'fast?'], request,
+                                      race=2) == 'fast?'
+    assert latencies.failure_rate('broken?') == 1
+    assert saved == [latencies.filename]
@@ -3,16 +3,19 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
+import time
+
 HAS_FUTURES = True
 try:  # pragma: PY3
-    from concurrent.futures import ThreadPoolExecutor
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 except ImportError:
     try:  # pragma: PY2
-        from astropy.utils.compat.futures import ThreadPoolExecutor
+        from astropy.utils.compat.futures import (ThreadPoolExecutor, wait,
+                                                  FIRST_COMPLETED)
     except ImportError:
         HAS_FUTURES = False
 
-__all__ = ['AsyncBase']
+__all__ = ['AsyncBase', 'race_services']
 
 
 class AsyncBase(object):
@@ -87,3 +90,99 @@ class AsyncBase(object):
         finally:
             self.executor.shutdown(wait=False)
         return result
+
+
+def race_services(urls, request, race=1, hedge_after=None, on_error=None):
+    """Query VO services concurrently and return the first valid result.
+
+    Up to ``race`` services are queried at once, in the order of ``urls``;
+    a service that fails is replaced by the next one.  With
+    ``hedge_after``, the next service is also queried when one has not
+    answered in time, each query being hedged at most once, so that at
+    most twice ``race`` services are queried at once.  When a result is
+    found, the queries not started yet are cancelled; those already
+    running cannot be interrupted and go on in the background until they
+    return or reach the timeout of ``request``, and their results are
+    discarded.
+
+    Parameters
+    ----------
+    urls : list of str
+        Access URLs of the services, in order of preference.
+
+    request : function
+        Called with an access URL; returns the result of the service
+        or raises an exception.
+
+    race : int
+        Number of services queried at once.
+
+    hedge_after : function or `None`
+        Called with an access URL; returns the time in seconds after
+        which, if the service has not answered, the next service is
+        queried too, or `None` to wait for the answer.
+
+    on_error : function or `None`
+        Called with the access URL and the exception of each failed
+        service.
+
+    Returns
+    -------
+    url, result : tuple or `None`
+        The access URL and the result of the first service to answer,
+        or `None` if all the services failed.
+
+    """
+    if not HAS_FUTURES:
+        raise ImportError('concurrent.futures library not found')
+
+    pending = list(urls)
+    running = {}  # future -> [url, hedging deadline]
+    # one thread per service queried at once, and one per possible hedge
+    workers = race if hedge_after is None else 2 * race
+    workers = max(min(workers, len(pending)), 1)
+    executor = ThreadPoolExecutor(workers)
+
+    def launch():
+        url = pending.pop(0)
+        delay = hedge_after(url) if hedge_after is not None else None
+        deadline = None if delay is None else time.time() + delay
+        running[executor.submit(request, url)] = [url, deadline]
+
+    try:
+        while pending and len(running) < race:
+            launch()
+        while running:
+            deadlines = [deadline for url, deadline in running.values()
+                         if deadline is not None]
+            if pending and deadlines and len(running) < workers:
+                timeout = max(min(deadlines) - time.time(), 0)
+            else:
+                timeout = None
+            done, not_done = wait(list(running), timeout=timeout,
+                                  return_when=FIRST_COMPLETED)
+            if not done:
+                # hedge each late service once
+                now = time.time()
+                for info in running.values():
+                    if info[1] is not None and info[1] <= now:
+                        info[1] = None
+                launch()
+                continue
+            for future in sorted(done, key=lambda f: urls.index(
+                    running[f][0])):
+                url = running.pop(future)[0]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    if on_error is not None:
+                        on_error(url, e)
+                    continue
+                return url, result
+            while pending and len(running) < race:
+                launch()
+    finally:
+        for future in running:
+            future.cancel()
+        executor.shutdown(wait=False)
+    return None
@@ -13,15 +13,21 @@ from __future__ import (absolute_import, division, print_function,
 import six
 from six.moves import urllib
 
+import contextlib
 import fnmatch
 import json
 import os
 import re
 import socket
+import threading
+import time
 import warnings
 from collections import defaultdict
 from copy import deepcopy
 
+import numpy as np
+
+from astropy.config import paths
 from astropy.io.votable import parse_single_table, table, tree
 from astropy.io.votable.exceptions import vo_raise, vo_warn, E19, W24, W25
 from astropy.utils.console import color_print
@@ -33,12 +39,15 @@ from astropy.utils.xml.unescaper import unescape_all
 
 from .exceptions import (VOSError, MissingCatalog, DuplicateCatalogName,
                          DuplicateCatalogURL, InvalidAccessURL)
+from .vo_async import race_services
+from ..utils.json_store import read_json, write_json
 from ..utils.url_helpers import urljoin_keep_path
 
 # Import configurable items declared in __init__.py
 from . import conf
 
-__all__ = ['VOSBase', 'VOSCatalog', 'VOSDatabase', 'get_remote_catalog_db',
+__all__ = ['VOSBase', 'VOSCatalog', 'VOSDatabase', 'ServiceLatencies',
+           'get_remote_catalog_db', 'get_service_latencies',
            'call_vo_service', 'list_catalogs']
 
 __dbversion__ = 1
@@ -669,6 +678,112 @@ def get_remote_catalog_db(dbname, cache=True, verbose=True):
         encoding='utf8', cache=cache, show_progress=verbose)
 
 
+class ServiceLatencies(object):
+    """Recent response times of VO services, optionally kept on disk.
+
+    They are recorded by :func:`call_vo_service` and
+    :func:`~astroquery.vo_conesearch.conesearch.conesearch` when services
+    are queried concurrently, and order them.
+
+    Parameters
+    ----------
+    filename : str or `None`
+        JSON file of the response times. They are kept in memory only
+        if `None`.
+
+    size : int
+        Number of response times kept per service.
+
+    """
+    def __init__(self, filename=None, size=20):
+        self.filename = filename
+        self.size = size
+        self._lock = threading.RLock()
+        # url -> recent response times in seconds, None for failures
+        self._times = None
+        self._modified = False
+
+    def _load(self):
+        if self._times is None:
+            self._times = read_json(self.filename, 'service response times')
+        return self._times
+
+    def record(self, url, seconds=None):
+        """Record a response time of a service, or a failure if `None`.
+
+        The response times are written to the file by `save`."""
+        with self._lock:
+            times = self._load().setdefault(url, [])
+            times.append(seconds)
+            del times[:-self.size]
+            self._modified = True
+
+    def save(self):
+        """Write the response times recorded since the last save."""
+        with self._lock:
+            if self._modified:
+                write_json(self.filename, self._times,
+                           'service response times')
+                self._modified = False
+
+    @contextlib.contextmanager
+    def timing(self, url):
+        """Record the time taken by the block, or a failure if it raises."""
+        start = time.time()
+        try:
+            yield
+        except Exception:
+            self.record(url)
+            raise
+        self.record(url, time.time() - start)
+
+    def percentile(self, url, q):
+        """The ``q`` percentile of the recent response times of a service,
+        or `None` if it has not answered yet."""
+        with self._lock:
+            times = [t for t in self._load().get(url, []) if t is not None]
+        if not times:
+            return None
+        return float(np.percentile(times, q))
+
+    def failure_rate(self, url):
+        """The fraction of the recent queries of a service that failed."""
+        with self._lock:
+            times = self._load().get(url, [])
+        if not times:
+            return 0.
+        return sum(t is None for t in times) / len(times)
+
+    def order(self, urls):
+        """Sort access URLs by increasing median response time.
+
+        Services that failed most of their recent queries come last, and
+        services never queried come after the others.
+
+        """
+        def key(url):
+            median = self.percentile(url, 50)
+            return (self.failure_rate(url) >= 0.5, median is None,
+                    median or 0)
+        return sorted(urls, key=key)
+
+
+_service_latencies = None
+_service_latencies_lock = threading.Lock()
+
+
+def get_service_latencies():
+    """The `ServiceLatencies` of the session, kept in
+    ``vo_conesearch/latencies.json`` in the astroquery cache directory."""
+    global _service_latencies
+    with _service_latencies_lock:
+        if _service_latencies is None:
+            _service_latencies = ServiceLatencies(os.path.join(
+                paths.get_cache_dir(), 'astroquery', 'vo_conesearch',
+                'latencies.json'))
+    return _service_latencies
+
+
 def _get_catalogs(service_type, catalog_db, **kwargs):
     """
     Expand ``catalog_db`` to a list of catalogs.
@@ -711,6 +826,62 @@ def _get_catalogs(service_type, catalog_db, **kwargs):
     return catalogs
 
 
+def _get_catalog_url(service_type, catalog, cache=True, verbose=True):
+    """Access URL of a catalog returned by :func:`_get_catalogs`."""
+    if isinstance(catalog, six.string_types):
+        if catalog.startswith('http'):
+            return catalog
+        remote_db = get_remote_catalog_db(service_type, cache=cache,
+                                          verbose=verbose)
+        catalog = remote_db.get_catalog(catalog)
+    return catalog['url']
+
+
+def _call_services(urls, request, race=1, hedge=False, on_error=None):
+    """Call ``request`` with each access URL until one returns a result.
+
+    With ``race`` above 1 or ``hedge``, the services are queried
+    concurrently with :func:`~astroquery.vo_conesearch.vo_async.race_services`,
+    fastest first, and their response times are recorded in
+    :func:`get_service_latencies`.
+
+    Returns
+    -------
+    result
+        The result of the first service to answer, or `None`.
+
+    """
+    if race <= 1 and not hedge:
+        for url in urls:
+            try:
+                return request(url)
+            except Exception as e:
+                if on_error is not None:
+                    on_error(url, e)
+        return None
+
+    latencies = get_service_latencies()
+
+    def timed_request(url):
+        with latencies.timing(url):
+            return request(url)
+
+    if hedge:
+        def hedge_after(url):
+            return latencies.percentile(url, conf.hedge_percentile)
+    else:
+        hedge_after = None
+    try:
+        found = race_services(latencies.order(urls), timed_request,
+                              race=max(race, 1), hedge_after=hedge_after,
+                              on_error=on_error)
+    finally:
+        latencies.save()
+    if found is None:
+        return None
+    return found[1]
+
+
 def _vo_service_request(url, pedantic, kwargs, cache=True, verbose=False):
     """
     This is called by :func:`call_vo_service`.
@@ -810,7 +981,8 @@ def vo_tab_parse(tab, url, kwargs):
 
 
 def call_vo_service(service_type, catalog_db=None, pedantic=None,
-                    verbose=True, cache=True, kwargs={}):
+                    verbose=True, cache=True, kwargs={}, race=None,
+                    hedge=False):
     """
     Makes a generic VO service call.
 
@@ -843,7 +1015,7 @@ def call_vo_service(service_type, catalog_db=None, pedantic=None,
               (see :ref:`vo-sec-client-vos`).
 
             - Any of the above 3 options combined in a list, in which case
-              they are tried in order.
+              they are tried in order (see ``race`` and ``hedge``).
 
     pedantic : bool or `None`
         When `True`, raise an error when the file violates the spec,
@@ -865,6 +1037,18 @@ def call_vo_service(service_type, catalog_db=None, pedantic=None,
         No checking is done that the arguments are accepted by
         the service, etc.
 
+    race : int or `None`
+        Number of services queried at once, the fastest ones first
+        (see :class:`ServiceLatencies`); the first valid result is
+        returned. When not provided, uses the configuration setting
+        ``astroquery.vo_conesearch.conf.race``, which defaults to 1:
+        the services are tried in order.
+
+    hedge : bool
+        Also query the next service when one has not answered after
+        the ``astroquery.vo_conesearch.conf.hedge_percentile`` percentile
+        of its recent response times.
+
     Returns
     -------
     obj : `astropy.io.votable.tree.Table`
@@ -876,39 +1060,38 @@ def call_vo_service(service_type, catalog_db=None, pedantic=None,
         If VO service request fails.
 
     """
-    n_timed_out = 0
+    timed_out = []
     catalogs = _get_catalogs(service_type, catalog_db, cache=cache,
                              verbose=verbose)
 
     if pedantic is None:  # pragma: no cover
         pedantic = conf.pedantic
+    if race is None:
+        race = conf.race
 
-    for name, catalog in catalogs:
-        if isinstance(catalog, six.string_types):
-            if catalog.startswith('http'):
-                url = catalog
-            else:
-                remote_db = get_remote_catalog_db(service_type, cache=cache,
-                                                  verbose=verbose)
-                catalog = remote_db.get_catalog(catalog)
-                url = catalog['url']
-        else:
-            url = catalog['url']
+    urls = [_get_catalog_url(service_type, catalog, cache=cache,
+                             verbose=verbose)
+            for name, catalog in catalogs]
 
+    def request(url):
         if verbose:  # pragma: no cover
             color_print('Trying {0}'.format(url), 'green')
+        return _vo_service_request(url, pedantic, kwargs, cache=cache,
+                                   verbose=verbose)
 
-        try:
-            return _vo_service_request(url, pedantic, kwargs, cache=cache,
-                                       verbose=verbose)
-        except Exception as e:
-            vo_warn(W25, (url, str(e)))
-            if hasattr(e, 'reason') and isinstance(e.reason, socket.timeout):
-                n_timed_out += 1
+    def failed(url, e):
+        vo_warn(W25, (url, str(e)))
+        if hasattr(e, 'reason') and isinstance(e.reason, socket.timeout):
+            timed_out.append(url)
+
+    result = _call_services(urls, request, race=race, hedge=hedge,
+                            on_error=failed)
+    if result is not None:
+        return result
 
     err_msg = 'None of the available catalogs returned valid results.'
-    if n_timed_out > 0:
-        err_msg += ' ({0} URL(s) timed out.)'.format(n_timed_out)
+    if len(timed_out) > 0:
+        err_msg += ' ({0} URL(s) timed out.)'.format(len(timed_out))
     raise VOSError(err_msg)
 
 
@@ -3,16 +3,17 @@ from __future__ import print_function
 
 import warnings
 import re
+import tempfile
 import time
 from math import cos, radians
 import requests
 from bs4 import BeautifulSoup
 from io import StringIO
 
-from six import BytesIO
 import astropy.units as u
 import astropy.coordinates as coord
 import astropy.io.votable as votable
+import astropy.utils.data as aud
 
 from ..query import QueryWithLogin
 from ..exceptions import InvalidQueryError, TimeoutError, NoResultsWarning
@@ -36,6 +37,8 @@ class BaseWFAUClass(QueryWithLogin):
     REGION_URL = BASE_URL + "WSASQL"
     CROSSID_URL = BASE_URL + "CrossID"
     TIMEOUT = ""
+    # number of bytes of an unparsable VOTable kept in self.response
+    _PARSE_ERROR_SIZE = 2 ** 20
 
     def __init__(self, username=None, password=None, community=None,
                  database='', programme_id='all'):
@@ -211,7 +214,7 @@ class BaseWFAUClass(QueryWithLogin):
 
         if get_query_payload:
             return readable_objs
-        return [obj.get_fits() for obj in readable_objs]
+        return commons.get_fits_list(readable_objs)
 
     def get_images_async(self, coordinates, waveband='all', frame_type='stack',
                          image_width=1 * u.arcmin, image_height=None,
@@ -607,29 +610,39 @@ class BaseWFAUClass(QueryWithLogin):
         if len(table_links) == 0:
             raise Exception("No VOTable found on returned webpage!")
         table_link = [link for link in table_links if "8080" not in link][0]
-        with commons.get_readable_fileobj(table_link) as f:
-            content = f.read()
 
         if not verbose:
             commons.suppress_vo_warnings()
 
-        try:
-            io_obj = BytesIO(content.encode('utf-8'))
-            parsed_table = votable.parse(io_obj, pedantic=False)
-            first_table = parsed_table.get_first_table()
-            table = first_table.to_table()
-            if len(table) == 0:
-                warnings.warn("Query returned no results, so the table will "
-                              "be empty", NoResultsWarning)
-            return table
-        except Exception as ex:
-            self.response = content
-            self.table_parse_error = ex
-            raise
-            raise TableParseError("Failed to parse WFAU votable! The raw "
-                                  "response can be found in self.response, "
-                                  "and the error in self.table_parse_error.  "
-                                  "Exception: " + str(self.table_parse_error))
+        # stream the VOTable to a temporary file and parse it from there, so
+        # that it is never held in memory besides the table
+        response = self._wfau_get(table_link, stream=True)
+        response.raise_for_status()
+        with tempfile.TemporaryFile() as f:
+            for block in response.iter_content(aud.conf.download_block_size):
+                f.write(block)
+            f.seek(0)
+            try:
+                parsed_table = votable.parse(f, pedantic=False)
+                first_table = parsed_table.get_first_table()
+                table = first_table.to_table()
+            except Exception as ex:
+                # the streamed response is consumed: keep the beginning
+                # of the VOTable instead
+                f.seek(0)
+                self.response = f.read(self._PARSE_ERROR_SIZE).decode(
+                    'utf-8', 'replace')
+                self.table_parse_error = ex
+                raise
+                raise TableParseError("Failed to parse WFAU votable! The raw "
+                                      "response can be found in "
+                                      "self.response, and the error in "
+                                      "self.table_parse_error.  Exception: " +
+                                      str(self.table_parse_error))
+        if len(table) == 0:
+            warnings.warn("Query returned no results, so the table will "
+                          "be empty", NoResultsWarning)
+        return table
 
     def list_catalogs(self, style='short'):
         """
@@ -657,12 +670,7 @@ class BaseWFAUClass(QueryWithLogin):
             return list(self.programmes_short.keys())
 
     def _get_databases(self):
-        if self.logged_in():
-            response = self.session.get(url="/".join([self.BASE_URL,
-                                                      self.IMAGE_FORM]))
-        else:
-            response = requests.get(url="/".join([self.BASE_URL,
-                                                  self.IMAGE_FORM]))
+        response = self._wfau_get("/".join([self.BASE_URL, self.IMAGE_FORM]))
 
         root = BeautifulSoup(response.content, features='html5lib')
         databases = [x.attrs['value'] for x in
@@ -701,13 +709,36 @@ class BaseWFAUClass(QueryWithLogin):
                                      timeout=self.TIMEOUT)
         return response
 
-    def _check_page(self, url, keyword, wait_time=1, max_attempts=30):
-        page_loaded = False
-        while not page_loaded and max_attempts > 0:
-            if self.logged_in():
-                response = self.session.get(url)
-            else:
-                response = requests.get(url=url)
+    def _wfau_get(self, url, **kwargs):
+        """
+        GET ``url`` uncached, in the login session if any, and otherwise in
+        the session of the class.
+        """
+        if self.logged_in():
+            return self.session.get(url, timeout=self.TIMEOUT, **kwargs)
+        return self._request("GET", url=url, timeout=self.TIMEOUT,
+                             cache=False, **kwargs)
+
+    def _check_page(self, url, keyword, wait_time=0.5, max_attempts=30,
+                    max_wait_time=8, max_total_wait=30):
+        """
+        Poll ``url`` until it contains ``keyword``.
+
+        The page is checked at once, then after ``wait_time`` seconds, a
+        wait multiplied by 1.5 at each attempt, up to ``max_wait_time``.
+        It is given up after ``max_attempts`` checks or ``max_total_wait``
+        seconds of waiting in total.
+        """
+        waited = 0
+        for attempt in range(max_attempts):
+            if attempt > 0:
+                if waited >= max_total_wait:
+                    break
+                wait = min(wait_time, max_total_wait - waited)
+                time.sleep(wait)
+                waited += wait
+                wait_time = min(wait_time * 1.5, max_wait_time)
+            response = self._wfau_get(url)
             self.response = response
             content = response.text
             if re.search("error", content, re.IGNORECASE):
@@ -715,13 +746,8 @@ class BaseWFAUClass(QueryWithLogin):
                     "Service returned with an error!  "
                     "Check self.response for more information.")
             elif re.search(keyword, content, re.IGNORECASE):
-                page_loaded = True
-            max_attempts -= 1
-            # wait for wait_time seconds before checking again
-            time.sleep(wait_time)
-        if page_loaded is False:
-            raise TimeoutError("Page did not load.")
-        return response
+                return response
+        raise TimeoutError("Page did not load.")
 
     def query_cross_id_async(self, coordinates, radius=1*u.arcsec,
                              programme_id=None, database=None, table="source",